@@ -5,10 +5,32 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 from enum import Enum
 import uuid
+from pathlib import Path
+from urllib.parse import urlsplit
 
 from .test_agent import WebTestAgent
 from .enhanced_test_agent import EnhancedTestAgent
+from .trajectory_store import TrajectoryStore
+from .llm_gateway import TaskUsage, current_task_usage
+from .llm_cache import llm_cache_enabled
+from .dom_compactor import settings_for
+from .step_profiler import profile_aggregator
+from .run_budget import budget_for
+from .session_store import SessionStore, CredentialProfile
+from ..automation.scenario_executor import ScenarioExecutor
+from ..automation.suite_runner import SuiteRunner
+from ..automation.browser_pool import BrowserPool
+from ..automation.mcp_pool import MCPServerPool, get_mcp_server_pool
+from ..automation.performance_probe import PerformanceProbe
+from ..automation.load_tester import LoadTester, LoadProfile
+from ..automation.network_monitor import NetworkMonitor, validate_block_profiles
+from ..scenarios.scenario_builder import ScenarioType
+from ..scenarios.suite_planner import filter_scenarios
+from ..scenarios.scenario_graph import ScenarioGraph
+from ..scenarios.scenario_registry import ScenarioRegistry
+from ..scenarios.scenario_cache import ScenarioCache
 from ..database.model import Database, TestResultRepository
+from ..utils.config import Config
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +45,9 @@ class AgentType(Enum):
     ENHANCED_TEST = "enhanced_test"
     FORM_TEST = "form_test"
     PERFORMANCE_TEST = "performance_test"
+    SCENARIO_TEST = "scenario_test"
+    SCENARIO_SUITE = "scenario_suite"
+    LOAD_TEST = "load_test"
 
 class AgentTask:
     def __init__(self, 
@@ -48,7 +73,11 @@ class AgentTask:
 class AgentManager:
     """Manager để quản lý và thực thi các AI agents với database persistence"""
     
-    def __init__(self, max_concurrent_agents: int = 3):
+    # Agent types that drive their own browser processes (or lease their own contexts)
+    UNPOOLED_AGENT_TYPES = {AgentType.SCENARIO_SUITE, AgentType.PERFORMANCE_TEST, AgentType.LOAD_TEST}
+    
+    def __init__(self, max_concurrent_agents: int = 3, browser_pool: BrowserPool = None,
+                 scenario_registry: ScenarioRegistry = None, mcp_pool: MCPServerPool = None):
         self.max_concurrent_agents = max_concurrent_agents
         self.task_queue = []
         self.active_agents = {}
@@ -60,9 +89,27 @@ class AgentManager:
             AgentType.WEB_TEST: WebTestAgent,
             AgentType.ENHANCED_TEST: EnhancedTestAgent,
             AgentType.FORM_TEST: WebTestAgent,
-            AgentType.PERFORMANCE_TEST: EnhancedTestAgent
+            AgentType.PERFORMANCE_TEST: EnhancedTestAgent,
+            AgentType.SCENARIO_TEST: WebTestAgent,  # only used as LLM fallback
+            AgentType.SCENARIO_SUITE: WebTestAgent,
+            AgentType.LOAD_TEST: WebTestAgent
         }
         
+        # Parsed scenarios (suites, login flows), shared with the API when it passes its registry
+        self.scenario_registry = scenario_registry or ScenarioRegistry(cache=ScenarioCache())
+        
+        # Warm browsers shared by all agents
+        self.browser_pool = browser_pool or BrowserPool()
+        
+        # Playwright MCP servers: each browser task holds a session slot, balanced and capped per instance
+        self.mcp_pool = mcp_pool or get_mcp_server_pool()
+        
+        # Action histories of successful LLM runs, replayed by later identical tasks
+        self.trajectory_store = TrajectoryStore(Config.TRAJECTORY_DIR) if Config.TRAJECTORY_REPLAY else None
+        
+        # Logged-in storage states per origin and credential profile, shared by all tasks
+        self.session_store = SessionStore(Config.SESSION_DIR, Config.SESSION_MAX_AGE) if Config.SESSION_WARM_START else None
+        
         # Database integration
         self.database = Database()
         self.test_repo = TestResultRepository(self.database)
@@ -74,6 +121,7 @@ class AgentManager:
         # Task timeout settings
         self.task_timeout = 300  # 5 minutes timeout
         self._cleanup_task = None
+        self._pool_health_task = None
         
         # Load existing tasks from database on startup
         self._load_tasks_from_database()
@@ -228,11 +276,28 @@ class AgentManager:
             except Exception as e:
                 logger.error(f"Error in cleanup task: {e}")
     
+    async def _check_browser_pool(self):
+        """Background task replacing idle pooled browsers that lost their connection"""
+        while self._running:
+            try:
+                await asyncio.sleep(Config.BROWSER_POOL_HEALTH_INTERVAL)
+                report = await self.browser_pool.health_check()
+                if report["replaced"]:
+                    logger.warning(f"Replaced {report['replaced']} disconnected pooled browser(s)")
+            except Exception as e:
+                logger.error(f"Error in browser pool health check: {e}")
+    
     async def start(self):
         """Start the agent manager"""
         self._running = True
+        try:
+            await self.browser_pool.start()
+        except Exception as e:
+            # Tasks will retry starting the pool on first lease
+            logger.error(f"Failed to pre-launch browser pool: {e}")
         self._processor_task = asyncio.create_task(self._process_queue())
         self._cleanup_task = asyncio.create_task(self._cleanup_stuck_tasks())
+        self._pool_health_task = asyncio.create_task(self._check_browser_pool())
         logger.info("Agent Manager started")
     
     async def stop(self):
@@ -250,6 +315,13 @@ class AgentManager:
                 await self._cleanup_task
             except asyncio.CancelledError:
                 pass
+        if self._pool_health_task:
+            self._pool_health_task.cancel()
+            try:
+                await self._pool_health_task
+            except asyncio.CancelledError:
+                pass
+        await self.browser_pool.stop()
         logger.info("Agent Manager stopped")
     
     async def submit_task(self, 
@@ -259,6 +331,9 @@ class AgentManager:
         """Submit a new task to the queue"""
         
         task = AgentTask(agent_type, task_description, parameters)
+        if agent_type not in self.UNPOOLED_AGENT_TYPES:
+            # A bad profile would only fail (and be retried) once the task runs
+            validate_block_profiles(task.parameters.get("block_resources", Config.NETWORK_BLOCK_PROFILES))
         self.task_queue.append(task)
         self.task_history[task.id] = task
         
@@ -289,6 +364,12 @@ class AgentManager:
         task.status = TaskStatus.RUNNING
         task.started_at = datetime.now()
         
+        # LLM calls made while this task runs are accounted here (priority 1-5, 5 highest)
+        usage = TaskUsage(priority=task.parameters.get("priority", 1))
+        current_task_usage.set(usage)
+        # Exploratory runs opt out so the LLM sees every page fresh
+        llm_cache_enabled.set(task.parameters.get("llm_cache", True))
+        
         # Create database execution record
         try:
             # Create test suite if not exists
@@ -308,9 +389,31 @@ class AgentManager:
             logger.error(f"Failed to create execution record: {e}")
             task.execution_id = None
         
+        lease = None
+        mcp_session = None
+        network = None
+        har_path = None
         try:
-            # Create agent
-            agent = self.agent_factories[task.agent_type]()
+            # Create agent on a warm, isolated browser context
+            agent = self._create_agent(task)
+            agent.session_store = self.session_store
+            if task.agent_type not in self.UNPOOLED_AGENT_TYPES:
+                network = NetworkMonitor(
+                    block_profiles=task.parameters.get("block_resources", Config.NETWORK_BLOCK_PROFILES),
+                    first_party=urlsplit(task.parameters.get("url", "")).netloc or None
+                )
+                context_options = {}
+                if task.parameters.get("capture_har", Config.NETWORK_CAPTURE_HAR):
+                    Path(Config.HAR_DIR).mkdir(exist_ok=True)
+                    har_path = str(Path(Config.HAR_DIR) / f"{task.id}.har")
+                    context_options = NetworkMonitor.har_context_options(har_path)
+                # Without a running MCP server the task still runs, it just holds no slot
+                mcp_session = await self.mcp_pool.acquire(required=False)
+                agent.mcp_session = mcp_session
+                lease = await self.browser_pool.acquire(task.parameters.get("browser", "chromium"), **context_options)
+                await network.attach(lease.context)
+                agent.browser_lease = lease
+                agent.credential_profile = self._credential_profile(task, lease)
             self.active_agents[task.id] = agent
             
             logger.info(f"Starting task execution: {task.id}")
@@ -324,9 +427,31 @@ class AgentManager:
                 result = await self._execute_form_test(agent, task)
             elif task.agent_type == AgentType.PERFORMANCE_TEST:
                 result = await self._execute_performance_test(agent, task)
+            elif task.agent_type == AgentType.SCENARIO_TEST:
+                result = await self._execute_scenario_test(agent, task)
+            elif task.agent_type == AgentType.SCENARIO_SUITE:
+                result = await self._execute_scenario_suite(agent, task)
+            elif task.agent_type == AgentType.LOAD_TEST:
+                result = await self._execute_load_test(agent, task)
             else:
                 result = await agent.execute_task(task.task_description)
             
+            if network is not None:
+                # The HAR file itself is written by Playwright when the leased context closes
+                result["network"] = {**await network.summary(), "har_path": har_path}
+            result["llm_usage"] = usage.to_dict()
+            if agent.dom_compactor is not None:
+                result["dom_compaction"] = agent.dom_compactor.get_report()
+            if agent.profiler.steps or agent.profiler.segments:
+                result["profile"] = agent.profiler.to_dict()
+                profile_aggregator.add(task.agent_type.value, agent.profiler,
+                                       (datetime.now() - task.started_at).total_seconds())
+            if agent.credential_profile is not None:
+                result["warm_session"] = agent.warm_session
+                if agent.warm_session and result.get("status") == "error":
+                    # The app may have rejected the restored session: log in again next time
+                    self.session_store.invalidate(agent.credential_profile.url, agent.credential_profile.name)
+            
             # Task completed successfully
             task.result = result
             task.status = TaskStatus.COMPLETED
@@ -344,7 +469,7 @@ class AgentManager:
             task.completed_at = datetime.now()
             
             # Save error to database
-            await self._save_task_result(task, {"error": str(e)})
+            await self._save_task_result(task, {"error": str(e), "llm_usage": usage.to_dict()})
             
             logger.error(f"Task failed: {task.id} - {e}")
             
@@ -357,6 +482,11 @@ class AgentManager:
         
         finally:
             # Cleanup
+            if lease is not None:
+                await self.browser_pool.release(lease)
+            if mcp_session is not None:
+                await self.mcp_pool.release(mcp_session)
+            
             if task.id in self.active_agents:
                 del self.active_agents[task.id]
             
@@ -366,6 +496,42 @@ class AgentManager:
             # Continue processing queue
             await self._process_queue()
     
+    def _create_agent(self, task: AgentTask):
+        """New agent of the task's type with the task's replay, routing, compaction and budget settings"""
+        agent = self.agent_factories[task.agent_type]()
+        if task.parameters.get("replay", True):
+            agent.trajectory_store = self.trajectory_store
+        agent.model_routing = task.parameters.get("model_routing", Config.MODEL_ROUTING)
+        agent.compaction_overrides = task.parameters.get("dom_compaction")
+        agent.compaction = settings_for(task.agent_type.value, agent.compaction_overrides)
+        agent.budget = budget_for(task.agent_type.value, task.parameters.get("budget"))
+        return agent
+    
+    def _credential_profile(self, task: AgentTask, lease) -> Optional[CredentialProfile]:
+        """Login of the task's ``session_profile``: the id of a saved login scenario
+        (or a ``login_scenario`` passed with the task), run without the LLM
+        
+        The login runs on the task's own lease, never a second one, so tasks
+        waiting for a login cannot hold up each other's browser slots.
+        """
+        name = task.parameters.get("session_profile")
+        if self.session_store is None or not name:
+            return None
+        
+        scenario = task.parameters.get("login_scenario") or self.scenario_registry.get(name)
+        if scenario is None:
+            logger.warning(f"No login scenario for session profile '{name}', starting cold")
+            return None
+        
+        async def login() -> Dict[str, Any]:
+            executor = ScenarioExecutor(browser_type=lease.browser_type)
+            result = await executor.execute(scenario, lease.page)
+            if result["status"] != "success":
+                raise RuntimeError(f"Login scenario {scenario.id} failed: {result.get('error')}")
+            return await lease.context.storage_state()
+        
+        return CredentialProfile(name=name, url=task.parameters.get("url") or scenario.url, login=login)
+    
     async def _save_task_result(self, task: AgentTask, result: Dict[str, Any]):
         """Save task result to database"""
         if not task.execution_id:
@@ -373,19 +539,27 @@ class AgentManager:
             return
         
         try:
+            # LLM agents return the browser_use history here, not a dict of details
+            details = result.get("result") if isinstance(result.get("result"), dict) else {}
+            performance_metrics = dict(details.get("performance_metrics") or {})
+            if "network" in result:
+                performance_metrics["network"] = result["network"]
+            if "llm_usage" in result:
+                performance_metrics["llm_usage"] = result["llm_usage"]
+            
             # Prepare result data
             result_data = {
-                "scenario_id": task.id,
+                "scenario_id": result.get("scenario_id", task.id),
                 "scenario_name": task.task_description[:200],  # Truncate if too long
                 "status": "passed" if task.status == TaskStatus.COMPLETED else "failed",
                 "execution_time": result.get("execution_time", 0),
                 "url": task.parameters.get("url", ""),
                 "browser": task.parameters.get("browser", "chromium"),
-                "actions_performed": result.get("result", {}).get("actions_performed", []),
-                "assertions_checked": result.get("result", {}).get("assertions_checked", []),
-                "screenshots_taken": result.get("result", {}).get("screenshots", []),
+                "actions_performed": details.get("actions_performed", []),
+                "assertions_checked": details.get("assertions_checked", []),
+                "screenshots_taken": details.get("screenshots", result.get("screenshots", [])),
                 "error_details": task.error,
-                "performance_metrics": result.get("result", {}).get("performance_metrics", {})
+                "performance_metrics": performance_metrics
             }
             
             # Save test result
@@ -446,31 +620,96 @@ class AgentManager:
             return await agent.execute_task(task.task_description)
     
     async def _execute_performance_test(self, agent: EnhancedTestAgent, task: AgentTask) -> Dict[str, Any]:
-        """Execute performance test task"""
+        """Execute performance test task by measuring the page in the browser"""
         url = task.parameters.get("url")
         
         if url:
-            performance_task = f"""
-            Navigate to {url} and perform comprehensive performance testing:
-            
-            Performance metrics to check:
-            1. Page load time (aim for < 3 seconds)
-            2. Time to first contentful paint
-            3. Largest contentful paint
-            4. Check for broken images or missing resources
-            5. Test navigation speed between pages
-            6. Verify page doesn't have excessive JavaScript errors
-            7. Check network requests efficiency
-            8. Analyze Core Web Vitals (LCP, FID, CLS)
-            
-            Document any performance issues and loading problems.
-            Provide recommendations for improvement if issues found.
-            """
-            
-            return await agent.execute_performance_test(performance_task)
+            probe = PerformanceProbe(
+                self.browser_pool,
+                runs=task.parameters.get("runs", 5),
+                budgets=task.parameters.get("budgets")
+            )
+            result = await probe.measure(url, browser=task.parameters.get("browser", "chromium"))
+            result["task"] = task.task_description
+            return result
         else:
             return await agent.execute_task(task.task_description)
     
+    async def _execute_scenario_test(self, agent: WebTestAgent, task: AgentTask) -> Dict[str, Any]:
+        """Execute scenario actions directly via Playwright, LLM agent only as fallback"""
+        scenario = task.parameters.get("scenario")
+        
+        if scenario is None:
+            return await agent.execute_task(task.task_description)
+        
+        use_fallback = task.parameters.get("llm_fallback", True)
+        executor = ScenarioExecutor(
+            fallback_agent=agent if use_fallback else None,
+            browser_type=task.parameters.get("browser", "chromium")
+        )
+        
+        # The fallback agent shares the leased context, so it continues from the same page state
+        if agent.browser_lease is not None:
+            return await executor.execute(scenario, agent.browser_lease.page)
+        return await executor.run(scenario)
+    
+    async def _execute_scenario_suite(self, agent: WebTestAgent, task: AgentTask) -> Dict[str, Any]:
+        """Execute a filtered set of scenarios as one sharded suite"""
+        available = task.parameters.get("scenarios")
+        if available is None:
+            available = self.scenario_registry.all()
+        
+        scenario_types = [ScenarioType(t) for t in task.parameters.get("scenario_types") or []]
+        scenarios = filter_scenarios(
+            available,
+            tags=task.parameters.get("tags"),
+            scenario_types=scenario_types,
+            min_priority=task.parameters.get("min_priority")
+        )
+        scenarios = ScenarioGraph.with_dependencies(scenarios, available)
+        
+        runner = SuiteRunner(
+            shard_count=task.parameters.get("shards", 4),
+            browser_processes=task.parameters.get("browser_processes", 1),
+            browser_type=task.parameters.get("browser", "chromium"),
+            # LLM fallback is opt-in for suites, it would serialize on the LLM otherwise.
+            # Every fallback gets its own agent, bound to the failing scenario's context
+            fallback_agent_factory=(lambda: self._create_agent(task)) if task.parameters.get("llm_fallback", False) else None,
+            test_repo=self.test_repo,
+            execution_id=task.execution_id,
+            memoize_setup=task.parameters.get("memoize_setup", True)
+        )
+        
+        result = await runner.run(scenarios)
+        
+        if task.execution_id:
+            summary = result["result"]["summary"]
+            try:
+                self.test_repo.update_execution_counts(
+                    task.execution_id,
+                    summary["total_scenarios"],
+                    summary["passed"],
+                    summary["failed"]
+                )
+            except Exception as e:
+                logger.error(f"Failed to update suite counts in database: {e}")
+        
+        return result
+    
+    async def _execute_load_test(self, agent: WebTestAgent, task: AgentTask) -> Dict[str, Any]:
+        """Replay a scenario with concurrent synthetic users"""
+        scenario = task.parameters.get("scenario")
+        
+        if scenario is None:
+            raise ValueError("Load test requires a scenario")
+        
+        profile = LoadProfile(**{
+            key: task.parameters[key] for key in LoadProfile.__dataclass_fields__ if key in task.parameters
+        })
+        tester = LoadTester(self.browser_pool, profile)
+        
+        return await tester.run(scenario)
+    
     async def cancel_task(self, task_id: str) -> bool:
         """Cancel a pending or running task"""
         task = self.task_history.get(task_id)
@@ -3,12 +3,21 @@ import asyncio
 import logging
 import logging.handlers
 import os
+import time
+import textwrap
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
-from browser_use import Agent
-from browser_use.llm import ChatAnthropic
+from browser_use import Agent, BrowserSession
+from browser_use.agent.views import AgentHistoryList, ActionResult
+from .llm_gateway import get_llm_gateway
+from .model_router import ModelRouter, create_chat_model
+from .dom_compactor import DomCompactor, CompactingChatModel, settings_for
+from .step_profiler import StepProfiler, ProfilingChatModel
+from .run_budget import RunGuard, budget_for
+from .trajectory_store import TrajectoryStore, divergent_step, describe_steps
+from .session_store import SessionStore, CredentialProfile, restore_storage_state
 from ..utils.config import Config
 
 # Setup logging with file handler
@@ -62,30 +71,243 @@ class BaseTestAgent(ABC):
     
     def __init__(self, model: str = None):
         self.model = model or Config.CLAUDE_MODEL
-        self.llm = ChatAnthropic(
-            model=self.model,
-            api_key=Config.ANTHROPIC_API_KEY
-        )
+        # Shared connections, rate limits and usage accounting across all agents
+        self.llm = get_llm_gateway().chat_model(self.model)
+        # Routine steps on a smaller model, escalating to self.llm (AgentManager may override per task)
+        self.model_routing = Config.MODEL_ROUTING
+        # Page state compaction profile (AgentManager picks the one of the task's AgentType)
+        self.compaction = settings_for(None)
+        self.compaction_overrides: Optional[Dict[str, Any]] = None
+        self.dom_compactor: Optional[DomCompactor] = None
+        # Router of the agent run being built/run; told each step's outcome
+        self.model_router: Optional[ModelRouter] = None
+        # Per-step timing of this agent's task (one agent instance per task)
+        self.profiler = StepProfiler()
+        # Step / wall time / token limits (AgentManager picks the task's AgentType profile)
+        self.budget = budget_for(None)
+        # VERIFY actions that, once all satisfied on the page, end the run successfully
+        self.expectations: List = []
+        self.run_guard: Optional[RunGuard] = None
         self.agent = None
         self.last_result = None
+        # Warm browser context leased from BrowserPool (set by AgentManager)
+        self.browser_lease = None
+        # MCP server session slot held for the task, None without MCP (set by AgentManager)
+        self.mcp_session = None
+        # Recorded action histories replayed before asking the LLM (set by AgentManager)
+        self.trajectory_store: Optional[TrajectoryStore] = None
+        # Logged-in storage states reused across tasks (both set by AgentManager)
+        self.session_store: Optional[SessionStore] = None
+        self.credential_profile: Optional[CredentialProfile] = None
+        self.warm_session = False
+        self.last_system_prompt = None
+        self.last_trajectory = None
         
     async def create_agent(self, task: str, system_prompt: str = None, **kwargs) -> Agent:
         """Tạo Browser Use agent với task cụ thể và system prompt tùy chọn"""
         logger.info(f"Creating agent with task: {task[:100]}...")
         
+        # Start already logged in instead of spending the first steps on the login form
+        storage_state = await self._warm_session_state()
+        
+        started = time.monotonic()
+        agent_kwargs = dict(kwargs)
+        
+        # Reuse the leased warm browser instead of launching a new one
+        if self.browser_lease is not None and "browser_session" not in agent_kwargs:
+            session_options = {}
+            if self._compaction_enabled:
+                # Elements further than this below the viewport are not serialized at all
+                session_options["viewport_expansion"] = self.compaction.viewport_expansion
+            # Playwright context handed to browser_use: needs the browser-use 0.5 pin in requirements.txt
+            agent_kwargs["browser_session"] = BrowserSession(
+                browser_context=self.browser_lease.context,
+                keep_alive=True,  # the pool owns the context and closes it on release
+                **session_options
+            )
+            self.profiler.attach(self.browser_lease.context)
+            if storage_state:
+                await restore_storage_state(self.browser_lease.context, storage_state)
+        elif storage_state and "browser_session" not in agent_kwargs:
+            agent_kwargs["browser_session"] = BrowserSession(storage_state=storage_state)
+        
+        agent = self._build_agent(task, system_prompt, **agent_kwargs)
+        self.profiler.record("create_agent", time.monotonic() - started)
+        return agent
+    
+    def _build_agent(self, task: str, system_prompt: str = None, **kwargs) -> Agent:
+        """browser_use Agent with this task's LLM chain and system prompt (no browser setup)"""
+        self.last_system_prompt = system_prompt
         agent_kwargs = {
             "task": task,
-            "llm": self.llm,
+            "llm": self._step_llm(),
             **kwargs
         }
         
-        # Add system prompt if provided
+        # Add system prompt if provided: appended to browser_use's own system message so the
+        # whole static prefix (instructions, action schema, specialized prompt) is prompt-cached
         if system_prompt:
-            agent_kwargs["system_prompt"] = system_prompt
+            agent_kwargs["extend_system_message"] = textwrap.dedent(system_prompt).strip()
             logger.info(f"Using specialized system prompt for agent")
         
         return Agent(**agent_kwargs)
         
+    async def _warm_session_state(self) -> Optional[Dict[str, Any]]:
+        """Storage state of the task's credential profile; a failed login falls back to a cold start"""
+        self.warm_session = False
+        if self.session_store is None or self.credential_profile is None:
+            return None
+        started = time.monotonic()
+        try:
+            state = await self.session_store.get_or_login(self.credential_profile)
+        except Exception as e:
+            logger.warning(f"Login with profile '{self.credential_profile.name}' failed ({e}), starting cold")
+            return None
+        finally:
+            self.profiler.record("warm_session", time.monotonic() - started)
+        self.warm_session = True
+        return state
+    
+    def use_compaction_profile(self, profile: str):
+        """Compact with another profile (keeping the task's overrides) from the next agent on"""
+        self.compaction = settings_for(profile, self.compaction_overrides)
+        self.dom_compactor = None
+    
+    @property
+    def _compaction_enabled(self) -> bool:
+        return Config.DOM_COMPACTION and self.compaction.enabled
+    
+    def _step_llm(self):
+        """LLM for one agent run: a fresh router (its escalation state is per run) or the large model,
+        behind the page state compactor"""
+        llm = self.llm
+        self.model_router = None
+        if self.model_routing:
+            llm = self.model_router = ModelRouter(small=create_chat_model(Config.ROUTER_SMALL_MODEL),
+                                                  large=self.llm)
+        
+        if self._compaction_enabled:
+            # One compactor per task so a continuation run diffs against the replayed steps
+            if self.dom_compactor is None:
+                self.dom_compactor = DomCompactor(self.compaction)
+            llm = CompactingChatModel(llm, self.dom_compactor)
+        return ProfilingChatModel(llm, self.profiler)
+    
+    async def run_agent(self, agent: Agent, agent_type: str, url: str = None) -> AgentHistoryList:
+        """Chạy agent: replay trajectory đã lưu nếu có, chỉ gọi LLM từ step đầu tiên bị lệch
+        
+        Every ``agent.run()`` goes through here. Successful LLM runs are
+        recorded under (agent type, task, URL) so the next identical run
+        replays the same actions at browser speed. The recorded ``done``
+        step is never replayed: the LLM judges the outcome on the live
+        page, so a replay still catches content regressions.
+        """
+        self.run_guard = RunGuard(self.budget, self.profiler, self.expectations)
+        store = self.trajectory_store
+        if store is None:
+            self.last_trajectory = {"mode": "llm"}
+            return await self._run_profiled(agent)
+        
+        key = store.key(agent_type, agent.task, url)
+        recorded = store.load(key, agent.AgentOutput)
+        
+        if recorded is not None:
+            actions = recorded.history[:-1] if recorded.is_done() else recorded.history
+            started = time.monotonic()
+            try:
+                await agent.rerun_history(AgentHistoryList(history=actions), max_retries=1,
+                                          skip_failures=False, delay_between_actions=0)
+                self.profiler.record("replay", time.monotonic() - started)
+                store.mark_replayed(key)
+                logger.info(f"Replayed {len(actions)} steps of trajectory {key[:12]}, LLM checks the outcome")
+                return await self._continue_with_llm(agent, recorded, len(actions), key, agent_type, url)
+            except RuntimeError as e:
+                self.profiler.record("replay", time.monotonic() - started)
+                diverged_at = divergent_step(e)
+                if diverged_at is None:
+                    raise
+                logger.info(f"Trajectory {key[:12]} diverged at step {diverged_at + 1}, handing over to the LLM")
+                store.mark_replayed(key, diverged_at)
+                return await self._continue_with_llm(agent, recorded, diverged_at, key, agent_type, url)
+        
+        result = await self._run_profiled(agent)
+        self.last_trajectory = {"mode": "llm", "key": key, "replayed_steps": 0, "llm_steps": len(result.history)}
+        if result.is_successful():
+            store.save(key, result, agent_type, agent.task, url)
+        return result
+    
+    async def _run_profiled(self, agent: Agent) -> AgentHistoryList:
+        """agent.run() within the task's step budget, profiled and checked after every step"""
+        guard = self.run_guard
+        router = self.model_router
+        
+        async def on_step_end(running_agent):
+            if router is not None:
+                router.observe_step(running_agent.state.last_result)
+            await self.profiler.on_step_end(running_agent)
+            await guard.check(running_agent)
+        
+        result = await agent.run(
+            max_steps=guard.remaining_steps,
+            on_step_start=self.profiler.on_step_start,
+            on_step_end=on_step_end
+        )
+        guard.finish(result)
+        if guard.succeeded_early and not result.is_done() and result.history:
+            # Stopped because every expectation holds on the page: that is the task's successful end
+            result.history[-1].result.append(
+                ActionResult(is_done=True, success=True, extracted_content=guard.stop_reason)
+            )
+        return result
+    
+    def _run_outcome(self) -> Dict[str, Any]:
+        """Status, error and budget report of the last run_agent() call, for every result builder"""
+        guard = self.run_guard
+        outcome = {"status": "error" if guard.failed else "success", "budget": guard.report()}
+        if guard.failed:
+            outcome["error"] = guard.stop_reason
+        return outcome
+    
+    async def _continue_with_llm(self, agent: Agent, recorded: AgentHistoryList, diverged_at: int,
+                                 key: str, agent_type: str, url: str = None) -> AgentHistoryList:
+        """Let an LLM agent finish the task on the page the partial replay left behind"""
+        if diverged_at == 0:
+            continuation_task = agent.task
+        else:
+            continuation_task = (
+                f"{agent.task}\n\n"
+                f"The following steps were already completed in this browser, continue from the current page:\n"
+                + "\n".join(describe_steps(recorded, diverged_at))
+            )
+        
+        # Same browser session (and login) as the replay: no new session setup
+        continuation = self._build_agent(
+            continuation_task,
+            system_prompt=self.last_system_prompt,
+            browser_session=agent.browser_session
+        )
+        result = await self._run_profiled(continuation)
+        
+        combined = AgentHistoryList(history=recorded.history[:diverged_at] + result.history)
+        if not diverged_at:
+            mode = "llm"
+        elif recorded.is_done() and diverged_at == len(recorded.history) - 1:
+            mode = "replay"  # every action replayed, only the verdict came from the LLM
+        else:
+            mode = "partial_replay"
+        self.last_trajectory = {
+            "mode": mode,
+            "key": key,
+            "replayed_steps": diverged_at,
+            "llm_steps": len(result.history)
+        }
+        if result.is_successful():
+            self.trajectory_store.save(key, combined, agent_type, agent.task, url)
+        else:
+            # The page changed enough that the old trajectory no longer helps
+            self.trajectory_store.invalidate(key)
+        return combined
+    
     @abstractmethod
     async def execute_task(self, task: str) -> Dict[str, Any]:
         """Thực thi task - phải implement trong subclass"""
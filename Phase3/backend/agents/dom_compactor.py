@@ -0,0 +1,158 @@
+# backend/agents/dom_compactor.py
+import re
+import logging
+from dataclasses import dataclass, replace
+from typing import Dict, Any, List, Optional, Set
+
+from .llm_gateway import current_task_usage
+
+logger = logging.getLogger(__name__)
+
+# browser_use wraps the serialized page in these tags inside the state message
+BROWSER_STATE = re.compile(r"(<browser_state>)(.*?)(</browser_state>)", re.S)
+# "[12]<button ...>Text />", new elements are prefixed with "*"
+ELEMENT_LINE = re.compile(r"^(\s*\*?)\[(\d+)\](.*)$")
+
+@dataclass
+class CompactionSettings:
+    enabled: bool = True
+    viewport_expansion: int = 500   # px beyond the viewport whose elements are serialized (-1: whole page)
+    max_text_chars: int = 150       # longer lines are truncated
+    dedupe_after: int = 5           # keep this many lines of a run of similar text lines (0: keep all)
+    diff: bool = True               # shorten elements already sent on the previous step
+    max_unchanged_chars: int = 60
+
+# Per AgentType value; missing types use "default"
+COMPACTION_PROFILES: Dict[str, CompactionSettings] = {
+    "default": CompactionSettings(),
+    # Accessibility checks need full labels, alt texts and every repeated control
+    # (not an AgentType: WebTestAgent.test_ui_elements switches to it)
+    "ui_test": CompactionSettings(max_text_chars=400, dedupe_after=0, diff=False),
+    # Long forms: every field matters, wherever it is on the page
+    "form_test": CompactionSettings(viewport_expansion=-1, dedupe_after=0),
+    "performance_test": CompactionSettings(viewport_expansion=0, max_text_chars=80),
+}
+
+def settings_for(agent_type: Optional[str], overrides: Optional[Dict[str, Any]] = None) -> CompactionSettings:
+    """Profile of the agent type with per-task overrides applied"""
+    settings = COMPACTION_PROFILES.get(agent_type or "default", COMPACTION_PROFILES["default"])
+    return replace(settings, **overrides) if overrides else settings
+
+def _shape(line: str) -> str:
+    """Text line with numbers blanked: rows and list texts of the same kind share a shape"""
+    return re.sub(r"\d+", "#", line.strip())
+
+class DomCompactor:
+    """Thu gọn browser state trước khi gửi cho LLM, giữ lại state của step trước để diff
+
+    Off-screen pruning happens in browser_use itself through
+    ``viewport_expansion``; this stage truncates long lines, collapses
+    runs of similar text lines (table rows, price lists) and shortens
+    elements that were already sent in full on the previous step.
+    Interactive ``[index]`` elements are never dropped: the LLM can only
+    act on indices it sees. browser_use renumbers them every step, so an
+    element is recognized by its tag, attributes and text, not its index.
+    """
+
+    def __init__(self, settings: CompactionSettings = None):
+        self.settings = settings or CompactionSettings()
+        self._previous: Set[str] = set()
+        self.steps: List[Dict[str, int]] = []
+
+    def compact(self, state: str) -> str:
+        settings = self.settings
+        lines = state.split("\n")
+        seen_now: Set[str] = set()
+        output: List[str] = []
+
+        run_shape, run_length, omitted = None, 0, 0
+        for line in lines:
+            element = ELEMENT_LINE.match(line)
+            shape = None if element else _shape(line)
+            if settings.dedupe_after and shape and shape == run_shape:
+                run_length += 1
+                if run_length > settings.dedupe_after:
+                    omitted += 1
+                    continue
+            else:
+                if omitted:
+                    output.append(f"\t... {omitted} more similar lines omitted")
+                run_shape, run_length, omitted = shape, 1, 0
+
+            if element:
+                identity = element.group(3).strip()
+                seen_now.add(identity)
+                limit = settings.max_text_chars
+                if settings.diff and identity in self._previous:
+                    limit = settings.max_unchanged_chars
+                if len(line) > limit:
+                    line = line[:limit] + "…"
+            elif len(line) > settings.max_text_chars:
+                line = line[:settings.max_text_chars] + "…"
+            output.append(line)
+
+        if omitted:
+            output.append(f"\t... {omitted} more similar lines omitted")
+
+        self._previous = seen_now
+        return "\n".join(output)
+
+    def compact_message_text(self, text: str) -> str:
+        """Compact the browser state section of a state message and record the savings"""
+        match = BROWSER_STATE.search(text)
+        if not match:
+            return text
+
+        compacted = self.compact(match.group(2))
+        before, after = len(match.group(2)) // 4, len(compacted) // 4
+        self.steps.append({"step": len(self.steps) + 1, "tokens_before": before, "tokens_after": after})
+
+        usage = current_task_usage.get()
+        if usage is not None:
+            usage.dom_tokens_saved += before - after
+        logger.debug(f"Compacted page state from ~{before} to ~{after} tokens")
+        return text[:match.start(2)] + compacted + text[match.end(2):]
+
+    def get_report(self) -> Dict[str, Any]:
+        before = sum(step["tokens_before"] for step in self.steps)
+        after = sum(step["tokens_after"] for step in self.steps)
+        return {
+            "steps": self.steps,
+            "tokens_before": before,
+            "tokens_after": after,
+            "tokens_saved": before - after,
+            "reduction": 1 - after / before if before else None
+        }
+
+class CompactingChatModel:
+    """Chat model wrapper that compacts the latest page state before the LLM sees it"""
+
+    def __init__(self, llm, compactor: DomCompactor):
+        self._llm = llm
+        self.compactor = compactor
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+    async def ainvoke(self, messages, output_format=None):
+        messages = list(messages)
+        for position in range(len(messages) - 1, -1, -1):
+            message = messages[position]
+            if getattr(message, "role", None) != "user":
+                continue
+            messages[position] = self._compact_message(message)
+            break
+        return await self._llm.ainvoke(messages, output_format)
+
+    def _compact_message(self, message):
+        content = message.content
+        if isinstance(content, str):
+            return message.model_copy(update={"content": self.compactor.compact_message_text(content)})
+        if isinstance(content, list):
+            parts = [
+                part.model_copy(update={"text": self.compactor.compact_message_text(part.text)})
+                if getattr(part, "type", None) == "text" else part
+                for part in content
+            ]
+            return message.model_copy(update={"content": parts})
+        return message
@@ -9,6 +9,7 @@ from datetime import datetime
 # Use relative imports
 from .test_agent import WebTestAgent
 from ..automation.browser_controller import EnhancedBrowserController
+from ..automation.screenshot_store import get_screenshot_store
 
 class EnhancedTestAgent(WebTestAgent):
     """Enhanced test agent với screenshot và reporting capabilities"""
@@ -67,26 +68,37 @@ class EnhancedTestAgent(WebTestAgent):
         agent = await self.create_agent(screenshot_task, system_prompt=self.ENHANCED_TEST_SYSTEM_PROMPT)
         
         start_time = datetime.now()
-        result = await agent.run()
+        result = await self.run_agent(agent, "enhanced_test")
         execution_time = (datetime.now() - start_time).total_seconds()
         
         result_data = {
-            "status": "success",
+            **self._run_outcome(),
             "result": result,
             "task": task,
             "execution_time": execution_time,
             "timestamp": start_time.isoformat(),
             "model_used": self.model,
-            "agent_type": "enhanced_test"
+            "agent_type": "enhanced_test",
+            "trajectory": self.last_trajectory
         }
         
         # Add screenshot info to result
         if take_screenshots:
             result_data["screenshots_enabled"] = True
             result_data["screenshots_directory"] = str(self.screenshots_dir)
+            result_data["screenshots"] = await self._store_step_screenshots(result)
         
         return result_data
     
+    async def _store_step_screenshots(self, history) -> List[Dict[str, Any]]:
+        """Frames browser_use captured at each step, stored once per distinct frame"""
+        store = get_screenshot_store()
+        entries = []
+        for step, screenshot in enumerate(history.screenshots(), 1):
+            if screenshot:
+                entries.append(await store.save(base64.b64decode(screenshot), label=f"step_{step}"))
+        return entries
+    
     async def execute_performance_test(self, task: str) -> Dict[str, Any]:
         """Execute performance test với system prompt chuyên biệt"""
         
@@ -94,17 +106,18 @@ class EnhancedTestAgent(WebTestAgent):
         agent = await self.create_agent(task, system_prompt=self.PERFORMANCE_TEST_SYSTEM_PROMPT)
         
         start_time = datetime.now()
-        result = await agent.run()
+        result = await self.run_agent(agent, "performance_test")
         execution_time = (datetime.now() - start_time).total_seconds()
         
         return {
-            "status": "success",
+            **self._run_outcome(),
             "result": result,
             "task": task,
             "execution_time": execution_time,
             "timestamp": start_time.isoformat(),
             "model_used": self.model,
-            "agent_type": "performance_test"
+            "agent_type": "performance_test",
+            "trajectory": self.last_trajectory
         }
     
     async def generate_test_report(self, test_results: List[Dict[str, Any]], report_name: str = None) -> str:
@@ -0,0 +1,138 @@
+# backend/agents/llm_cache.py
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Parts of browser_use prompts that change on every step without changing the page state
+VOLATILE_PATTERNS = [
+    re.compile(r"Current date and time:[^\n<]*"),
+    re.compile(r"Step \d+ of \d+ max possible steps"),
+    re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?"),
+]
+
+# Whether the current task may use cached responses (set by AgentManager, off for exploratory runs)
+llm_cache_enabled: ContextVar[bool] = ContextVar("llm_cache_enabled", default=True)
+
+def message_text(message) -> str:
+    """Text of a browser_use message; images are left out of the key"""
+    content = getattr(message, "content", message)
+    if isinstance(content, list):
+        content = " ".join(getattr(part, "text", "") for part in content)
+    return str(content or "")
+
+def normalize_prompt(text: str) -> str:
+    for pattern in VOLATILE_PATTERNS:
+        text = pattern.sub("", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+def cache_key(model: str, messages, output_format=None) -> str:
+    """Hash of model, output schema and normalized messages (system prompt, task, page state)"""
+    digest = hashlib.sha256()
+    digest.update(model.encode("utf-8"))
+    digest.update((output_format.__name__ if output_format is not None else "text").encode("utf-8"))
+    for message in messages:
+        digest.update(b"\x00" + getattr(message, "role", "").encode("utf-8") + b"\x00")
+        digest.update(normalize_prompt(message_text(message)).encode("utf-8"))
+    return digest.hexdigest()
+
+class LLMResponseCache:
+    """Cache response LLM theo prompt đã normalize, lưu trên SQLite với LRU và TTL
+
+    Only the completion is stored (text, or the JSON of the structured
+    output). Entries older than ``ttl`` seconds are ignored and removed;
+    above ``max_entries`` the least recently used ones are evicted.
+    """
+
+    def __init__(self, db_path: str = ".cache/llm_cache.sqlite", max_entries: int = 5000, ttl: float = 7 * 24 * 3600):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                completion TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used_at)")
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT completion, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE responses SET last_used_at = ?, hits = hits + 1 WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, model: str, completion: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, completion, created_at, last_used_at) VALUES (?, ?, ?, ?, ?)",
+                (key, model, completion, now, now)
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                evicted = self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_used_at LIMIT ?)",
+                    (count - self.max_entries,)
+                ).rowcount
+                self.evictions += evicted
+            self._conn.commit()
+
+    def clear(self) -> int:
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM responses").rowcount
+            self._conn.commit()
+            return removed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl
+        }
@@ -0,0 +1,334 @@
+# backend/agents/llm_gateway.py
+import time
+import heapq
+import random
+import asyncio
+import itertools
+import logging
+from contextvars import ContextVar
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, List, Optional, Tuple
+
+from .llm_cache import LLMResponseCache, cache_key, llm_cache_enabled
+from ..utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Anthropic prompt caching: cache reads cost 10% of input, cache writes 125%
+CACHE_READ_PRICE_FACTOR = 0.1
+CACHE_WRITE_PRICE_FACTOR = 1.25
+
+# USD per million tokens: (input, output)
+MODEL_PRICING: Dict[str, Tuple[float, float]] = {
+    "claude-3-5-sonnet": (3.0, 15.0),
+    "claude-3-7-sonnet": (3.0, 15.0),
+    "claude-sonnet-4": (3.0, 15.0),
+    "claude-3-5-haiku": (0.8, 4.0),
+    "claude-3-haiku": (0.25, 1.25),
+    "claude-3-opus": (15.0, 75.0),
+    "claude-opus-4": (15.0, 75.0),
+}
+
+def price_of(model: str) -> Tuple[float, float]:
+    """Pricing entry whose name prefixes the model id (dated ids share the family price)"""
+    for family, price in MODEL_PRICING.items():
+        if model.startswith(family):
+            return price
+    return (0.0, 0.0)
+
+def mark_static_prefix(messages):
+    """Flag the system message for provider-side prompt caching
+
+    browser_use puts its instructions, the action schema and our
+    specialized prompt in the system message; it is identical on every
+    step, so the provider can serve it from cache after the first call.
+    """
+    for message in messages:
+        if getattr(message, "role", None) == "system" and hasattr(message, "cache"):
+            message.cache = True
+
+def estimate_tokens(messages) -> int:
+    """Rough prompt size (4 characters per token) used to reserve token-bucket capacity"""
+    return sum(len(str(getattr(message, "content", message))) for message in messages) // 4
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``capacity`` per minute"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until ``amount`` can be taken (0 if available now)"""
+        self._refill()
+        # Requests larger than the whole bucket wait for a full bucket instead of forever
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def consume(self, amount: float):
+        """Take ``amount``; the level may go negative to account for underestimates"""
+        self._refill()
+        self.level -= amount
+
+@dataclass
+class TaskUsage:
+    """LLM usage of một task, gom qua contextvar trong suốt agent run"""
+    priority: int = 1
+    requests: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+    rate_limited: int = 0
+    cache_hits: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    queued_seconds: float = 0.0
+    call_seconds: float = 0.0
+    routes: Dict[str, int] = field(default_factory=dict)  # LLM calls per model route
+    dom_tokens_saved: int = 0  # estimated, by page state compaction
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["cost_usd"] = round(self.cost_usd, 6)
+        data["queued_seconds"] = round(self.queued_seconds, 3)
+        data["call_seconds"] = round(self.call_seconds, 3)
+        return data
+
+# Usage record of the task the current coroutine belongs to (set by AgentManager)
+current_task_usage: ContextVar[Optional[TaskUsage]] = ContextVar("current_task_usage", default=None)
+
+class GatewayChatModel:
+    """browser_use chat model routed through the gateway; other attributes go to the wrapped model"""
+
+    def __init__(self, gateway: "LLMGateway", llm):
+        self._gateway = gateway
+        self._llm = llm
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+    async def ainvoke(self, messages, output_format=None):
+        return await self._gateway.invoke(self._llm, messages, output_format)
+
+class LLMGateway:
+    """Một gateway LLM dùng chung cho toàn process
+
+    All agents share one HTTP connection pool and two token buckets
+    (requests/min and tokens/min). Calls that cannot start yet wait in a
+    priority queue (higher task priority first, then FIFO). A 429 pauses
+    the whole gateway with exponential backoff instead of letting every
+    agent retry on its own. Usage and cost are added to the calling
+    task's ``TaskUsage``. Responses are served from the response cache
+    when the same normalized prompt was answered before.
+    """
+
+    def __init__(self,
+                 requests_per_minute: int = None,
+                 tokens_per_minute: int = None,
+                 max_retries: int = None,
+                 cache: Optional[LLMResponseCache] = None,
+                 prompt_caching: bool = None):
+        self.request_bucket = TokenBucket(requests_per_minute or Config.LLM_REQUESTS_PER_MINUTE)
+        self.token_bucket = TokenBucket(tokens_per_minute or Config.LLM_TOKENS_PER_MINUTE)
+        self.max_retries = Config.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.cache = cache
+        self.prompt_caching = Config.LLM_PROMPT_CACHING if prompt_caching is None else prompt_caching
+
+        self._models: Dict[str, Any] = {}
+        self._client = None
+        self._waiting: List[Tuple[int, int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._paused_until = 0.0
+        self._consecutive_429 = 0
+
+        self.total = TaskUsage()
+
+    def chat_model(self, model: str = None) -> GatewayChatModel:
+        """Shared ChatAnthropic for ``model`` wrapped in the gateway
+
+        browser_use 0.5 builds a new AsyncAnthropic client (and connection
+        pool) on every call; the model is handed the gateway's one client
+        instead, so all agents share its connections.
+        """
+        from browser_use.llm import ChatAnthropic
+
+        model = model or Config.CLAUDE_MODEL
+        if model not in self._models:
+            llm = ChatAnthropic(
+                model=model,
+                api_key=Config.ANTHROPIC_API_KEY,
+                max_retries=0  # retries and backoff are handled here
+            )
+            llm.get_client = self._shared_client
+            self._models[model] = llm
+        return GatewayChatModel(self, self._models[model])
+
+    def _shared_client(self):
+        if self._client is None:
+            import httpx
+            from anthropic import AsyncAnthropic
+            self._client = AsyncAnthropic(
+                api_key=Config.ANTHROPIC_API_KEY,
+                max_retries=0,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=Config.LLM_MAX_CONNECTIONS,
+                                        max_keepalive_connections=Config.LLM_MAX_CONNECTIONS),
+                    timeout=httpx.Timeout(120.0, connect=10.0)
+                )
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+        self._models.clear()
+        if self.cache is not None:
+            self.cache.close()
+
+    async def _admit(self, tokens: int, priority: int):
+        """Wait for this call's turn in the priority queue and take its bucket capacity"""
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (-priority, next(self._sequence), tokens, waiter))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await waiter
+
+    async def _dispatch(self):
+        while self._waiting:
+            _, _, tokens, waiter = self._waiting[0]
+            if waiter.done():  # caller was cancelled while queued
+                heapq.heappop(self._waiting)
+                continue
+
+            wait = max(self._paused_until - time.monotonic(),
+                       self.request_bucket.time_until(1),
+                       self.token_bucket.time_until(tokens))
+            if wait > 0:
+                # Re-check the head afterwards: a higher priority call may have arrived
+                await asyncio.sleep(min(wait, 1.0))
+                continue
+
+            heapq.heappop(self._waiting)
+            self.request_bucket.consume(1)
+            self.token_bucket.consume(tokens)
+            waiter.set_result(None)
+
+    async def invoke(self, llm, messages, output_format=None):
+        from browser_use.llm.exceptions import ModelRateLimitError
+
+        usage = current_task_usage.get() or TaskUsage()
+
+        key = None
+        if self.cache is not None and llm_cache_enabled.get():
+            key = cache_key(llm.model, messages, output_format)
+            cached = self._from_cache(key, output_format)
+            if cached is not None:
+                usage.cache_hits += 1
+                self.total.cache_hits += 1
+                return cached
+
+        if self.prompt_caching:
+            mark_static_prefix(messages)
+        estimated = estimate_tokens(messages) + getattr(llm, "max_tokens", 0) // 4
+
+        for attempt in range(self.max_retries + 1):
+            queued_at = time.monotonic()
+            await self._admit(estimated, usage.priority)
+            usage.queued_seconds += time.monotonic() - queued_at
+
+            started = time.monotonic()
+            try:
+                response = await llm.ainvoke(messages, output_format)
+            except ModelRateLimitError:
+                usage.rate_limited += 1
+                self.total.rate_limited += 1
+                if attempt == self.max_retries:
+                    raise
+                self._back_off()
+                continue
+
+            self._consecutive_429 = 0
+            usage.call_seconds += time.monotonic() - started
+            self._account(llm.model, response, estimated, usage)
+            if key is not None:
+                completion = response.completion
+                self.cache.put(key, llm.model, completion if isinstance(completion, str) else completion.model_dump_json())
+            return response
+
+    def _from_cache(self, key: str, output_format=None):
+        from browser_use.llm.views import ChatInvokeCompletion
+
+        stored = self.cache.get(key)
+        if stored is None:
+            return None
+        try:
+            completion = output_format.model_validate_json(stored) if output_format is not None else stored
+        except ValueError:
+            # Schema changed since the entry was written (e.g. different action set)
+            return None
+        return ChatInvokeCompletion(completion=completion, usage=None)
+
+    def _back_off(self):
+        """Pause every queued call after a 429, doubling the pause on consecutive ones"""
+        self._consecutive_429 += 1
+        delay = min(60.0, 2 ** self._consecutive_429) * (0.5 + random.random() / 2)
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        logger.warning(f"LLM rate limited, pausing gateway for {delay:.1f}s")
+
+    def _account(self, model: str, response, estimated: int, usage: TaskUsage):
+        reported = getattr(response, "usage", None)
+        input_tokens = reported.prompt_tokens if reported else estimated
+        output_tokens = reported.completion_tokens if reported else 0
+        # browser_use counts cache reads in prompt_tokens; cache writes are reported separately
+        cache_read = (reported.prompt_cached_tokens or 0) if reported else 0
+        cache_write = (reported.prompt_cache_creation_tokens or 0) if reported else 0
+        # Settle the reservation against what was actually used
+        self.token_bucket.consume(input_tokens + output_tokens - estimated)
+
+        input_price, output_price = price_of(model)
+        cost = (
+            (input_tokens - cache_read) * input_price
+            + cache_read * input_price * CACHE_READ_PRICE_FACTOR
+            + cache_write * input_price * CACHE_WRITE_PRICE_FACTOR
+            + output_tokens * output_price
+        ) / 1_000_000
+        for record in (usage, self.total):
+            record.requests += 1
+            record.cache_read_tokens += cache_read
+            record.cache_write_tokens += cache_write
+            record.input_tokens += input_tokens
+            record.output_tokens += output_tokens
+            record.cost_usd += cost
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.total.to_dict(),
+            "cache": self.cache.get_stats() if self.cache is not None else None,
+            "queued_calls": len(self._waiting),
+            "paused_seconds": max(0.0, round(self._paused_until - time.monotonic(), 1)),
+            "request_bucket": round(self.request_bucket.level, 1),
+            "token_bucket": round(self.token_bucket.level, 1),
+            "models": list(self._models)
+        }
+
+_gateway: Optional[LLMGateway] = None
+
+def get_llm_gateway() -> LLMGateway:
+    """Process-wide gateway, created on first use"""
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway(cache=LLMResponseCache(
+            Config.LLM_CACHE_PATH,
+            max_entries=Config.LLM_CACHE_MAX_ENTRIES,
+            ttl=Config.LLM_CACHE_TTL
+        ) if Config.LLM_CACHE_ENABLED else None)
+    return _gateway
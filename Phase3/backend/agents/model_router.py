@@ -0,0 +1,161 @@
+# backend/agents/model_router.py
+import re
+import time
+import logging
+from collections import deque
+from typing import Dict, Any, Optional
+
+from .llm_gateway import get_llm_gateway, current_task_usage
+from ..utils.stats import percentile
+from ..utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+SMALL = "small"
+LARGE = "large"
+
+# One <step_N>...</step_N> block per finished step in browser_use's agent history
+STEP_BLOCK = re.compile(r"<step_(\d+)>(.*?)</step_\1>", re.S)
+
+def _history_text(messages) -> str:
+    content = getattr(messages[-1], "content", "") if messages else ""
+    if isinstance(content, list):
+        content = " ".join(getattr(part, "text", "") for part in content)
+    return str(content or "")
+
+def completed_steps(messages) -> int:
+    return len(STEP_BLOCK.findall(_history_text(messages)))
+
+def step_failed(results) -> bool:
+    """Whether a step's ActionResults carry an error (browser_use sets ``error``, never free text)"""
+    return any(getattr(result, "error", None) for result in results or [])
+
+def is_ambiguous(completion) -> bool:
+    """Outputs the small model should not decide alone: no action, or declaring the task done"""
+    actions = getattr(completion, "action", None)
+    if actions is None:
+        return False
+    names = [name for action in actions for name in action.model_dump(exclude_unset=True)]
+    return not names or "done" in names
+
+class RouteStats:
+    """Latency và tỉ lệ thành công theo route (small/large), dùng chung cho toàn process"""
+
+    def __init__(self, window: int = 500):
+        self.routes: Dict[str, Dict[str, Any]] = {
+            route: {"calls": 0, "step_successes": 0, "step_failures": 0, "errors": 0,
+                    "latencies": deque(maxlen=window)}
+            for route in (SMALL, LARGE)
+        }
+        self.escalations = 0
+
+    def record_call(self, route: str, latency: float, error: bool = False):
+        stats = self.routes[route]
+        stats["calls"] += 1
+        stats["errors"] += int(error)
+        if not error:
+            stats["latencies"].append(latency)
+
+    def record_outcome(self, route: str, failed: bool):
+        self.routes[route]["step_failures" if failed else "step_successes"] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {"escalations": self.escalations}
+        for route, stats in self.routes.items():
+            latencies = list(stats["latencies"])
+            judged = stats["step_successes"] + stats["step_failures"]
+            result[route] = {
+                "calls": stats["calls"],
+                "errors": stats["errors"],
+                "median_latency": percentile(latencies, 50),
+                "p95_latency": percentile(latencies, 95),
+                "step_success_rate": stats["step_successes"] / judged if judged else None
+            }
+        return result
+
+route_stats = RouteStats()
+
+def create_chat_model(name: str):
+    """Gateway-backed Claude model, or a local model for names like ``ollama:mistral``"""
+    if name.startswith("ollama:"):
+        # Same ollama chat call as Phase1/mistral_chat.py, but through ollama.AsyncClient with the
+        # step's output schema: a blocking ollama.chat returning free text cannot drive an agent step
+        from browser_use.llm import ChatOllama
+        return ChatOllama(model=name[len("ollama:"):], host=Config.OLLAMA_HOST)
+    return get_llm_gateway().chat_model(name)
+
+class ModelRouter:
+    """Chọn model cho từng step của một agent run
+
+    Routine steps (the previous step succeeded) go to the small model.
+    The first step, steps after a failed one (an ``ActionResult.error``,
+    reported through ``observe_step``) and outputs the small model
+    should not settle alone (no action, or ``done``) go to the large model;
+    after an escalation the large model keeps the next
+    ``escalation_steps`` steps. Create one router per agent run.
+    """
+
+    def __init__(self, small, large, escalation_steps: int = None):
+        self.small = small
+        self.large = large
+        self.escalation_steps = Config.ROUTER_ESCALATION_STEPS if escalation_steps is None else escalation_steps
+        self._large_steps_left = 0
+        self._last_route: Optional[str] = None
+        self._last_step_failed = False
+
+    def __getattr__(self, name):
+        # browser_use reads model, provider, name... from the llm; report the large model
+        return getattr(self.large, name)
+
+    def observe_step(self, results):
+        """Outcome of the step that just ran: the agent's ``state.last_result``"""
+        self._last_step_failed = step_failed(results)
+
+    def choose(self, messages) -> str:
+        if completed_steps(messages) == 0:
+            return LARGE
+
+        failed = self._last_step_failed
+        if self._last_route is not None:
+            route_stats.record_outcome(self._last_route, failed)
+
+        if failed:
+            self._large_steps_left = self.escalation_steps
+            return LARGE
+        if self._large_steps_left > 0:
+            self._large_steps_left -= 1
+            return LARGE
+        return SMALL
+
+    async def ainvoke(self, messages, output_format=None):
+        route = self.choose(messages)
+
+        if route == SMALL:
+            try:
+                response = await self._call(SMALL, self.small, messages, output_format)
+                if not is_ambiguous(response.completion):
+                    return response
+                logger.info("Small model output needs confirmation, escalating step")
+            except Exception as e:
+                logger.warning(f"Small model failed ({e}), escalating step")
+
+            route_stats.escalations += 1
+            self._large_steps_left = self.escalation_steps
+
+        return await self._call(LARGE, self.large, messages, output_format)
+
+    async def _call(self, route: str, llm, messages, output_format=None):
+        usage = current_task_usage.get()
+        if usage is not None:
+            usage.routes[route] = usage.routes.get(route, 0) + 1
+
+        started = time.monotonic()
+        try:
+            response = await llm.ainvoke(messages, output_format)
+        except Exception:
+            route_stats.record_call(route, time.monotonic() - started, error=True)
+            raise
+
+        route_stats.record_call(route, time.monotonic() - started)
+        self._last_route = route
+        return response
@@ -0,0 +1,128 @@
+# backend/agents/run_budget.py
+import json
+import time
+import logging
+from dataclasses import dataclass, replace, asdict
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class RunBudget:
+    max_steps: int = 25
+    max_seconds: float = 180.0
+    max_tokens: int = 250_000
+    loop_threshold: int = 3   # same action on the same URL this many times in a row stops the run
+
+# Per AgentType; missing types use "default"
+BUDGET_PROFILES: Dict[str, RunBudget] = {
+    "default": RunBudget(),
+    "form_test": RunBudget(max_steps=40, max_seconds=300),       # valid + several invalid submissions
+    "enhanced_test": RunBudget(max_steps=35, max_seconds=300),
+    "performance_test": RunBudget(max_steps=15, max_seconds=120),
+    "scenario_test": RunBudget(max_steps=15, max_seconds=120),   # LLM only finishes the remaining steps
+    "scenario_suite": RunBudget(max_steps=15, max_seconds=120),
+    "cross_browser": RunBudget(max_steps=20, max_seconds=240),   # one run per engine, in parallel
+}
+
+def budget_for(agent_type: Optional[str], overrides: Optional[Dict[str, Any]] = None) -> RunBudget:
+    """Budget of the agent type with per-task overrides applied"""
+    budget = BUDGET_PROFILES.get(agent_type or "default", BUDGET_PROFILES["default"])
+    return replace(budget, **overrides) if overrides else budget
+
+def action_signature(history_item) -> Optional[str]:
+    """URL plus actions of one browser_use step, None when the step produced no action"""
+    output = getattr(history_item, "model_output", None)
+    if output is None or not output.action:
+        return None
+    actions = [action.model_dump(exclude_unset=True) for action in output.action]
+    url = history_item.state.url if history_item.state else None
+    return json.dumps([url, actions], sort_keys=True, default=str)
+
+class RunGuard:
+    """Dừng agent sớm: hết budget, lặp lại cùng một action, hoặc mọi VERIFY đã đạt
+
+    ``check`` runs after every step (browser_use ``on_step_end`` hook) and
+    calls ``agent.stop()``; browser_use then ends the run before the next
+    step. ``expectations`` are VERIFY actions (selector, optional text).
+    """
+
+    def __init__(self, budget: RunBudget, profiler, expectations: Optional[List] = None):
+        self.budget = budget
+        self.profiler = profiler
+        self.expectations = list(expectations or [])
+        self.started = time.monotonic()
+        self.stop_reason: Optional[str] = None
+        self.succeeded_early = False
+        self._last_signature: Optional[str] = None
+        self._repeats = 0
+
+    @property
+    def failed(self) -> bool:
+        return self.stop_reason is not None and not self.succeeded_early
+
+    @property
+    def remaining_steps(self) -> int:
+        return max(1, self.budget.max_steps - len(self.profiler.steps))
+
+    async def check(self, agent):
+        reason = self._over_budget() or self._looping(agent)
+        if reason is None and self.expectations and await self._expectations_met(agent):
+            reason = "all VERIFY expectations met"
+            self.succeeded_early = True
+
+        if reason is not None:
+            self.stop_reason = reason
+            logger.info(f"Stopping agent after {len(self.profiler.steps)} steps: {reason}")
+            agent.stop()
+
+    def finish(self, history):
+        """Record why a run that browser_use ended on its own did not finish"""
+        if self.stop_reason is None and not history.is_done() and len(self.profiler.steps) >= self.budget.max_steps:
+            self.stop_reason = f"step budget exhausted ({self.budget.max_steps} steps)"
+
+    def _over_budget(self) -> Optional[str]:
+        elapsed = time.monotonic() - self.started
+        if elapsed > self.budget.max_seconds:
+            return f"wall time budget exceeded ({elapsed:.0f}s > {self.budget.max_seconds:.0f}s)"
+
+        tokens = sum(step["input_tokens"] + step["output_tokens"] for step in self.profiler.steps)
+        if tokens > self.budget.max_tokens:
+            return f"token budget exceeded ({tokens} > {self.budget.max_tokens})"
+        return None
+
+    def _looping(self, agent) -> Optional[str]:
+        history = agent.state.history.history
+        signature = action_signature(history[-1]) if history else None
+        if signature is not None and signature == self._last_signature:
+            self._repeats += 1
+        else:
+            self._repeats = 1
+        self._last_signature = signature
+
+        if signature is not None and self._repeats >= self.budget.loop_threshold:
+            return f"loop detected: same action repeated {self._repeats} times on {history[-1].state.url}"
+        return None
+
+    async def _expectations_met(self, agent) -> bool:
+        try:
+            page = await agent.browser_session.get_current_page()
+            for expectation in self.expectations:
+                locator = page.locator(expectation.target).first
+                if not await locator.is_visible():
+                    return False
+                if expectation.value is not None and expectation.value not in await locator.inner_text(timeout=1000):
+                    return False
+            return True
+        except Exception as e:
+            logger.debug(f"Could not check expectations: {e}")
+            return False
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "budget": asdict(self.budget),
+            "steps": len(self.profiler.steps),
+            "elapsed": round(time.monotonic() - self.started, 3),
+            "stop_reason": self.stop_reason,
+            "succeeded_early": self.succeeded_early
+        }
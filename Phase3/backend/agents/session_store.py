@@ -0,0 +1,201 @@
+# backend/agents/session_store.py
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+from pathlib import Path
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# A state whose cookies expire within this many seconds is treated as already expired
+EXPIRY_MARGIN = 60
+
+def origin_of(url: str) -> str:
+    parts = urlsplit(url.strip())
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+def _cookie_matches(cookie: Dict[str, Any], host: str) -> bool:
+    domain = (cookie.get("domain") or "").lstrip(".").lower()
+    return bool(domain) and (host == domain or host.endswith("." + domain))
+
+def scope_state(state: Dict[str, Any], url: str) -> Dict[str, Any]:
+    """Cookies and localStorage of a Playwright storage state that belong to the URL's origin"""
+    origin = origin_of(url)
+    host = (urlsplit(origin).hostname or "").lower()
+    return {
+        "cookies": [cookie for cookie in state.get("cookies", []) if _cookie_matches(cookie, host)],
+        "origins": [entry for entry in state.get("origins", []) if entry.get("origin") == origin]
+    }
+
+def expires_at(state: Dict[str, Any], saved_at: float, max_age: float) -> float:
+    """Earliest expiry among persistent cookies, capped by the maximum age of a saved state"""
+    expiries = [cookie["expires"] for cookie in state.get("cookies", []) if (cookie.get("expires") or -1) > 0]
+    return min(expiries + [saved_at + max_age])
+
+@dataclass
+class CredentialProfile:
+    """Named login for a target app; ``login`` runs the login flow and returns its storage state"""
+    name: str
+    url: str
+    login: Callable[[], Awaitable[Dict[str, Any]]]
+
+class SessionStore:
+    """Cache storage state (cookies + localStorage) đã đăng nhập theo origin và credential profile
+
+    One JSON file per (origin, profile). A state is stale once any of its
+    persistent cookies expires or it is older than ``max_age``; only then
+    is the login flow run again. Concurrent tasks asking for the same
+    stale state wait for a single login.
+    """
+
+    def __init__(self, store_dir: str = ".cache/sessions", max_age: float = 3600):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._login_locks: Dict[str, asyncio.Lock] = {}
+
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+        self.logins = 0
+        self.login_failures = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(url: str, profile: str) -> str:
+        payload = json.dumps([origin_of(url), profile])
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.store_dir / f"{key}.json"
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except ValueError:
+            logger.warning(f"Discarding unreadable session {key}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def load(self, url: str, profile: str) -> Optional[Dict[str, Any]]:
+        """Fresh storage state for the origin and profile, None when missing or stale"""
+        entry = self._read(self.key(url, profile))
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry["expires_at"] - EXPIRY_MARGIN <= time.time():
+            self.stale += 1
+            logger.info(f"Session '{profile}' for {entry['origin']} is stale")
+            return None
+        self.hits += 1
+        return entry["state"]
+
+    def save(self, url: str, profile: str, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Store the part of a storage state that belongs to the URL's origin"""
+        key = self.key(url, profile)
+        saved_at = time.time()
+        scoped = scope_state(state, url)
+        entry = {
+            "origin": origin_of(url),
+            "profile": profile,
+            "saved_at": saved_at,
+            "expires_at": expires_at(scoped, saved_at, self.max_age),
+            "state": scoped
+        }
+        with self._lock:
+            tmp_path = self._path(key).with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(entry), encoding="utf-8")
+            tmp_path.replace(self._path(key))
+        return scoped
+
+    def invalidate(self, url: str, profile: str):
+        """Forget a state the app no longer accepts, so the next task logs in again"""
+        with self._lock:
+            self._path(self.key(url, profile)).unlink(missing_ok=True)
+        self.invalidations += 1
+
+    async def get_or_login(self, profile: CredentialProfile) -> Dict[str, Any]:
+        """Warm storage state for the profile, running its login flow only when missing or stale"""
+        key = self.key(profile.url, profile.name)
+        lock = self._login_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            state = self.load(profile.url, profile.name)
+            if state is not None:
+                return state
+
+            logger.info(f"Logging in with profile '{profile.name}' on {origin_of(profile.url)}")
+            try:
+                state = await profile.login()
+            except Exception:
+                self.login_failures += 1
+                raise
+            self.logins += 1
+            return self.save(profile.url, profile.name, state)
+
+    def list_sessions(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        sessions = []
+        for path in sorted(self.store_dir.glob("*.json")):
+            entry = self._read(path.stem)
+            if entry is None:
+                continue
+            sessions.append({
+                "key": path.stem,
+                "origin": entry["origin"],
+                "profile": entry["profile"],
+                "saved_at": entry["saved_at"],
+                "expires_at": entry["expires_at"],
+                "stale": entry["expires_at"] - EXPIRY_MARGIN <= now,
+                "cookies": len(entry["state"]["cookies"])
+            })
+        return sessions
+
+    def clear(self) -> int:
+        with self._lock:
+            paths = list(self.store_dir.glob("*.json"))
+            for path in paths:
+                path.unlink(missing_ok=True)
+        return len(paths)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "stored": len(list(self.store_dir.glob("*.json"))),
+            "hits": self.hits,
+            "stale": self.stale,
+            "misses": self.misses,
+            "logins": self.logins,
+            "login_failures": self.login_failures,
+            "invalidations": self.invalidations
+        }
+
+async def restore_storage_state(context, state: Dict[str, Any]):
+    """Apply a storage state to an already open Playwright context
+
+    Cookies are added directly; localStorage is written by an init script
+    before any page script of the matching origin runs, once per tab so
+    later changes made by the app are not overwritten.
+    """
+    if state.get("cookies"):
+        await context.add_cookies(state["cookies"])
+
+    local_storage = {
+        entry["origin"]: {item["name"]: item["value"] for item in entry.get("localStorage", [])}
+        for entry in state.get("origins", [])
+    }
+    if any(local_storage.values()):
+        await context.add_init_script(
+            "(stores => { const items = stores[location.origin];"
+            " if (!items || sessionStorage.getItem('__warm_session')) return;"
+            " for (const [name, value] of Object.entries(items)) localStorage.setItem(name, value);"
+            " sessionStorage.setItem('__warm_session', '1'); })"
+            f"({json.dumps(local_storage)})"
+        )
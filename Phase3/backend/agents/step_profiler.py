@@ -0,0 +1,178 @@
+# backend/agents/step_profiler.py
+import time
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Main-frame navigation timing of the page that just fired "load"
+NAVIGATION_TIMING_SCRIPT = """
+() => {
+    const nav = performance.getEntriesByType('navigation')[0];
+    return nav ? Math.max(nav.loadEventStart, nav.domContentLoadedEventEnd) - nav.startTime : null;
+}
+"""
+
+class StepProfiler:
+    """Timeline của một task: create_agent, từng step (LLM / page load / browser action), replay
+
+    ``on_step_start`` / ``on_step_end`` are browser_use run hooks; LLM
+    calls are timed by ``ProfilingChatModel`` and page loads by the
+    context's ``load`` events, both attributed to the step in progress.
+    """
+
+    def __init__(self):
+        self.segments: Dict[str, float] = {}
+        self.steps: List[Dict[str, Any]] = []
+        self._current: Optional[Dict[str, Any]] = None
+        self._step_started = 0.0
+        self._attached = set()
+        self._pending: set = set()
+
+    def record(self, segment: str, seconds: float):
+        """Time spent outside agent steps (create_agent, replay...)"""
+        self.segments[segment] = self.segments.get(segment, 0.0) + seconds
+
+    async def on_step_start(self, agent=None):
+        self._step_started = time.monotonic()
+        self._current = {
+            "step": len(self.steps) + 1,
+            "llm": 0.0,
+            "llm_calls": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "page_load": 0.0,
+            "page_loads": 0
+        }
+
+    async def on_step_end(self, agent=None):
+        if self._current is None:
+            return
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+        step = self._current
+        duration = time.monotonic() - self._step_started
+        # Loads overlap with the action that triggered them; never count more than the step
+        step["page_load"] = min(step["page_load"], max(0.0, duration - step["llm"]))
+        step["browser_actions"] = max(0.0, duration - step["llm"] - step["page_load"])
+        step["duration"] = duration
+        self.steps.append({key: round(value, 4) if isinstance(value, float) else value for key, value in step.items()})
+        self._current = None
+
+    def record_llm_call(self, seconds: float, input_tokens: int = 0, output_tokens: int = 0):
+        target = self._current
+        if target is None:
+            self.record("llm_outside_steps", seconds)
+            return
+        target["llm"] += seconds
+        target["llm_calls"] += 1
+        target["input_tokens"] += input_tokens
+        target["output_tokens"] += output_tokens
+
+    def attach(self, context):
+        """Time main-frame page loads of every page in a Playwright context"""
+        if id(context) in self._attached:
+            return
+        self._attached.add(id(context))
+        for page in context.pages:
+            self._watch(page)
+        context.on("page", self._watch)
+
+    def _watch(self, page):
+        page.on("load", lambda: self._schedule(self._record_load(page)))
+
+    def _schedule(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _record_load(self, page):
+        try:
+            load_ms = await page.evaluate(NAVIGATION_TIMING_SCRIPT)
+        except Exception as e:
+            logger.debug(f"Could not read navigation timing: {e}")
+            return
+        if load_ms is not None and self._current is not None:
+            self._current["page_load"] += load_ms / 1000
+            self._current["page_loads"] += 1
+
+    def totals(self) -> Dict[str, float]:
+        totals = dict(self.segments)
+        for key in ("llm", "page_load", "browser_actions"):
+            totals[key] = sum(step[key] for step in self.steps)
+        return totals
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "segments": {key: round(value, 4) for key, value in self.segments.items()},
+            "steps": self.steps,
+            "totals": {key: round(value, 4) for key, value in self.totals().items()}
+        }
+
+class ProfilingChatModel:
+    """Chat model wrapper that times every LLM call for the profiler"""
+
+    def __init__(self, llm, profiler: StepProfiler):
+        self._llm = llm
+        self.profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+    async def ainvoke(self, messages, output_format=None):
+        started = time.monotonic()
+        response = await self._llm.ainvoke(messages, output_format)
+        usage = getattr(response, "usage", None)
+        self.profiler.record_llm_call(
+            time.monotonic() - started,
+            usage.prompt_tokens if usage else 0,
+            usage.completion_tokens if usage else 0
+        )
+        return response
+
+class ProfileAggregator:
+    """Tổng hợp profile theo agent type, xuất dạng flame graph (name / value / children)"""
+
+    def __init__(self):
+        self.by_type: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, agent_type: str, profiler: StepProfiler, wall_time: float):
+        entry = self.by_type.setdefault(agent_type, {"tasks": 0, "steps": 0, "wall_time": 0.0, "segments": {}})
+        entry["tasks"] += 1
+        entry["steps"] += len(profiler.steps)
+        entry["wall_time"] += wall_time
+
+        totals = profiler.totals()
+        for key, value in totals.items():
+            entry["segments"][key] = entry["segments"].get(key, 0.0) + value
+        # Whatever the profiler did not see: result handling, network summary, our own overhead
+        entry["segments"]["other"] = entry["segments"].get("other", 0.0) + max(0.0, wall_time - sum(totals.values()))
+
+    def flame_graph(self) -> Dict[str, Any]:
+        children = []
+        for agent_type, entry in sorted(self.by_type.items()):
+            segments = entry["segments"]
+            step_keys = ("llm", "page_load", "browser_actions")
+            step_children = [
+                {"name": key, "value": round(segments.get(key, 0.0), 3)} for key in step_keys
+            ]
+            type_children = [
+                {"name": "agent_steps", "value": round(sum(segments.get(key, 0.0) for key in step_keys), 3),
+                 "children": step_children}
+            ] + [
+                {"name": key, "value": round(value, 3)}
+                for key, value in sorted(segments.items()) if key not in step_keys
+            ]
+            children.append({
+                "name": agent_type,
+                "value": round(entry["wall_time"], 3),
+                "tasks": entry["tasks"],
+                "steps": entry["steps"],
+                "mean_task_seconds": round(entry["wall_time"] / entry["tasks"], 3),
+                "children": type_children
+            })
+        return {"name": "all", "value": round(sum(child["value"] for child in children), 3), "children": children}
+
+profile_aggregator = ProfileAggregator()
@@ -54,17 +54,18 @@ class WebTestAgent(BaseTestAgent):
             agent = await self.create_agent(task)
             logger.info("Agent created, starting execution...")
             
-            result = await agent.run()
+            result = await self.run_agent(agent, "web_test")
             
             execution_time = (datetime.now() - start_time).total_seconds()
             
             self.last_result = {
-                "status": "success",
+                **self._run_outcome(),
                 "result": result,
                 "task": task,
                 "execution_time": execution_time,
                 "timestamp": start_time.isoformat(),
-                "model_used": self.model
+                "model_used": self.model,
+                "trajectory": self.last_trajectory
             }
             
             logger.info(f"Task completed successfully in {execution_time:.2f} seconds")
@@ -107,17 +108,18 @@ class WebTestAgent(BaseTestAgent):
         agent = await self.create_agent(task, system_prompt=self.WEB_TEST_SYSTEM_PROMPT)
         
         start_time = datetime.now()
-        result = await agent.run()
+        result = await self.run_agent(agent, "web_test", url)
         execution_time = (datetime.now() - start_time).total_seconds()
         
         return {
-            "status": "success",
+            **self._run_outcome(),
             "result": result,
             "task": task,
             "execution_time": execution_time,
             "timestamp": start_time.isoformat(),
             "model_used": self.model,
-            "agent_type": "web_test"
+            "agent_type": "web_test",
+            "trajectory": self.last_trajectory
         }
     
     async def test_ui_elements(self, url: str, elements: List[str]) -> Dict[str, Any]:
@@ -138,21 +140,23 @@ class WebTestAgent(BaseTestAgent):
         Report any UI issues or accessibility problems found.
         """
         
-        # Use specialized system prompt for UI testing
+        # Use specialized system prompt for UI testing, and keep full labels in the page state
+        self.use_compaction_profile("ui_test")
         agent = await self.create_agent(task, system_prompt=self.UI_TEST_SYSTEM_PROMPT)
         
         start_time = datetime.now()
-        result = await agent.run()
+        result = await self.run_agent(agent, "ui_test", url)
         execution_time = (datetime.now() - start_time).total_seconds()
         
         return {
-            "status": "success",
+            **self._run_outcome(),
             "result": result,
             "task": task,
             "execution_time": execution_time,
             "timestamp": start_time.isoformat(),
             "model_used": self.model,
-            "agent_type": "ui_test"
+            "agent_type": "ui_test",
+            "trajectory": self.last_trajectory
         }
 
     async def test_form_validation(self, url: str, form_selector: str = None) -> Dict[str, Any]:
@@ -178,15 +182,16 @@ class WebTestAgent(BaseTestAgent):
         agent = await self.create_agent(task, system_prompt=self.FORM_TEST_SYSTEM_PROMPT)
         
         start_time = datetime.now()
-        result = await agent.run()
+        result = await self.run_agent(agent, "form_test", url)
         execution_time = (datetime.now() - start_time).total_seconds()
         
         return {
-            "status": "success",
+            **self._run_outcome(),
             "result": result,
             "task": task,
             "execution_time": execution_time,
             "timestamp": start_time.isoformat(),
             "model_used": self.model,
-            "agent_type": "form_test"
+            "agent_type": "form_test",
+            "trajectory": self.last_trajectory
         }
\ No newline at end of file
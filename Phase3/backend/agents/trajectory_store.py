@@ -0,0 +1,149 @@
+# backend/agents/trajectory_store.py
+import re
+import json
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+# browser_use's rerun_history raises "Step <n> failed after <k> attempts: ..." (1-based)
+FAILED_STEP_PATTERN = re.compile(r"Step (\d+) failed")
+
+def normalize_task(task: str) -> str:
+    """Collapse whitespace so re-indented prompt templates map to the same key"""
+    return re.sub(r"\s+", " ", task or "").strip()
+
+def normalize_url(url: Optional[str]) -> str:
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), parts.query, ""))
+
+def divergent_step(error: Exception) -> Optional[int]:
+    """0-based index of the step a failed replay stopped at, None if the error is not a step failure"""
+    match = FAILED_STEP_PATTERN.search(str(error))
+    return int(match.group(1)) - 1 if match else None
+
+def describe_steps(history, limit: int) -> List[str]:
+    """One line per replayed step (actions and URL), used to brief the LLM that takes over"""
+    lines = []
+    for number, item in enumerate(history.history[:limit], 1):
+        actions = [action.model_dump(exclude_unset=True) for action in (item.model_output.action if item.model_output else [])]
+        url = item.state.url if item.state else None
+        lines.append(f"{number}. {json.dumps(actions)} on {url}")
+    return lines
+
+class TrajectoryStore:
+    """Lưu action history của các lần chạy browser_use thành công để replay không cần LLM
+
+    One JSON history per (agent type, task, URL) key, saved with
+    ``AgentHistoryList.save_to_file`` next to a small metadata file that
+    tracks how often it was replayed and where it diverged.
+    """
+
+    def __init__(self, store_dir: str = ".cache/trajectories"):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self.recorded = 0
+        self.full_replays = 0
+        self.partial_replays = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(agent_type: str, task: str, url: Optional[str] = None) -> str:
+        payload = json.dumps([agent_type, normalize_task(task), normalize_url(url)])
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _history_path(self, key: str) -> Path:
+        return self.store_dir / f"{key}.json"
+
+    def _meta_path(self, key: str) -> Path:
+        return self.store_dir / f"{key}.meta.json"
+
+    def load(self, key: str, output_model) -> Optional[Any]:
+        """Stored ``AgentHistoryList`` for the key, parsed with the agent's output model"""
+        from browser_use.agent.views import AgentHistoryList
+
+        path = self._history_path(key)
+        if not path.exists():
+            self.misses += 1
+            return None
+
+        try:
+            return AgentHistoryList.load_from_file(str(path), output_model)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable trajectory {key}: {e}")
+            self.invalidate(key)
+            self.misses += 1
+            return None
+
+    def save(self, key: str, history, agent_type: str, task: str, url: Optional[str] = None):
+        """Record the history of a successful run (replaces any previous one)"""
+        with self._lock:
+            tmp_path = self._history_path(key).with_suffix(".tmp")
+            history.save_to_file(str(tmp_path))
+            tmp_path.replace(self._history_path(key))
+
+            meta = self._read_meta(key)
+            meta.update({
+                "agent_type": agent_type,
+                "task": normalize_task(task)[:500],
+                "url": url,
+                "steps": len(history.history),
+                "recorded_at": datetime.now().isoformat()
+            })
+            self._meta_path(key).write_text(json.dumps(meta), encoding="utf-8")
+            self.recorded += 1
+
+        logger.info(f"Recorded trajectory {key[:12]} with {len(history.history)} steps")
+
+    def mark_replayed(self, key: str, diverged_at: Optional[int] = None):
+        """Count a replay; ``diverged_at`` is the first step the LLM had to take over"""
+        with self._lock:
+            meta = self._read_meta(key)
+            meta["replays"] = meta.get("replays", 0) + 1
+            meta["last_replayed_at"] = datetime.now().isoformat()
+            if diverged_at is None:
+                self.full_replays += 1
+            else:
+                self.partial_replays += 1
+                meta["divergences"] = meta.get("divergences", 0) + 1
+                meta["last_divergence_step"] = diverged_at
+            if self._history_path(key).exists():
+                self._meta_path(key).write_text(json.dumps(meta), encoding="utf-8")
+
+    def invalidate(self, key: str):
+        with self._lock:
+            for path in (self._history_path(key), self._meta_path(key)):
+                path.unlink(missing_ok=True)
+
+    def _read_meta(self, key: str) -> Dict[str, Any]:
+        path = self._meta_path(key)
+        if not path.exists():
+            return {}
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except ValueError:
+            return {}
+
+    def list_trajectories(self) -> List[Dict[str, Any]]:
+        return [
+            {"key": path.name[:-len(".meta.json")], **json.loads(path.read_text(encoding="utf-8"))}
+            for path in sorted(self.store_dir.glob("*.meta.json"))
+        ]
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "stored": len(list(self.store_dir.glob("*.meta.json"))),
+            "recorded": self.recorded,
+            "full_replays": self.full_replays,
+            "partial_replays": self.partial_replays,
+            "misses": self.misses
+        }
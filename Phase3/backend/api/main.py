@@ -1,18 +1,27 @@
 # backend/api/main.py
 from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, FileResponse
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import asyncio
 import json
+import os
 
 from backend.agents.agent_manager import AgentManager, AgentType, TaskStatus
-from backend.scenarios.scenario_builder import ScenarioBuilder, TestScenario
+from backend.agents.llm_gateway import get_llm_gateway
+from backend.agents.model_router import route_stats
+from backend.agents.step_profiler import profile_aggregator
+from backend.scenarios.scenario_builder import ScenarioBuilder, ScenarioType, TestScenario
+from backend.scenarios.scenario_registry import ScenarioRegistry
+from backend.scenarios.scenario_cache import ScenarioCache
+from backend.scenarios.suite_planner import filter_scenarios
+from backend.scenarios.scenario_graph import ScenarioGraph
 from backend.database.model import Database, TestResultRepository
 from backend.utils.config import Config
-from backend.automation.mcp_client import PlaywrightMCPClient
+from backend.automation.mcp_pool import MCPServerPool, get_mcp_server_pool
+from backend.automation.screenshot_store import get_screenshot_store
 
 # Pydantic models for API
 class TaskSubmission(BaseModel):
@@ -39,6 +48,24 @@ class ScenarioSubmission(BaseModel):
     scenario_id: str
     parameters: Optional[Dict[str, Any]] = {}
 
+class SuiteRunSubmission(BaseModel):
+    tags: Optional[List[str]] = None
+    scenario_types: Optional[List[str]] = None
+    min_priority: Optional[int] = None
+    shards: int = Field(default=4, ge=1, description="Number of parallel browser contexts")
+    browser_processes: int = Field(default=1, ge=1, description="Number of browser processes to share")
+    browser: str = "chromium"
+    llm_fallback: bool = False
+
+class LoadTestSubmission(BaseModel):
+    users: int = Field(default=20, ge=1, description="Peak concurrent HTTP users")
+    browser_users: int = Field(default=2, ge=0, description="Real browser contexts running the full scenario")
+    ramp_up: float = Field(default=10.0, ge=0)
+    hold: float = Field(default=30.0, ge=0)
+    ramp_down: float = Field(default=10.0, ge=0)
+    think_time: float = Field(default=1.0, ge=0)
+    browser: str = "chromium"
+
 class TestSuiteCreation(BaseModel):
     name: str
     description: Optional[str] = None
@@ -58,6 +85,9 @@ class MCPServerStatus(BaseModel):
     process_id: Optional[int]
     config_path: str
     health_status: str
+    healthy_instances: int = 0
+    total_instances: int = 1
+    recent_logs: List[Dict[str, Any]] = []
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -76,10 +106,12 @@ app.add_middleware(
 )
 
 # Global instances
-agent_manager = AgentManager(max_concurrent_agents=3)
+scenario_registry = ScenarioRegistry(cache=ScenarioCache())
+mcp_pool = get_mcp_server_pool()
+agent_manager = AgentManager(max_concurrent_agents=Config.MAX_CONCURRENT_AGENTS, scenario_registry=scenario_registry,
+                             mcp_pool=mcp_pool)
 database = Database()
 test_repo = TestResultRepository(database)
-mcp_client = PlaywrightMCPClient()
 
 # Dependency injection
 def get_agent_manager():
@@ -88,8 +120,11 @@ def get_agent_manager():
 def get_test_repository():
     return test_repo
 
-def get_mcp_client():
-    return mcp_client
+def get_mcp_pool():
+    return mcp_pool
+
+def get_scenario_registry():
+    return scenario_registry
 
 # API Routes
 
@@ -111,8 +146,11 @@ async def submit_task(
     try:
         # Validate agent type
         agent_type = AgentType(task.agent_type)
-        
-        # Submit task
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid agent type: {task.agent_type}")
+    
+    try:
+        # Submit task (rejects invalid parameters such as unknown blocking profiles)
         task_id = await manager.submit_task(
             agent_type=agent_type,
             task_description=task.task_description,
@@ -126,7 +164,7 @@ async def submit_task(
         )
         
     except ValueError as e:
-        raise HTTPException(status_code=400, detail=f"Invalid agent type: {task.agent_type}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -157,6 +195,24 @@ async def get_task_status(
         execution_time=execution_time
     )
 
+@app.get("/api/tasks/{task_id}/har")
+async def get_task_har(
+    task_id: str,
+    manager: AgentManager = Depends(get_agent_manager)
+):
+    """Download the HAR file captured while the task ran"""
+    
+    task = manager.get_task_status(task_id)
+    
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    har_path = ((task.result or {}).get("network") or {}).get("har_path")
+    if not har_path or not os.path.exists(har_path):
+        raise HTTPException(status_code=404, detail="No HAR captured for this task")
+    
+    return FileResponse(har_path, media_type="application/json", filename=f"{task_id}.har")
+
 @app.get("/api/tasks/active", response_model=List[TaskStatus])
 async def get_active_tasks(
     manager: AgentManager = Depends(get_agent_manager)
@@ -241,11 +297,93 @@ async def get_metrics(
         average_execution_time=db_metrics["average_execution_time"]
     )
 
+@app.get("/api/metrics/profile")
+async def get_profile_metrics():
+    """Get where agent task time goes per agent type, as a flame graph tree (name / value / children)"""
+    
+    return profile_aggregator.flame_graph()
+
+@app.get("/api/browser-pool/stats")
+async def get_browser_pool_stats(
+    manager: AgentManager = Depends(get_agent_manager)
+):
+    """Get warm browser pool statistics"""
+    
+    return manager.browser_pool.get_stats()
+
+@app.get("/api/screenshots/stats")
+async def get_screenshot_stats():
+    """Get screenshot store statistics (deduplicated frames, bytes saved)"""
+    
+    return get_screenshot_store().get_stats()
+
+@app.get("/api/screenshots/{content_hash}")
+async def get_screenshot(content_hash: str, thumbnail: bool = False):
+    """Serve a stored screenshot (or its thumbnail) by content hash"""
+    
+    path = get_screenshot_store().find(content_hash, thumbnail=thumbnail)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Screenshot not found")
+    
+    return FileResponse(path, media_type=f"image/{'jpeg' if path.suffix == '.jpg' else path.suffix[1:]}")
+
+@app.get("/api/llm/stats")
+async def get_llm_stats():
+    """Get shared LLM gateway usage, cost and rate-limit state"""
+    
+    return get_llm_gateway().get_stats()
+
+@app.get("/api/llm/routes")
+async def get_llm_route_stats():
+    """Get per-route (small/large model) latency, success rate and escalations"""
+    
+    return route_stats.to_dict()
+
+@app.delete("/api/llm/cache")
+async def clear_llm_cache():
+    """Drop every cached LLM response"""
+    
+    gateway = get_llm_gateway()
+    if gateway.cache is None:
+        raise HTTPException(status_code=404, detail="LLM response cache is disabled")
+    
+    return {"removed": gateway.cache.clear()}
+
+@app.get("/api/sessions")
+async def get_sessions(manager: AgentManager = Depends(get_agent_manager)):
+    """List stored login sessions (per origin and credential profile) and warm start stats"""
+    
+    if manager.session_store is None:
+        raise HTTPException(status_code=404, detail="Session warm start is disabled")
+    
+    return {
+        "sessions": manager.session_store.list_sessions(),
+        "stats": manager.session_store.get_stats()
+    }
+
+@app.delete("/api/sessions")
+async def clear_sessions(manager: AgentManager = Depends(get_agent_manager)):
+    """Forget every stored login session, the next tasks log in again"""
+    
+    if manager.session_store is None:
+        raise HTTPException(status_code=404, detail="Session warm start is disabled")
+    
+    return {"removed": manager.session_store.clear()}
+
 @app.get("/api/scenarios")
-async def get_scenarios():
-    """Get all available test scenarios"""
+async def get_scenarios(
+    tag: Optional[str] = None,
+    scenario_type: Optional[str] = None,
+    registry: ScenarioRegistry = Depends(get_scenario_registry)
+):
+    """Get all available test scenarios, optionally filtered by tag and type"""
+    
+    try:
+        type_filter = ScenarioType(scenario_type) if scenario_type else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid scenario type: {scenario_type}")
     
-    scenarios = ScenarioBuilder.load_all_scenarios()
+    scenarios = registry.find(tags=[tag] if tag else None, scenario_type=type_filter)
     
     return [
         {
@@ -266,13 +404,13 @@ async def run_scenario(
     scenario_id: str,
     submission: ScenarioSubmission,
     background_tasks: BackgroundTasks,
-    manager: AgentManager = Depends(get_agent_manager)
+    manager: AgentManager = Depends(get_agent_manager),
+    registry: ScenarioRegistry = Depends(get_scenario_registry)
 ):
     """Run a specific test scenario"""
     
-    # Load scenario
-    scenarios = ScenarioBuilder.load_all_scenarios()
-    scenario = next((s for s in scenarios if s.id == scenario_id), None)
+    # Lookup scenario
+    scenario = registry.get(scenario_id)
     
     if not scenario:
         raise HTTPException(status_code=404, detail="Scenario not found")
@@ -285,9 +423,9 @@ async def run_scenario(
         **submission.parameters
     }
     
-    # Submit task
+    # Submit task (actions run natively, LLM agent only for failing steps)
     task_id = await manager.submit_task(
-        agent_type=AgentType.ENHANCED_TEST,
+        agent_type=AgentType.SCENARIO_TEST,
         task_description=task_description,
         parameters=parameters
     )
@@ -298,6 +436,83 @@ async def run_scenario(
         "message": "Scenario execution started"
     }
 
+@app.post("/api/scenarios/{scenario_id}/load-test")
+async def run_load_test(
+    scenario_id: str,
+    submission: LoadTestSubmission,
+    manager: AgentManager = Depends(get_agent_manager),
+    registry: ScenarioRegistry = Depends(get_scenario_registry)
+):
+    """Replay a scenario with concurrent synthetic users (ramp up, hold, ramp down)"""
+    
+    scenario = registry.get(scenario_id)
+    
+    if not scenario:
+        raise HTTPException(status_code=404, detail="Scenario not found")
+    
+    task_id = await manager.submit_task(
+        agent_type=AgentType.LOAD_TEST,
+        task_description=f"Load test scenario: {scenario.name}",
+        parameters={
+            "scenario": scenario,
+            "url": scenario.url,
+            **submission.dict()
+        }
+    )
+    
+    return {
+        "task_id": task_id,
+        "scenario_id": scenario_id,
+        "message": f"Load test started with up to {submission.users} users"
+    }
+
+@app.post("/api/suites/run")
+async def run_scenario_suite(
+    submission: SuiteRunSubmission,
+    manager: AgentManager = Depends(get_agent_manager),
+    registry: ScenarioRegistry = Depends(get_scenario_registry)
+):
+    """Run all matching scenarios as one sharded suite"""
+    
+    try:
+        scenario_types = [ScenarioType(t) for t in submission.scenario_types or []]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    scenarios = filter_scenarios(
+        registry.find(tags=submission.tags),
+        scenario_types=scenario_types,
+        min_priority=submission.min_priority
+    )
+    
+    if not scenarios:
+        raise HTTPException(status_code=404, detail="No scenarios match the given filters")
+    
+    # Pull in dependencies the filters left out, and reject broken graphs early
+    scenarios = ScenarioGraph.with_dependencies(scenarios, registry.all())
+    try:
+        ScenarioGraph(scenarios)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    task_id = await manager.submit_task(
+        agent_type=AgentType.SCENARIO_SUITE,
+        task_description=f"Execute suite of {len(scenarios)} scenarios",
+        parameters={
+            "scenarios": scenarios,
+            "shards": submission.shards,
+            "browser_processes": submission.browser_processes,
+            "browser": submission.browser,
+            "llm_fallback": submission.llm_fallback
+        }
+    )
+    
+    return {
+        "task_id": task_id,
+        "scenario_count": len(scenarios),
+        "message": "Suite execution started"
+    }
+
 @app.post("/api/test-suites")
 async def create_test_suite(
     suite: TestSuiteCreation,
@@ -358,7 +573,7 @@ async def health_check():
     """Health check endpoint"""
     
     # Check MCP server health
-    mcp_health = await mcp_client.health_check()
+    mcp_health = await mcp_pool.health_check()
     
     return {
         "status": "healthy",
@@ -368,56 +583,69 @@ async def health_check():
             "agent_manager": "operational",
             "database": "operational",
             "scenarios": "operational",
-            "mcp_server": "operational" if mcp_health else "unhealthy"
+            "mcp_server": "operational" if mcp_health["status"] == "healthy" else mcp_health["status"]
         }
     }
 
 @app.get("/api/mcp/status", response_model=MCPServerStatus)
 async def get_mcp_status(
-    client: PlaywrightMCPClient = Depends(get_mcp_client)
+    pool: MCPServerPool = Depends(get_mcp_pool)
 ):
     """Get MCP server status"""
     
-    server_info = client.get_server_info()
-    health_status = await client.health_check()
+    stats = pool.get_stats()
+    health = await pool.health_check()
+    first = stats["instances"][0]
     
     return MCPServerStatus(
-        is_running=server_info["is_running"],
-        port=3001,  # Default MCP port
-        process_id=server_info["process_id"],
-        config_path=server_info["config_path"],
-        health_status="healthy" if health_status else "unhealthy"
+        is_running=stats["is_running"],
+        port=first["port"],
+        process_id=first["process_id"],
+        config_path=str(pool.instances[0].client.config_path.absolute()),
+        health_status=health["status"],
+        healthy_instances=health["healthy"],
+        total_instances=health["total"],
+        recent_logs=pool.get_recent_logs()
     )
 
+@app.get("/api/mcp/instances")
+async def get_mcp_instances(
+    pool: MCPServerPool = Depends(get_mcp_pool)
+):
+    """Per-instance MCP server stats (port, sessions, restarts)"""
+    return pool.get_stats()
+
 @app.post("/api/mcp/start")
 async def start_mcp_server(
-    client: PlaywrightMCPClient = Depends(get_mcp_client)
+    pool: MCPServerPool = Depends(get_mcp_pool)
 ):
     """Start MCP server"""
     
     try:
-        success = await client.start_server(port=3001, headless=True)
+        success = await pool.start()
         
         if success:
             return {
                 "message": "MCP server started successfully",
                 "status": "running",
-                "port": 3001
+                "ports": [instance.port for instance in pool.instances if instance.is_running]
             }
         else:
             raise HTTPException(status_code=500, detail="Failed to start MCP server")
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error starting MCP server: {str(e)}")
 
 @app.post("/api/mcp/stop")
 async def stop_mcp_server(
-    client: PlaywrightMCPClient = Depends(get_mcp_client)
+    pool: MCPServerPool = Depends(get_mcp_pool)
 ):
     """Stop MCP server"""
     
     try:
-        await client.stop_server()
+        await pool.stop()
         
         return {
             "message": "MCP server stopped successfully",
@@ -429,22 +657,24 @@ async def stop_mcp_server(
 
 @app.post("/api/mcp/restart")
 async def restart_mcp_server(
-    client: PlaywrightMCPClient = Depends(get_mcp_client)
+    pool: MCPServerPool = Depends(get_mcp_pool)
 ):
     """Restart MCP server"""
     
     try:
-        success = await client.restart_server(port=3001, headless=True)
+        success = await pool.restart()
         
         if success:
             return {
                 "message": "MCP server restarted successfully",
                 "status": "running",
-                "port": 3001
+                "ports": [instance.port for instance in pool.instances if instance.is_running]
             }
         else:
             raise HTTPException(status_code=500, detail="Failed to restart MCP server")
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error restarting MCP server: {str(e)}")
 
@@ -471,7 +701,7 @@ async def websocket_endpoint(websocket: WebSocket):
             queue_status = agent_manager.get_queue_status()
             
             # Get MCP server status
-            mcp_health = await mcp_client.health_check()
+            mcp_health = await mcp_pool.health_check()
             
             status_update = {
                 "type": "status_update",
@@ -481,8 +711,9 @@ async def websocket_endpoint(websocket: WebSocket):
                     "pending_tasks": len(agent_manager.task_queue),
                     "completed_tasks": len(agent_manager.completed_tasks),
                     "mcp_server": {
-                        "status": "healthy" if mcp_health else "unhealthy",
-                        "is_running": mcp_client.is_running
+                        "status": mcp_health["status"],
+                        "is_running": mcp_pool.is_running,
+                        "healthy_instances": mcp_health["healthy"]
                     }
                 },
                 "timestamp": datetime.now().isoformat()
@@ -504,12 +735,23 @@ async def websocket_endpoint(websocket: WebSocket):
 async def startup_event():
     print("🚀 AI Agents Testing API started")
     print(f"📊 Agent Manager initialized with {agent_manager.max_concurrent_agents} max concurrent agents")
-    print(f"🤖 MCP Client initialized")
+    print(f"🤖 MCP pool initialized with {len(mcp_pool.instances)} instances")
+    
+    # Parse and index scenarios once up front
+    scenario_registry.refresh(force=True)
+    print(f"📁 Scenario registry loaded {len(scenario_registry)} scenarios")
+    
+    # Pre-launch warm browsers so the first task does not pay browser startup
+    try:
+        await agent_manager.browser_pool.start()
+        print("🌐 Browser pool warmed up")
+    except Exception as e:
+        print(f"⚠️ Browser pool failed to start - will retry on first task: {e}")
     
     # Start MCP server automatically
     try:
         print("🚀 Starting MCP server...")
-        success = await mcp_client.start_server(port=3001, headless=True)
+        success = await mcp_pool.start()
         if success:
             print("✅ MCP server started successfully")
         else:
@@ -522,9 +764,13 @@ async def shutdown_event():
     print("🛑 Shutting down AI Agents Testing API")
     database.close()
     
+    # Stop agent manager and close pooled browsers
+    await agent_manager.stop()
+    await get_llm_gateway().close()
+    
     # Stop MCP server
     try:
-        await mcp_client.stop_server()
+        await mcp_pool.stop()
         print("✅ MCP server stopped")
     except Exception as e:
         print(f"⚠️ Error stopping MCP server: {e}")
@@ -1,13 +1,18 @@
 # backend/automation/browser_controller.py
 import asyncio
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable, Awaitable, AsyncIterator, Tuple
 from datetime import datetime
 from pathlib import Path
 
-from browser_use import Agent
-from browser_use.llm import ChatAnthropic
-from .mcp_client import PlaywrightMCPClient
+from browser_use import Agent, BrowserSession
+from .mcp_pool import MCPServerPool, get_mcp_server_pool
+from .browser_pool import BrowserPool
+from .responsive_tester import ResponsiveTester
+from .performance_probe import PerformanceProbe
+from ..agents.llm_gateway import get_llm_gateway
+from ..agents.run_budget import RunGuard, budget_for
+from ..agents.step_profiler import StepProfiler
 from ..utils.config import Config
 
 logger = logging.getLogger(__name__)
@@ -15,155 +20,167 @@ logger = logging.getLogger(__name__)
 class EnhancedBrowserController:
     """Advanced browser controller với MCP support"""
     
-    def __init__(self):
-        self.mcp_client = PlaywrightMCPClient()
-        self.llm = ChatAnthropic(
-            model=Config.CLAUDE_MODEL,
-            api_key=Config.ANTHROPIC_API_KEY
-        )
+    def __init__(self, browser_pool: BrowserPool = None, mcp_pool: MCPServerPool = None):
+        # Process-wide MCP pool: every browser run holds one of its session slots
+        self.mcp_pool = mcp_pool or get_mcp_server_pool()
+        self._started_mcp_pool = False
+        # Pool is shared when provided, otherwise owned (and stopped) by this controller
+        self._owns_pool = browser_pool is None
+        self.browser_pool = browser_pool or BrowserPool(size_per_type=1)
+        self.llm = get_llm_gateway().chat_model(Config.CLAUDE_MODEL)
         self.screenshots_dir = Path("screenshots")
         self.screenshots_dir.mkdir(exist_ok=True)
-        
-    async def start_mcp_server(self) -> bool:
-        """Start MCP server for advanced features"""
-        return await self.mcp_client.start_server()
-    
-    async def stop_mcp_server(self):
-        """Stop MCP server"""
-        await self.mcp_client.stop_server()
     
     async def run_cross_browser_test(self, 
                                    task: str, 
-                                   browsers: List[str] = None) -> Dict[str, Any]:
-        """Chạy test trên multiple browsers"""
-        if browsers is None:
-            browsers = ["chromium", "firefox", "webkit"]
+                                   browsers: List[str] = None,
+                                   max_parallel: int = None,
+                                   on_result: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """Chạy test trên multiple browsers song song
         
+        ``on_result`` is awaited with each browser's result as soon as it finishes.
+        """
         results = {}
         
-        for browser in browsers:
-            print(f"🌐 Testing on {browser}...")
-            
-            try:
-                # Customize task for specific browser
-                browser_task = f"""
-                {task}
-                
-                Additional requirements for {browser} testing:
-                - Note any browser-specific behaviors
-                - Check for compatibility issues
-                - Verify consistent functionality
-                - Take screenshot for comparison
-                """
-                
-                agent = Agent(
-                    task=browser_task,
-                    llm=self.llm
-                )
-                
-                start_time = datetime.now()
-                result = await agent.run()
-                execution_time = (datetime.now() - start_time).total_seconds()
-                
-                results[browser] = {
-                    "status": "success",
-                    "result": result,
-                    "execution_time": execution_time,
-                    "browser": browser,
-                    "timestamp": start_time.isoformat()
-                }
-                
-            except Exception as e:
-                logger.error(f"Error testing {browser}: {e}")
-                results[browser] = {
-                    "status": "error",
-                    "error": str(e),
-                    "browser": browser,
-                    "timestamp": datetime.now().isoformat()
-                }
+        async for browser, result in self.iter_cross_browser_test(task, browsers, max_parallel):
+            results[browser] = result
+            if on_result is not None:
+                await on_result(browser, result)
         
         return {
             "cross_browser_results": results,
             "summary": self._generate_cross_browser_summary(results)
         }
     
-    async def run_responsive_test(self, url: str, viewports: List[Dict] = None) -> Dict[str, Any]:
-        """Test responsive design across different viewport sizes"""
-        if viewports is None:
-            viewports = [
-                {"width": 1920, "height": 1080, "name": "Desktop Large"},
-                {"width": 1366, "height": 768, "name": "Desktop Medium"},
-                {"width": 768, "height": 1024, "name": "Tablet"},
-                {"width": 375, "height": 667, "name": "Mobile"}
-            ]
+    async def iter_cross_browser_test(self,
+                                      task: str,
+                                      browsers: List[str] = None,
+                                      max_parallel: int = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Run browsers concurrently and yield ``(browser, result)`` in completion order"""
+        if browsers is None:
+            browsers = ["chromium", "firefox", "webkit"]
         
-        task = f"""
-        Navigate to {url} and perform responsive design testing.
+        semaphore = asyncio.Semaphore(max_parallel or Config.CROSS_BROWSER_PARALLELISM)
         
-        Test requirements:
-        1. Check layout adapts properly to different screen sizes
-        2. Verify navigation menu works on mobile
-        3. Ensure text is readable at all sizes
-        4. Check that buttons and links are clickable
-        5. Verify images scale appropriately
-        6. Test horizontal scrolling (should be minimal)
+        async def run_one(browser: str) -> Tuple[str, Dict[str, Any]]:
+            async with semaphore:
+                return browser, await self._run_browser_test(task, browser)
         
-        Take screenshots at each viewport size for comparison.
-        Document any responsive design issues found.
-        """
+        pending = [asyncio.create_task(run_one(browser)) for browser in browsers]
+        try:
+            for finished in asyncio.as_completed(pending):
+                yield await finished
+        finally:
+            # Consumer stopped early: do not leave agents running, and wait for their
+            # cancellation so leases are released before we return
+            for running in pending:
+                running.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+    
+    async def _run_browser_test(self, task: str, browser: str) -> Dict[str, Any]:
+        """Run the task on one browser engine; errors are returned, never raised"""
+        print(f"🌐 Testing on {browser}...")
         
-        agent = Agent(task=task, llm=self.llm)
+        # Customize task for specific browser
+        browser_task = f"""
+        {task}
+        
+        Additional requirements for {browser} testing:
+        - Note any browser-specific behaviors
+        - Check for compatibility issues
+        - Verify consistent functionality
+        - Take screenshot for comparison
+        """
         
+        start_time = datetime.now()
         try:
-            result = await agent.run()
+            async with self.mcp_pool.session(required=False), self.browser_pool.lease(browser) as lease:
+                # browser_context= is browser-use 0.5 API (pinned in requirements.txt)
+                agent = Agent(
+                    task=browser_task,
+                    llm=self.llm,
+                    browser_session=BrowserSession(browser_context=lease.context, keep_alive=True)
+                )
+                
+                profiler = StepProfiler()
+                guard = RunGuard(budget_for("cross_browser"), profiler)
+                
+                async def on_step_end(running_agent):
+                    await profiler.on_step_end(running_agent)
+                    await guard.check(running_agent)
+                
+                result = await agent.run(
+                    max_steps=guard.remaining_steps,
+                    on_step_start=profiler.on_step_start,
+                    on_step_end=on_step_end
+                )
+                guard.finish(result)
+            
+            execution_time = (datetime.now() - start_time).total_seconds()
             
             return {
-                "status": "success",
+                "status": "error" if guard.failed else "success",
                 "result": result,
-                "viewports_tested": viewports,
-                "timestamp": datetime.now().isoformat()
+                "error": guard.stop_reason if guard.failed else None,
+                "budget": guard.report(),
+                "execution_time": execution_time,
+                "browser": browser,
+                "timestamp": start_time.isoformat()
             }
             
         except Exception as e:
+            logger.error(f"Error testing {browser}: {e}")
             return {
-                "status": "error", 
+                "status": "error",
                 "error": str(e),
+                "execution_time": (datetime.now() - start_time).total_seconds(),
+                "browser": browser,
                 "timestamp": datetime.now().isoformat()
             }
     
-    async def run_performance_test(self, url: str) -> Dict[str, Any]:
-        """Test website performance và loading"""
-        task = f"""
-        Navigate to {url} and perform comprehensive performance testing:
-        
-        Performance metrics to check:
-        1. Page load time (aim for < 3 seconds)
-        2. Time to first contentful paint
-        3. Largest contentful paint
-        4. Check for broken images or missing resources
-        5. Test navigation speed between pages
-        6. Verify page doesn't have excessive JavaScript errors
-        7. Check network requests efficiency
-        
-        Document any performance issues and loading problems.
-        Provide recommendations for improvement if issues found.
+    async def run_responsive_test(self, url: str, viewports: List[Dict] = None,
+                                  browser: str = "chromium",
+                                  update_baselines: bool = False) -> Dict[str, Any]:
+        """Test responsive design across different viewport sizes
+
+        Every viewport runs concurrently in its own context; overflow, layout
+        shift and visual diffs against baselines are measured in the page and
+        the LLM only describes the regressions that were found.
         """
-        
-        agent = Agent(task=task, llm=self.llm)
-        
+        tester = ResponsiveTester(
+            self.browser_pool,
+            screenshots_dir=str(self.screenshots_dir),
+            baselines_dir=str(self.screenshots_dir / "baselines"),
+            llm=self.llm
+        )
+
         try:
-            start_time = datetime.now()
-            result = await agent.run()
-            total_execution_time = (datetime.now() - start_time).total_seconds()
-            
+            result = await tester.run(url, viewports, browser=browser, update_baselines=update_baselines)
+            result["viewports_tested"] = [
+                {"width": r["width"], "height": r["height"], "name": r["viewport"]}
+                for r in result["viewport_results"]
+            ]
+            return result
+
+        except Exception as e:
             return {
-                "status": "success",
-                "result": result,
-                "test_execution_time": total_execution_time,
-                "url": url,
-                "timestamp": start_time.isoformat()
+                "status": "error", 
+                "error": str(e),
+                "timestamp": datetime.now().isoformat()
             }
-            
+    
+    async def run_performance_test(self, url: str, runs: int = 5, browser: str = "chromium") -> Dict[str, Any]:
+        """Test website performance và loading
+
+        Timings come from the browser itself (Navigation/Resource Timing,
+        PerformanceObserver), repeated ``runs`` times and reported as
+        median and p95.
+        """
+        probe = PerformanceProbe(self.browser_pool, runs=runs)
+
+        try:
+            return await probe.measure(url, browser=browser)
+
         except Exception as e:
             return {
                 "status": "error",
@@ -188,9 +205,15 @@ class EnhancedBrowserController:
 
     async def __aenter__(self):
         """Async context manager entry"""
-        await self.start_mcp_server()
+        if not self.mcp_pool.is_running:
+            # Standalone use: start the shared pool (the API has usually started it already)
+            self._started_mcp_pool = await self.mcp_pool.start()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit"""
-        await self.stop_mcp_server()
\ No newline at end of file
+        if self._started_mcp_pool:
+            await self.mcp_pool.stop()
+            self._started_mcp_pool = False
+        if self._owns_pool:
+            await self.browser_pool.stop()
\ No newline at end of file
@@ -0,0 +1,332 @@
+# backend/automation/browser_pool.py
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Set, Callable, Awaitable
+from datetime import datetime
+from contextlib import asynccontextmanager
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+
+from ..utils.config import Config
+
+try:
+    import psutil
+except ImportError:  # memory based recycling is disabled without psutil
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+class PooledBrowser:
+    """Một browser process đã launch sẵn trong pool"""
+
+    def __init__(self, browser_type: str, browser: Browser, pids: Set[int]):
+        # Main process(es) of this browser only; renderers etc. are found by walking their subtree
+        self.browser_type = browser_type
+        self.browser = browser
+        self.pids = pids
+        self.created_at = datetime.now()
+        self.uses = 0
+        self.active_leases = 0
+        self.retiring = False
+
+    def memory_mb(self) -> Optional[float]:
+        """Resident memory of the browser process tree (None if unknown)"""
+        if psutil is None or not self.pids:
+            return None
+
+        total = 0
+        seen = set()
+        for pid in self.pids:
+            try:
+                process = psutil.Process(pid)
+                for proc in [process] + process.children(recursive=True):
+                    if proc.pid not in seen:
+                        seen.add(proc.pid)
+                        total += proc.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+        return total / (1024 * 1024)
+
+    def is_healthy(self) -> bool:
+        return self.browser.is_connected()
+
+class BrowserLease:
+    """Context cô lập được cấp cho một task; trả lại pool khi xong"""
+
+    def __init__(self, pooled: PooledBrowser, context: BrowserContext, page: Page):
+        self.pooled = pooled
+        self.browser_type = pooled.browser_type
+        self.browser = pooled.browser
+        self.context = context
+        self.page = page
+        self.leased_at = datetime.now()
+
+class ContextLease:
+    """Context không thuộc pool (ví dụ context của SuiteRunner), cho agent mượn trong một lần chạy"""
+
+    def __init__(self, context: BrowserContext, page: Page):
+        self.context = context
+        self.page = page
+        self.leased_at = datetime.now()
+
+class BrowserPool:
+    """Pool các browser process warm, dùng chung giữa các agents
+
+    Browsers are launched once per type and handed out as fresh isolated
+    contexts (milliseconds instead of a 1-3 second browser launch). A
+    browser is recycled after ``max_uses`` leases, when its process tree
+    grows beyond ``max_memory_mb``, or when it stops responding.
+
+    ``launcher`` replaces the Playwright launch (``await launcher(type)``
+    returns a Browser), e.g. to test the pool without real browsers.
+    """
+
+    def __init__(self,
+                 browser_types: List[str] = None,
+                 size_per_type: int = None,
+                 max_contexts_per_browser: int = None,
+                 max_uses: int = None,
+                 max_memory_mb: int = None,
+                 headless: bool = None,
+                 launcher: Optional[Callable[[str], Awaitable[Browser]]] = None):
+        self.browser_types = browser_types or Config.BROWSER_POOL_TYPES
+        self.size_per_type = size_per_type or Config.BROWSER_POOL_SIZE
+        self.max_contexts_per_browser = max_contexts_per_browser or Config.BROWSER_POOL_MAX_CONTEXTS
+        self.max_uses = max_uses or Config.BROWSER_POOL_MAX_USES
+        self.max_memory_mb = max_memory_mb or Config.BROWSER_POOL_MAX_MEMORY_MB
+        self.headless = Config.BROWSER_HEADLESS if headless is None else headless
+        self.launcher = launcher
+
+        self._playwright: Optional[Playwright] = None
+        # Playwright driver process(es) of this pool: each launched browser is a direct child
+        self._driver_pids: Set[int] = set()
+        self._browsers: Dict[str, List[PooledBrowser]] = {}
+        self._available = asyncio.Condition()
+        self._started = False
+        self._start_lock = asyncio.Lock()
+        # One launch at a time, so a new direct child of the driver is the browser just launched
+        self._launch_lock = asyncio.Lock()
+        # Per browser type: concurrent first leases of a type that is not pre-warmed launch it once
+        self._type_locks: Dict[str, asyncio.Lock] = {}
+
+        self.total_leases = 0
+        self.total_recycled = 0
+
+    async def start(self):
+        """Launch the pre-warmed browsers"""
+        async with self._start_lock:
+            if self._started:
+                return
+
+            if self.launcher is None:
+                before = self._own_children()
+                self._playwright = await async_playwright().start()
+                self._driver_pids = self._own_children() - before
+
+            for browser_type in self.browser_types:
+                self._browsers[browser_type] = [
+                    await self._launch(browser_type) for _ in range(self.size_per_type)
+                ]
+
+            self._started = True
+            logger.info(f"Browser pool started: {self.size_per_type} x {', '.join(self.browser_types)}")
+
+    async def stop(self):
+        """Close every browser and stop Playwright"""
+        async with self._start_lock:
+            if not self._started:
+                return
+
+            for browsers in self._browsers.values():
+                await asyncio.gather(*[pooled.browser.close() for pooled in browsers], return_exceptions=True)
+            self._browsers.clear()
+
+            if self._playwright is not None:
+                await self._playwright.stop()
+            self._playwright = None
+            self._driver_pids = set()
+            self._started = False
+            logger.info("Browser pool stopped")
+
+    async def _launch(self, browser_type: str) -> PooledBrowser:
+        async with self._launch_lock:
+            before = self._browser_pids()
+            if self.launcher is not None:
+                browser = await self.launcher(browser_type)
+            else:
+                browser = await getattr(self._playwright, browser_type).launch(headless=self.headless)
+            pids = self._browser_pids() - before
+        return PooledBrowser(browser_type, browser, pids)
+
+    @staticmethod
+    def _own_children() -> Set[int]:
+        if psutil is None:
+            return set()
+        try:
+            return {proc.pid for proc in psutil.Process().children()}
+        except psutil.Error:
+            return set()
+
+    def _browser_pids(self) -> Set[int]:
+        """Browser main processes of this pool: direct children of its Playwright driver
+
+        Renderers and other helpers are children of their browser, so a
+        browser launched elsewhere (or spawning renderers) meanwhile is
+        never attributed to the one being launched.
+        """
+        if psutil is None:
+            return set()
+        pids = set()
+        for driver_pid in self._driver_pids:
+            try:
+                pids |= {proc.pid for proc in psutil.Process(driver_pid).children()}
+            except psutil.Error:
+                continue
+        return pids
+
+    async def acquire(self, browser_type: str = "chromium", **context_options) -> BrowserLease:
+        """Lease a fresh isolated context on a warm browser"""
+        if not self._started:
+            await self.start()
+
+        while True:
+            if not self._browsers.get(browser_type):
+                # Also reached by waiters when the last browser of the type failed to relaunch:
+                # they launch one themselves, and a failing launch raises instead of waiting forever
+                await self._launch_on_demand(browser_type)
+
+            async with self._available:
+                pooled = self._pick(browser_type)
+                if pooled is not None:
+                    pooled.active_leases += 1
+                    pooled.uses += 1
+                    break
+                if self._browsers.get(browser_type):
+                    await self._available.wait()
+
+        try:
+            if not pooled.is_healthy():
+                raise RuntimeError(f"{browser_type} browser disconnected")
+            context = await pooled.browser.new_context(**context_options)
+            page = await context.new_page()
+        except Exception as e:
+            logger.warning(f"Lease on unhealthy {browser_type} browser failed ({e}), replacing it")
+            pooled.retiring = True
+            await self._return(pooled)
+            return await self.acquire(browser_type, **context_options)
+
+        self.total_leases += 1
+        return BrowserLease(pooled, context, page)
+
+    async def _launch_on_demand(self, browser_type: str):
+        """Browser types outside the pre-warmed set (or whose relaunch failed) start on first use"""
+        async with self._type_locks.setdefault(browser_type, asyncio.Lock()):
+            if not self._browsers.get(browser_type):
+                self._browsers.setdefault(browser_type, []).append(await self._launch(browser_type))
+
+    def _pick(self, browser_type: str) -> Optional[PooledBrowser]:
+        candidates = [
+            pooled for pooled in self._browsers.get(browser_type, [])
+            if not pooled.retiring and pooled.active_leases < self.max_contexts_per_browser
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda pooled: pooled.active_leases)
+
+    async def release(self, lease: BrowserLease):
+        """Close the leased context and return its browser to the pool"""
+        try:
+            await lease.context.close()
+        except Exception as e:
+            logger.warning(f"Failed to close leased context: {e}")
+
+        pooled = lease.pooled
+        if pooled.uses >= self.max_uses:
+            pooled.retiring = True
+        elif self.max_memory_mb:
+            memory = pooled.memory_mb()
+            if memory is not None and memory > self.max_memory_mb:
+                logger.info(f"{pooled.browser_type} browser uses {memory:.0f}MB, recycling")
+                pooled.retiring = True
+
+        await self._return(pooled)
+
+    async def _return(self, pooled: PooledBrowser):
+        pooled.active_leases -= 1
+
+        if pooled.retiring and pooled.active_leases == 0:
+            await self._recycle(pooled)
+
+        async with self._available:
+            self._available.notify_all()
+
+    async def _recycle(self, pooled: PooledBrowser):
+        """Replace a retiring browser with a freshly launched one"""
+        try:
+            await pooled.browser.close()
+        except Exception:
+            pass
+
+        # The retiring browser stays listed until the launch is over, so new leases wait for the
+        # replacement instead of launching one of their own
+        replacement = None
+        if self._started:
+            try:
+                replacement = await self._launch(pooled.browser_type)
+            except Exception as e:
+                logger.error(f"Failed to relaunch {pooled.browser_type} browser: {e}")
+
+        browsers = self._browsers.setdefault(pooled.browser_type, [])
+        if pooled in browsers:
+            browsers.remove(pooled)
+        if replacement is not None:
+            browsers.append(replacement)
+            self.total_recycled += 1
+            logger.info(f"Recycled {pooled.browser_type} browser after {pooled.uses} uses")
+
+    @asynccontextmanager
+    async def lease(self, browser_type: str = "chromium", **context_options):
+        """``async with pool.lease("firefox") as lease: ...``"""
+        lease = await self.acquire(browser_type, **context_options)
+        try:
+            yield lease
+        finally:
+            await self.release(lease)
+
+    async def health_check(self) -> Dict[str, Any]:
+        """Replace idle browsers that lost their connection (run periodically by AgentManager)"""
+        replaced = 0
+        for browsers in self._browsers.values():
+            for pooled in list(browsers):
+                if not pooled.is_healthy():
+                    pooled.retiring = True
+                    if pooled.active_leases == 0:
+                        await self._recycle(pooled)
+                        replaced += 1
+
+        if replaced:
+            async with self._available:
+                self._available.notify_all()
+        return {"healthy": replaced == 0, "replaced": replaced}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "started": self._started,
+            "total_leases": self.total_leases,
+            "total_recycled": self.total_recycled,
+            "browsers": {
+                browser_type: [
+                    {
+                        "uses": pooled.uses,
+                        "active_leases": pooled.active_leases,
+                        "retiring": pooled.retiring,
+                        "connected": pooled.is_healthy(),
+                        "memory_mb": pooled.memory_mb(),
+                        "created_at": pooled.created_at.isoformat()
+                    }
+                    for pooled in browsers
+                ]
+                for browser_type, browsers in self._browsers.items()
+            }
+        }
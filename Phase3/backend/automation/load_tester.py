@@ -0,0 +1,269 @@
+# backend/automation/load_tester.py
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import httpx
+
+from .scenario_executor import ScenarioExecutor
+from ..utils.stats import percentile
+from ..scenarios.scenario_builder import TestScenario
+
+if TYPE_CHECKING:
+    from .browser_pool import BrowserPool
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+# Only these requests carry the application load; static assets are left to CDNs and caches
+REPLAYED_RESOURCE_TYPES = {"document", "xhr", "fetch"}
+
+@dataclass
+class LoadProfile:
+    users: int = 20                 # peak concurrent HTTP users
+    browser_users: int = 2          # real browser contexts running the full scenario throughout
+    ramp_up: float = 10.0           # seconds
+    hold: float = 30.0
+    ramp_down: float = 10.0
+    think_time: float = 1.0         # pause between steps of one user
+    request_timeout: float = 10.0
+    browser: str = "chromium"
+
+    @property
+    def duration(self) -> float:
+        return self.ramp_up + self.hold + self.ramp_down
+
+    def target_users(self, elapsed: float) -> int:
+        """Number of HTTP users that should be active ``elapsed`` seconds into the test"""
+        if elapsed < self.ramp_up:
+            return max(1, round(self.users * elapsed / self.ramp_up))
+        if elapsed < self.ramp_up + self.hold:
+            return self.users
+        if elapsed < self.duration:
+            remaining = self.duration - elapsed
+            return round(self.users * remaining / self.ramp_down) if self.ramp_down else 0
+        return 0
+
+@dataclass
+class CapturedStep:
+    """Requests một step của scenario gửi đi, dùng để replay ở HTTP level"""
+    name: str
+    requests: List[Dict[str, Any]] = field(default_factory=list)
+
+class LatencyHistogram:
+    """Latency samples of one step: bucketed counts plus exact percentiles"""
+
+    def __init__(self):
+        self.samples: List[float] = []
+        self.errors = 0
+
+    def record(self, latency_ms: float, error: bool = False):
+        self.samples.append(latency_ms)
+        if error:
+            self.errors += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        buckets = {f"<={bound}": 0 for bound in LATENCY_BUCKETS_MS}
+        buckets[f">{LATENCY_BUCKETS_MS[-1]}"] = 0
+        for sample in self.samples:
+            for bound in LATENCY_BUCKETS_MS:
+                if sample <= bound:
+                    buckets[f"<={bound}"] += 1
+                    break
+            else:
+                buckets[f">{LATENCY_BUCKETS_MS[-1]}"] += 1
+
+        return {
+            "count": len(self.samples),
+            "errors": self.errors,
+            "error_rate": self.errors / len(self.samples) if self.samples else 0,
+            "p50": percentile(self.samples, 50),
+            "p95": percentile(self.samples, 95),
+            "p99": percentile(self.samples, 99),
+            "max": max(self.samples) if self.samples else None,
+            "buckets": buckets
+        }
+
+class LoadTester:
+    """Load test: replay một TestScenario với nhiều user đồng thời
+
+    The scenario is executed once in a real browser to capture the
+    document/XHR/fetch requests of every step. Those requests are then
+    replayed by lightweight HTTP users (one cookie jar each) following the
+    ramp-up / hold / ramp-down profile, while ``browser_users`` real
+    contexts keep running the full scenario to measure what users see.
+    """
+
+    def __init__(self, browser_pool: Optional["BrowserPool"], profile: LoadProfile = None):
+        self.browser_pool = browser_pool
+        self.profile = profile or LoadProfile()
+
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._timeline: Dict[int, Dict[str, int]] = {}
+        self._active_users = 0
+        self._started_at = 0.0
+
+    async def capture(self, scenario: TestScenario) -> List[CapturedStep]:
+        """Run the scenario once and record the same-origin requests of each step"""
+        origin = urlsplit(scenario.url).netloc
+        steps: List[CapturedStep] = [CapturedStep(name="start")]
+
+        def on_step_start(phase, index, action):
+            steps.append(CapturedStep(name=f"{phase}:{index}:{action.type.value}"))
+
+        def on_request(request):
+            if request.resource_type in REPLAYED_RESOURCE_TYPES and urlsplit(request.url).netloc == origin:
+                steps[-1].requests.append({
+                    "method": request.method,
+                    "url": request.url,
+                    "headers": {k: v for k, v in request.headers.items() if k.lower() not in ("cookie", "content-length")},
+                    "body": request.post_data
+                })
+
+        executor = ScenarioExecutor(browser_type=self.profile.browser, on_step_start=on_step_start)
+        async with self.browser_pool.lease(self.profile.browser) as lease:
+            lease.page.on("request", on_request)
+            result = await executor.execute(scenario, lease.page)
+
+        if result["status"] != "success":
+            raise RuntimeError(f"Capture run of {scenario.id} failed: {result.get('error')}")
+
+        captured = [step for step in steps if step.requests]
+        logger.info(f"Captured {sum(len(s.requests) for s in captured)} requests in {len(captured)} steps")
+        return captured
+
+    async def run(self, scenario: TestScenario, steps: Optional[List[CapturedStep]] = None) -> Dict[str, Any]:
+        """Capture (unless ``steps`` is given) and run the load profile"""
+        start_time = datetime.now()
+        steps = steps if steps is not None else await self.capture(scenario)
+        if not steps:
+            raise ValueError(f"Scenario {scenario.id} produced no replayable requests")
+
+        self._histograms = {}
+        self._timeline = {}
+        self._active_users = 0
+        self._started_at = time.monotonic()
+
+        stop_all = asyncio.Event()
+        browser_tasks = [
+            asyncio.create_task(self._browser_user(scenario, stop_all))
+            for _ in range(self.profile.browser_users if self.browser_pool is not None else 0)
+        ]
+
+        user_stops: List[asyncio.Event] = []
+        user_tasks: List[asyncio.Task] = []
+
+        while True:
+            elapsed = time.monotonic() - self._started_at
+            if elapsed >= self.profile.duration:
+                break
+
+            target = self.profile.target_users(elapsed)
+            running = [event for event in user_stops if not event.is_set()]
+            for _ in range(target - len(running)):
+                stop = asyncio.Event()
+                user_stops.append(stop)
+                user_tasks.append(asyncio.create_task(self._http_user(steps, stop)))
+            # Ramp down: newest users leave first
+            for stop in running[target:]:
+                stop.set()
+
+            await asyncio.sleep(0.2)
+
+        for stop in user_stops:
+            stop.set()
+        stop_all.set()
+        await asyncio.gather(*user_tasks, *browser_tasks, return_exceptions=True)
+
+        execution_time = (datetime.now() - start_time).total_seconds()
+        step_stats = {name: histogram.to_dict() for name, histogram in self._histograms.items()}
+        total_requests = sum(s["count"] for s in step_stats.values())
+        total_errors = sum(s["errors"] for s in step_stats.values())
+
+        return {
+            "status": "success",
+            "result": {
+                "performance_metrics": {
+                    "load_profile": asdict(self.profile),
+                    "captured_steps": [{"name": s.name, "requests": len(s.requests)} for s in steps],
+                    "steps": step_stats,
+                    "timeline": [
+                        {"second": second, **self._timeline[second]} for second in sorted(self._timeline)
+                    ],
+                    "total_step_executions": total_requests,
+                    "total_errors": total_errors,
+                    "error_rate": total_errors / total_requests if total_requests else 0
+                },
+                "assertions_checked": []
+            },
+            "scenario_id": scenario.id,
+            "url": scenario.url,
+            "execution_time": execution_time,
+            "timestamp": start_time.isoformat(),
+            "agent_type": "load_test"
+        }
+
+    def _record(self, step: str, latency_ms: float, error: bool):
+        self._histograms.setdefault(step, LatencyHistogram()).record(latency_ms, error)
+
+        second = int(time.monotonic() - self._started_at)
+        bucket = self._timeline.setdefault(second, {"steps": 0, "errors": 0, "active_users": 0})
+        bucket["steps"] += 1
+        bucket["errors"] += int(error)
+        bucket["active_users"] = max(bucket["active_users"], self._active_users)
+
+    async def _http_user(self, steps: List[CapturedStep], stop: asyncio.Event):
+        """One virtual user replaying the captured steps in a loop with its own connections and cookies"""
+        self._active_users += 1
+        try:
+            async with httpx.AsyncClient(timeout=self.profile.request_timeout) as client:
+                await self._replay(client, steps, stop)
+        finally:
+            self._active_users -= 1
+
+    async def _replay(self, client: httpx.AsyncClient, steps: List[CapturedStep], stop: asyncio.Event):
+        while not stop.is_set():
+            for step in steps:
+                if stop.is_set():
+                    break
+                started = time.monotonic()
+                error = False
+                try:
+                    responses = await asyncio.gather(*[
+                        client.request(request["method"], request["url"], headers=request["headers"],
+                                       content=request["body"])
+                        for request in step.requests
+                    ])
+                    error = any(response.status_code >= 400 for response in responses)
+                except httpx.HTTPError as e:
+                    logger.debug(f"Load request for step {step.name} failed: {e}")
+                    error = True
+                self._record(f"http:{step.name}", (time.monotonic() - started) * 1000, error)
+
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=self.profile.think_time)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _browser_user(self, scenario: TestScenario, stop: asyncio.Event):
+        """A real browser context running the whole scenario for the duration of the test"""
+        executor = ScenarioExecutor(browser_type=self.profile.browser)
+        while not stop.is_set():
+            try:
+                async with self.browser_pool.lease(self.profile.browser) as lease:
+                    result = await executor.execute(scenario, lease.page)
+            except Exception as e:
+                logger.warning(f"Browser user failed to run {scenario.id}: {e}")
+                self._record("browser:scenario", 0, True)
+                await asyncio.sleep(self.profile.think_time)
+                continue
+
+            for step in result["result"]["actions_performed"]:
+                self._record(f"browser:{step['phase']}:{step['index']}:{step['type']}",
+                             step["duration"] * 1000, step["status"] != "passed")
@@ -1,14 +1,119 @@
+import re
+import json
+import shutil
 import asyncio
-import subprocess
 import logging
-from typing import Dict, Any, Optional
+from collections import deque
+from typing import Dict, Any, List, Optional
+from datetime import datetime
 from pathlib import Path
 
+import httpx
+
+from ..utils.config import Config
+
 logger = logging.getLogger(__name__)
 
+MCP_PROTOCOL_VERSION = "2025-03-26"
+
+# Printed by @playwright/mcp once its HTTP transport is listening
+READY_LINE = re.compile(r"listening on|http://\S+:\d+", re.IGNORECASE)
+
+MCP_PACKAGE = "@playwright/mcp"
+
+def server_prefix() -> Path:
+    """Directory holding the pinned local install (``npm install --prefix``)"""
+    prefix = Path(Config.MCP_SERVER_PREFIX)
+    if not prefix.is_absolute():
+        prefix = Path(__file__).parent.parent.parent / prefix
+    return prefix
+
+def installed_server_version(prefix: Path = None) -> Optional[str]:
+    package_json = (prefix or server_prefix()) / "node_modules" / MCP_PACKAGE / "package.json"
+    if not package_json.exists():
+        return None
+    return json.loads(package_json.read_text(encoding="utf-8")).get("version")
+
+def resolve_server_command() -> List[str]:
+    """``node cli.js`` of the pinned local install, or ``MCP_SERVER_BIN`` when set
+
+    Never touches the npm registry; raises with bootstrap instructions when
+    the pinned version is not installed.
+    """
+    node = shutil.which("node")
+    
+    if Config.MCP_SERVER_BIN:
+        binary = Path(Config.MCP_SERVER_BIN)
+        if not binary.exists():
+            raise RuntimeError(f"MCP_SERVER_BIN points to a missing file: {binary}")
+        if binary.suffix in (".js", ".mjs"):
+            if node is None:
+                raise RuntimeError("node not found on PATH - install Node.js to run the MCP server")
+            return [node, str(binary)]
+        return [str(binary)]
+    
+    prefix = server_prefix()
+    installed = installed_server_version(prefix)
+    bootstrap_hint = (f"Run `python -m backend.automation.mcp_client --bootstrap` once (needs network) "
+                      f"or set MCP_SERVER_BIN to an installed {MCP_PACKAGE} cli.js")
+    
+    if installed is None:
+        raise RuntimeError(f"{MCP_PACKAGE}@{Config.MCP_SERVER_VERSION} is not installed in {prefix}. {bootstrap_hint}")
+    if installed != Config.MCP_SERVER_VERSION:
+        raise RuntimeError(f"{prefix} has {MCP_PACKAGE}@{installed} but {Config.MCP_SERVER_VERSION} is pinned. "
+                           f"{bootstrap_hint}")
+    if node is None:
+        raise RuntimeError("node not found on PATH - install Node.js to run the MCP server")
+    
+    package_dir = prefix / "node_modules" / MCP_PACKAGE
+    package = json.loads((package_dir / "package.json").read_text(encoding="utf-8"))
+    bin_entry = package.get("bin", "cli.js")
+    if isinstance(bin_entry, dict):
+        bin_entry = next(iter(bin_entry.values()))
+    
+    return [node, str(package_dir / bin_entry)]
+
+async def bootstrap_server(version: str = None) -> bool:
+    """One-time install of the pinned MCP server into the local prefix"""
+    version = version or Config.MCP_SERVER_VERSION
+    prefix = server_prefix()
+    
+    if installed_server_version(prefix) == version:
+        print(f"✅ {MCP_PACKAGE}@{version} already installed in {prefix}")
+        return True
+    
+    npm = shutil.which("npm")
+    if npm is None:
+        print("❌ npm not found on PATH - install Node.js first")
+        return False
+    
+    prefix.mkdir(parents=True, exist_ok=True)
+    cmd = [npm, "install", "--prefix", str(prefix), "--no-audit", "--no-fund", "--save-exact",
+           f"{MCP_PACKAGE}@{version}"]
+    if npm.lower().endswith((".cmd", ".bat")):
+        cmd = ["cmd", "/c"] + cmd
+    
+    print(f"📦 Installing {MCP_PACKAGE}@{version} into {prefix}...")
+    process = await asyncio.create_subprocess_exec(*cmd)
+    if await process.wait() != 0 or installed_server_version(prefix) != version:
+        print(f"❌ Failed to install {MCP_PACKAGE}@{version}")
+        return False
+    
+    print(f"✅ Installed {MCP_PACKAGE}@{version}")
+    return True
+
 class PlaywrightMCPClient:
     """Client để tương tác với Playwright MCP Server - Windows Compatible"""
     
+    STARTUP_TIMEOUT = 30  # seconds until the server must answer an MCP ping
+    STOP_TIMEOUT = 5  # seconds to exit gracefully before being killed
+    LOG_BUFFER_LINES = 500  # recent stdout/stderr lines kept in memory
+    READ_CHUNK_BYTES = 64 * 1024  # server output is read in chunks of this size
+    MAX_LINE_BYTES = 8 * 1024  # longer output lines are kept truncated
+    STREAM_LIMIT = 1024 * 1024  # StreamReader buffer limit of the server pipes
+    
+    _resolved_command: Optional[List[str]] = None
+    
     def __init__(self, config_path: str = None):
         # Auto-detect config file location
         if config_path is None:
@@ -23,6 +128,13 @@ class PlaywrightMCPClient:
         self.config_path = config_path
         self.process = None
         self.is_running = False
+        self.port = None
+        self.host = "127.0.0.1"
+        
+        # Server output is drained continuously so a full pipe can never block the server
+        self.logs: deque = deque(maxlen=self.LOG_BUFFER_LINES)
+        self._drain_tasks: List[asyncio.Task] = []
+        self._ready_line: Optional[asyncio.Event] = None
         
         logger.info(f"Using config file: {self.config_path.absolute()}")
         
@@ -37,9 +149,8 @@ class PlaywrightMCPClient:
             
             print(f"✅ Config file found: {self.config_path.absolute()}")
             
-            # Prepare command
-            cmd = [
-                "npx", "@playwright/mcp@latest",
+            # Prepare command (resolved once, no shell, pinned package version)
+            cmd = self._server_command() + [
                 "--config", str(self.config_path.absolute()),
                 "--port", str(port)
             ]
@@ -53,57 +164,225 @@ class PlaywrightMCPClient:
             print(f"🌐 Port: {port}")
             print(f"👁️ Headless: {headless}")
             
-            # Start process với shell=True cho Windows
-            self.process = subprocess.Popen(
-                cmd,
-                shell=True,  # Key fix for Windows PATH issues
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+            self._ready_line = asyncio.Event()
+            self.process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=self.STREAM_LIMIT
             )
+            self._drain_tasks = [
+                asyncio.create_task(self._drain(self.process.stdout, "stdout", port)),
+                asyncio.create_task(self._drain(self.process.stderr, "stderr", port))
+            ]
             
-            # Wait for server to start
-            print("⏳ Waiting for server to start...")
-            await asyncio.sleep(8)  # Give more time for startup
+            # Wait until the server answers on its port (or dies, or the deadline passes)
+            print("⏳ Waiting for server to become ready...")
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            ready = await self._wait_until_ready(port, started + self.STARTUP_TIMEOUT)
             
-            # Check if process is still running
-            if self.process.poll() is None:
+            if ready:
                 self.is_running = True
-                logger.info(f"MCP Server started successfully on port {port}")
-                print(f"✅ MCP Server started successfully!")
+                self.port = port
+                elapsed = loop.time() - started
+                logger.info(f"MCP Server ready on port {port} after {elapsed:.2f}s")
+                print(f"✅ MCP Server started successfully in {elapsed:.2f}s!")
                 print(f"🌐 Server running on port {port}")
                 return True
-            else:
-                # Process exited, get error
-                stdout, stderr = self.process.communicate()
-                logger.error(f"MCP Server failed to start. Stdout: {stdout}, Stderr: {stderr}")
-                print(f"❌ MCP Server failed to start")
-                if stdout:
-                    print(f"📤 Stdout: {stdout}")
-                if stderr:
-                    print(f"📥 Stderr: {stderr}")
-                return False
+            
+            if self.process_alive:
+                logger.error(f"MCP Server did not become ready within {self.STARTUP_TIMEOUT}s, killing it")
+                print(f"❌ MCP Server not ready after {self.STARTUP_TIMEOUT}s")
+                self.process.kill()
+            await self._wait_for_exit()
+            
+            output = "\n".join(entry["line"] for entry in list(self.logs)[-20:])
+            logger.error(f"MCP Server failed to start (exit code {self.process.returncode}). Output:\n{output}")
+            print(f"❌ MCP Server failed to start")
+            if output:
+                print(f"📥 Output:\n{output}")
+            return False
                 
         except Exception as e:
             logger.error(f"Error starting MCP server: {e}")
             print(f"❌ Error starting MCP server: {e}")
             return False
     
+    def _server_command(self) -> List[str]:
+        """Command that launches the pinned MCP server (resolved once per process)"""
+        if PlaywrightMCPClient._resolved_command is None:
+            PlaywrightMCPClient._resolved_command = resolve_server_command()
+            logger.info(f"MCP server command: {' '.join(PlaywrightMCPClient._resolved_command)}")
+        return PlaywrightMCPClient._resolved_command
+    
+    @property
+    def process_alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+    
+    async def _drain(self, stream: asyncio.StreamReader, name: str, port: int):
+        """Forward one output stream into the ring buffer and the log
+
+        Reads chunks and splits lines itself: ``readline()`` raises on a line
+        longer than the stream limit, and a drain task that dies leaves the
+        server blocked on a full pipe. Over-long lines are truncated.
+        """
+        line = bytearray()
+        truncated = False
+        while True:
+            chunk = await stream.read(self.READ_CHUNK_BYTES)
+            if not chunk:
+                if line:
+                    self._log_line(bytes(line), truncated, name, port)
+                break
+            
+            *complete, rest = chunk.split(b"\n")
+            for piece in complete:
+                if not truncated:
+                    line += piece
+                self._log_line(bytes(line[:self.MAX_LINE_BYTES]), truncated or len(line) > self.MAX_LINE_BYTES,
+                               name, port)
+                line.clear()
+                truncated = False
+            
+            if not truncated:
+                line += rest
+                if len(line) > self.MAX_LINE_BYTES:
+                    # Keep the start of the line, drop the rest up to its newline
+                    del line[self.MAX_LINE_BYTES:]
+                    truncated = True
+    
+    def _log_line(self, raw: bytes, truncated: bool, name: str, port: int):
+        line = raw.decode("utf-8", errors="replace").rstrip()
+        if not line:
+            return
+        if truncated:
+            line += " …[truncated]"
+        
+        self.logs.append({"timestamp": datetime.now().isoformat(), "stream": name, "line": line})
+        logger.log(logging.WARNING if name == "stderr" else logging.INFO, f"[mcp:{port}] {line}")
+        
+        if self._ready_line is not None and READY_LINE.search(line):
+            self._ready_line.set()
+    
+    async def _wait_for_exit(self, timeout: float = None):
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout or self.STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+        # Pipes reach EOF once the process is gone
+        await asyncio.gather(*self._drain_tasks, return_exceptions=True)
+        self._drain_tasks = []
+    
+    def get_recent_logs(self, limit: int = 50) -> List[Dict[str, str]]:
+        return list(self.logs)[-limit:]
+    
+    async def _wait_until_ready(self, port: int, deadline: float) -> bool:
+        """Poll the port, then confirm with an MCP ping, until ``deadline`` (loop time)
+
+        The server's ready line on stdout wakes the poll up immediately.
+        """
+        loop = asyncio.get_running_loop()
+        delay = 0.05
+        
+        while loop.time() < deadline:
+            if not self.process_alive:
+                return False
+            
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(self.host, port), timeout=1)
+                writer.close()
+                await writer.wait_closed()
+                if await self.ping(port, timeout=max(0.5, deadline - loop.time())):
+                    return True
+            except (OSError, asyncio.TimeoutError):
+                pass
+            
+            try:
+                await asyncio.wait_for(self._ready_line.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, 0.5)
+        
+        return False
+    
+    async def ping(self, port: int = None, timeout: float = 5) -> bool:
+        """Protocol-level health check: initialize an MCP session, send ``ping``, close it"""
+        port = port or self.port
+        if port is None:
+            return False
+        
+        url = f"http://{self.host}:{port}/mcp"
+        headers = {"Accept": "application/json, text/event-stream"}
+        
+        try:
+            async with httpx.AsyncClient(timeout=timeout) as http:
+                response = await http.post(url, headers=headers, json={
+                    "jsonrpc": "2.0", "id": 1, "method": "initialize",
+                    "params": {
+                        "protocolVersion": MCP_PROTOCOL_VERSION,
+                        "capabilities": {},
+                        "clientInfo": {"name": "ai-agents-health-check", "version": "1.0.0"}
+                    }
+                })
+                if self._rpc_result(response) is None:
+                    return False
+                
+                session_id = response.headers.get("mcp-session-id")
+                if session_id:
+                    headers["mcp-session-id"] = session_id
+                
+                await http.post(url, headers=headers, json={"jsonrpc": "2.0", "method": "notifications/initialized"})
+                response = await http.post(url, headers=headers, json={"jsonrpc": "2.0", "id": 2, "method": "ping"})
+                healthy = self._rpc_result(response) is not None
+                
+                if session_id:
+                    await http.delete(url, headers=headers)
+                return healthy
+            
+        except httpx.HTTPError as e:
+            logger.debug(f"MCP ping on port {port} failed: {e}")
+            return False
+    
+    @staticmethod
+    def _rpc_result(response: httpx.Response) -> Optional[Dict[str, Any]]:
+        """JSON-RPC result from a plain JSON or SSE-framed response"""
+        if response.status_code != 200:
+            return None
+        
+        if response.headers.get("content-type", "").startswith("text/event-stream"):
+            payloads = [line[5:].strip() for line in response.text.splitlines() if line.startswith("data:")]
+        else:
+            payloads = [response.text]
+        
+        for payload in payloads:
+            try:
+                message = json.loads(payload)
+            except ValueError:
+                continue
+            if "result" in message:
+                return message["result"]
+        return None
+    
     async def stop_server(self):
         """Stop MCP server"""
         if self.process and self.is_running:
             print("🛑 Stopping MCP Server...")
-            self.process.terminate()
-            await asyncio.sleep(2)
-            if self.process.poll() is None:
-                self.process.kill()
+            if self.process_alive:
+                self.process.terminate()
+            
+            # Wait only as long as the process needs to exit
+            await self._wait_for_exit()
+            
             self.is_running = False
             logger.info("MCP Server stopped")
             print("✅ MCP Server stopped")
     
     async def health_check(self) -> bool:
-        """Check if MCP server is healthy"""
-        is_healthy = self.is_running and (self.process.poll() is None)
+        """Check if MCP server is healthy (answers an MCP ping)"""
+        is_healthy = self.is_running and self.process_alive and await self.ping()
         
         if is_healthy:
             print("🏥 Health check: ✅ Healthy")
@@ -118,7 +397,6 @@ class PlaywrightMCPClient:
         
         if self.is_running:
             await self.stop_server()
-            await asyncio.sleep(2)
         
         return await self.start_server(port, headless)
     
@@ -126,9 +404,10 @@ class PlaywrightMCPClient:
         """Get server information"""
         return {
             "is_running": self.is_running,
+            "port": self.port,
             "config_path": str(self.config_path.absolute()),
             "process_id": self.process.pid if self.process else None,
-            "process_running": self.process.poll() is None if self.process else False
+            "process_running": self.process_alive
         }
 
 # Enhanced test function
@@ -195,8 +474,14 @@ async def quick_mcp_test(port: int = 3001):
         return False
 
 if __name__ == "__main__":
+    import sys
+    
     # Set up basic logging
     logging.basicConfig(level=logging.INFO)
     
+    if "--bootstrap" in sys.argv:
+        # One-time pinned install: python -m backend.automation.mcp_client --bootstrap
+        sys.exit(0 if asyncio.run(bootstrap_server()) else 1)
+    
     # Run main test
     asyncio.run(test_mcp_client())
\ No newline at end of file
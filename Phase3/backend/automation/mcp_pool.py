@@ -0,0 +1,250 @@
+# backend/automation/mcp_pool.py
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+from contextlib import asynccontextmanager
+
+from .mcp_client import PlaywrightMCPClient
+from ..utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+class MCPInstance:
+    """Một MCP server process trong pool, chạy trên port riêng"""
+
+    def __init__(self, index: int, port: int, client: PlaywrightMCPClient):
+        self.index = index
+        self.port = port
+        self.client = client
+        self.active_sessions = 0
+        self.total_sessions = 0
+        self.restarts = 0
+        self.failed_checks = 0
+        # Bumped on every restart so sessions of the old process are not released twice
+        self.generation = 0
+        self.started_at: Optional[datetime] = None
+        self.last_check: Optional[datetime] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.client.host}:{self.port}/mcp"
+
+    @property
+    def is_running(self) -> bool:
+        return self.client.is_running and self.client.process_alive
+
+class MCPSession:
+    """Session được cấp cho một agent trên một MCP instance"""
+
+    def __init__(self, instance: MCPInstance):
+        self.instance = instance
+        self.generation = instance.generation
+        self.url = instance.url
+        self.port = instance.port
+        self.acquired_at = datetime.now()
+
+class MCPServerPool:
+    """Quản lý K Playwright MCP server instances trên một dải port
+
+    Sessions go to the running instance with the fewest active sessions,
+    up to ``max_sessions_per_instance`` each; callers wait when every
+    instance is full. A background monitor pings every instance and
+    restarts the ones that crashed or stopped answering.
+    """
+
+    def __init__(self,
+                 instances: int = None,
+                 base_port: int = None,
+                 max_sessions_per_instance: int = None,
+                 health_interval: float = None,
+                 headless: bool = True,
+                 config_path: str = None):
+        count = Config.MCP_INSTANCES if instances is None else instances
+        if count < 1:
+            # The status routes and the shared session slots assume at least one instance
+            raise ValueError(f"MCP pool needs at least one instance, got {count} (MCP_INSTANCES)")
+        self.base_port = base_port or Config.MCP_BASE_PORT
+        self.max_sessions_per_instance = max_sessions_per_instance or Config.MCP_MAX_SESSIONS_PER_INSTANCE
+        self.health_interval = health_interval or Config.MCP_HEALTH_INTERVAL
+        self.headless = headless
+
+        self.instances: List[MCPInstance] = [
+            MCPInstance(index, self.base_port + index, PlaywrightMCPClient(config_path))
+            for index in range(count)
+        ]
+
+        self._available = asyncio.Condition()
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.is_running = False
+
+    async def start(self) -> bool:
+        """Start every instance concurrently; True if at least one is ready"""
+        async with self._lock:
+            results = await asyncio.gather(*[self._start_instance(instance) for instance in self.instances])
+            self.is_running = any(results)
+
+            if self._monitor_task is None:
+                self._monitor_task = asyncio.create_task(self._monitor())
+
+            logger.info(f"MCP pool started: {sum(results)}/{len(self.instances)} instances ready "
+                        f"on ports {self.base_port}-{self.base_port + len(self.instances) - 1}")
+            return self.is_running
+
+    async def stop(self):
+        """Stop the monitor and every instance"""
+        async with self._lock:
+            if self._monitor_task is not None:
+                self._monitor_task.cancel()
+                try:
+                    await self._monitor_task
+                except asyncio.CancelledError:
+                    pass
+                self._monitor_task = None
+
+            await asyncio.gather(*[instance.client.stop_server() for instance in self.instances],
+                                 return_exceptions=True)
+            self.is_running = False
+            logger.info("MCP pool stopped")
+
+    async def restart(self) -> bool:
+        await self.stop()
+        return await self.start()
+
+    async def _start_instance(self, instance: MCPInstance) -> bool:
+        try:
+            ready = await instance.client.start_server(port=instance.port, headless=self.headless)
+        except Exception as e:
+            logger.error(f"MCP instance {instance.index} failed to start: {e}")
+            ready = False
+
+        if ready:
+            instance.started_at = datetime.now()
+            instance.failed_checks = 0
+        return ready
+
+    async def _restart_instance(self, instance: MCPInstance):
+        logger.warning(f"Restarting MCP instance {instance.index} on port {instance.port}")
+        instance.generation += 1
+        instance.active_sessions = 0
+        instance.restarts += 1
+
+        await instance.client.stop_server()
+        await self._start_instance(instance)
+
+        async with self._available:
+            self._available.notify_all()
+
+    async def _monitor(self):
+        """Ping every instance periodically, restart crashed or unresponsive ones"""
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await asyncio.gather(*[self._check_instance(instance) for instance in self.instances],
+                                 return_exceptions=True)
+
+    async def _check_instance(self, instance: MCPInstance):
+        instance.last_check = datetime.now()
+        crashed = not instance.is_running
+
+        if not crashed and await instance.client.ping(instance.port):
+            instance.failed_checks = 0
+            return
+
+        instance.failed_checks += 1
+        # A crashed process restarts at once; a live but silent one gets a second chance
+        if crashed or instance.failed_checks >= 2:
+            await self._restart_instance(instance)
+
+    async def acquire(self, required: bool = True) -> Optional[MCPSession]:
+        """Lease a session slot on the least loaded running instance
+
+        With no instance running this raises, or returns None when the
+        caller can also work without MCP (``required=False``).
+        """
+        async with self._available:
+            while True:
+                candidates = [
+                    instance for instance in self.instances
+                    if instance.is_running and instance.active_sessions < self.max_sessions_per_instance
+                ]
+                if candidates:
+                    instance = min(candidates, key=lambda i: (i.active_sessions, i.total_sessions))
+                    instance.active_sessions += 1
+                    instance.total_sessions += 1
+                    return MCPSession(instance)
+
+                if not any(instance.is_running for instance in self.instances):
+                    if not required:
+                        return None
+                    raise RuntimeError("No MCP server instance is running")
+                await self._available.wait()
+
+    async def release(self, session: MCPSession):
+        async with self._available:
+            if session.generation == session.instance.generation:
+                session.instance.active_sessions -= 1
+            self._available.notify_all()
+
+    @asynccontextmanager
+    async def session(self, required: bool = True):
+        """``async with pool.session() as session: ... session.url ...`` (None: no MCP, see acquire)"""
+        session = await self.acquire(required)
+        try:
+            yield session
+        finally:
+            if session is not None:
+                await self.release(session)
+
+    async def health_check(self) -> Dict[str, Any]:
+        """Ping every instance now"""
+        results = await asyncio.gather(*[
+            instance.client.ping(instance.port) if instance.is_running else asyncio.sleep(0, result=False)
+            for instance in self.instances
+        ])
+        healthy = sum(1 for result in results if result)
+        return {
+            "healthy": healthy,
+            "total": len(self.instances),
+            "status": "healthy" if healthy == len(self.instances) else ("degraded" if healthy else "unhealthy")
+        }
+
+    def get_recent_logs(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Latest server output lines across all instances, oldest first"""
+        lines = [
+            {**entry, "port": instance.port}
+            for instance in self.instances
+            for entry in instance.client.get_recent_logs(limit)
+        ]
+        return sorted(lines, key=lambda entry: entry["timestamp"])[-limit:]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "is_running": self.is_running,
+            "max_sessions_per_instance": self.max_sessions_per_instance,
+            "instances": [
+                {
+                    "index": instance.index,
+                    "port": instance.port,
+                    "url": instance.url,
+                    "running": instance.is_running,
+                    "process_id": instance.client.process.pid if instance.client.process else None,
+                    "active_sessions": instance.active_sessions,
+                    "total_sessions": instance.total_sessions,
+                    "restarts": instance.restarts,
+                    "failed_checks": instance.failed_checks,
+                    "started_at": instance.started_at.isoformat() if instance.started_at else None,
+                    "last_check": instance.last_check.isoformat() if instance.last_check else None
+                }
+                for instance in self.instances
+            ]
+        }
+
+_pool: Optional[MCPServerPool] = None
+
+def get_mcp_server_pool() -> MCPServerPool:
+    """Process-wide pool (API, AgentManager and browser controllers share its ports), created on first use"""
+    global _pool
+    if _pool is None:
+        _pool = MCPServerPool()
+    return _pool
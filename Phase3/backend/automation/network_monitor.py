@@ -0,0 +1,146 @@
+# backend/automation/network_monitor.py
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Set
+from urllib.parse import urlsplit
+
+from playwright.async_api import BrowserContext, Request, Route
+
+logger = logging.getLogger(__name__)
+
+# Resource types aborted by each blocking profile ("third_party" is handled by host)
+BLOCKING_PROFILES: Dict[str, Set[str]] = {
+    "no_third_party": set(),
+    "no_media": {"image", "media"},
+    "no_fonts": {"font"},
+}
+
+def site_of(host: str) -> str:
+    """Approximate registrable domain: the last two labels of the host"""
+    host = host.split(":")[0]
+    labels = host.split(".")
+    if len(labels) <= 2 or host.replace(".", "").isdigit():
+        return host
+    return ".".join(labels[-2:])
+
+def validate_block_profiles(block_profiles: Optional[List[str]]) -> List[str]:
+    """Profile names, or ValueError naming the unknown ones (checked when a task is submitted)"""
+    unknown = set(block_profiles or []) - set(BLOCKING_PROFILES)
+    if unknown:
+        raise ValueError(f"Unknown blocking profile(s): {', '.join(sorted(unknown))}")
+    return list(block_profiles or [])
+
+class NetworkMonitor:
+    """Theo dõi network của một browser context: blocking profiles và request summary
+
+    Attach it to a context before the agent starts. Requests matching a
+    blocking profile are aborted; every finished request is recorded for
+    the summary (bytes, counts, slowest requests, cache-hit ratio). HAR
+    capture itself is a context option (``record_har_path``), see
+    ``har_context_options``.
+    """
+
+    def __init__(self, block_profiles: Optional[List[str]] = None, first_party: Optional[str] = None):
+        self.block_profiles = validate_block_profiles(block_profiles)
+        self.blocked_types: Set[str] = set().union(*(BLOCKING_PROFILES[p] for p in self.block_profiles))
+        self.block_third_party = "no_third_party" in self.block_profiles
+        # Site of the page under test; taken from the first main-frame navigation when unknown
+        self.first_party = site_of(first_party) if first_party else None
+
+        self.records: List[Dict[str, Any]] = []
+        self.failed = 0
+        self.blocked = 0
+        self._pending: Set[asyncio.Task] = set()
+        self._blocked_requests: Set[Request] = set()
+
+    @staticmethod
+    def har_context_options(har_path: str) -> Dict[str, Any]:
+        """Context options that make Playwright write a HAR file when the context closes"""
+        return {"record_har_path": har_path, "record_har_content": "omit"}
+
+    async def attach(self, context: BrowserContext):
+        if self.block_profiles:
+            await context.route("**/*", self._route)
+        context.on("request", self._on_request)
+        context.on("requestfinished", self._on_finished)
+        context.on("requestfailed", self._on_failed)
+
+    def _is_third_party(self, request: Request) -> bool:
+        host = urlsplit(request.url).netloc
+        return bool(self.first_party and host and site_of(host) != self.first_party)
+
+    async def _route(self, route: Route):
+        request = route.request
+        if request.resource_type in self.blocked_types or (self.block_third_party and self._is_third_party(request)):
+            self.blocked += 1
+            self._blocked_requests.add(request)
+            await route.abort("blockedbyclient")
+        else:
+            await route.continue_()
+
+    def _on_request(self, request: Request):
+        if self.first_party is None and request.is_navigation_request() and request.frame.parent_frame is None:
+            self.first_party = site_of(urlsplit(request.url).netloc)
+
+    def _on_failed(self, request: Request):
+        # Requests we blocked ourselves are counted separately
+        if request in self._blocked_requests:
+            self._blocked_requests.discard(request)
+            return
+        self.failed += 1
+
+    def _on_finished(self, request: Request):
+        task = asyncio.create_task(self._record(request))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _record(self, request: Request):
+        try:
+            response = await request.response()
+            sizes = await request.sizes()
+        except Exception as e:
+            logger.debug(f"Could not read sizes of {request.url}: {e}")
+            return
+
+        timing = request.timing
+        status = response.status if response else None
+        # Playwright does not expose HTTP cache state: 304s, service worker responses and
+        # responses that never sent a request (requestStart == -1) count as cache hits
+        cached = bool(response) and (
+            status == 304 or response.from_service_worker
+            or (timing.get("requestStart", 0) < 0 and timing.get("responseEnd", -1) >= 0)
+        )
+
+        self.records.append({
+            "url": request.url,
+            "type": request.resource_type,
+            "status": status,
+            "duration_ms": max(timing.get("responseEnd", -1), 0),
+            "bytes": max(sizes.get("responseHeadersSize", 0), 0) + max(sizes.get("responseBodySize", 0), 0),
+            "cached": cached,
+            "third_party": self._is_third_party(request)
+        })
+
+    async def summary(self, slowest: int = 10) -> Dict[str, Any]:
+        """Totals of everything recorded so far"""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+        by_type: Dict[str, Dict[str, int]] = {}
+        for record in self.records:
+            entry = by_type.setdefault(record["type"], {"requests": 0, "bytes": 0})
+            entry["requests"] += 1
+            entry["bytes"] += record["bytes"]
+
+        total = len(self.records)
+        return {
+            "request_count": total,
+            "failed_requests": self.failed,
+            "blocked_requests": self.blocked,
+            "block_profiles": self.block_profiles,
+            "total_bytes": sum(r["bytes"] for r in self.records),
+            "third_party_requests": sum(1 for r in self.records if r["third_party"]),
+            "cache_hit_ratio": sum(1 for r in self.records if r["cached"]) / total if total else None,
+            "by_type": by_type,
+            "slowest_requests": sorted(self.records, key=lambda r: r["duration_ms"], reverse=True)[:slowest]
+        }
@@ -0,0 +1,222 @@
+# backend/automation/performance_probe.py
+import asyncio
+import logging
+import statistics
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
+from datetime import datetime
+
+from ..utils.stats import percentile
+
+if TYPE_CHECKING:
+    from .browser_pool import BrowserPool
+
+logger = logging.getLogger(__name__)
+
+# Installed before any page script runs so buffered entries are never missed
+OBSERVERS_SCRIPT = """
+window.__perf = {lcp: null, cls: 0, inputDelay: null, longTasks: []};
+const observe = (type, callback, options = {}) => {
+    try {
+        new PerformanceObserver((list) => list.getEntries().forEach(callback))
+            .observe({type, buffered: true, ...options});
+    } catch (e) { /* entry type not supported by this engine */ }
+};
+observe('largest-contentful-paint', (e) => { window.__perf.lcp = e.startTime; });
+observe('layout-shift', (e) => { if (!e.hadRecentInput) window.__perf.cls += e.value; });
+observe('event', (e) => {
+    if (e.interactionId) window.__perf.inputDelay = Math.max(window.__perf.inputDelay || 0, e.duration);
+}, {durationThreshold: 16});
+observe('longtask', (e) => { window.__perf.longTasks.push(e.duration); });
+"""
+
+COLLECT_SCRIPT = """
+() => {
+    const nav = performance.getEntriesByType('navigation')[0];
+    const paint = Object.fromEntries(performance.getEntriesByType('paint').map(p => [p.name, p.startTime]));
+    const resources = performance.getEntriesByType('resource');
+    const perf = window.__perf || {};
+    const memory = performance.memory;
+    return {
+        navigation: nav ? {
+            ttfb: nav.responseStart - nav.startTime,
+            dns: nav.domainLookupEnd - nav.domainLookupStart,
+            connect: nav.connectEnd - nav.connectStart,
+            dom_content_loaded: nav.domContentLoadedEventEnd - nav.startTime,
+            load: nav.loadEventEnd - nav.startTime,
+            transfer_size: nav.transferSize || 0
+        } : {},
+        fcp: paint['first-contentful-paint'] ?? null,
+        lcp: perf.lcp,
+        cls: perf.cls || 0,
+        input_delay: perf.inputDelay,
+        long_tasks: (perf.longTasks || []).length,
+        total_blocking_time: (perf.longTasks || []).reduce((sum, d) => sum + Math.max(0, d - 50), 0),
+        js_heap_used: memory ? memory.usedJSHeapSize : null,
+        resources: resources.map(r => ({
+            name: r.name,
+            type: r.initiatorType,
+            duration: r.duration,
+            transfer_size: r.transferSize || 0,
+            cached: r.transferSize === 0 && r.decodedBodySize > 0
+        }))
+    };
+}
+"""
+
+# Core Web Vitals "good" thresholds (milliseconds, CLS unitless). INP is a field metric over
+# real user interactions and is not measured here, see synthetic_input_delay_ms instead
+DEFAULT_BUDGETS = {
+    "lcp_ms": 2500,
+    "cls": 0.1,
+    "ttfb_ms": 800,
+    "total_blocking_time_ms": 200
+}
+
+def summarize_runs(runs: List[Dict[str, Any]]) -> Dict[str, Dict[str, Optional[float]]]:
+    """Median/p95/min/max of every numeric metric across runs (missing values skipped)"""
+    keys = sorted({key for run in runs for key, value in run.items() if isinstance(value, (int, float))})
+    summary = {}
+    for key in keys:
+        values = [run[key] for run in runs if isinstance(run.get(key), (int, float))]
+        summary[key] = {
+            "median": statistics.median(values),
+            "p95": percentile(values, 95),
+            "min": min(values),
+            "max": max(values),
+            "samples": len(values)
+        }
+    return summary
+
+def check_budgets(summary: Dict[str, Dict[str, Optional[float]]],
+                  budgets: Dict[str, float]) -> List[Dict[str, Any]]:
+    """Compare the median of each budgeted metric with its limit"""
+    assertions = []
+    for metric, limit in budgets.items():
+        if metric not in summary:
+            continue
+        median = summary[metric]["median"]
+        assertions.append({
+            "assertion": f"{metric} <= {limit}",
+            "actual": median,
+            "passed": median <= limit
+        })
+    return assertions
+
+class PerformanceProbe:
+    """Đo performance thật qua Playwright: Navigation/Resource Timing và Web Vitals
+
+    Each run loads the URL in a fresh pooled context (cold cache), so runs
+    are sequential to keep them from competing for CPU and network.
+    """
+
+    def __init__(self,
+                 browser_pool: "BrowserPool",
+                 runs: int = 5,
+                 budgets: Optional[Dict[str, float]] = None,
+                 timeout: int = 30):
+        self.browser_pool = browser_pool
+        self.runs = max(1, runs)
+        self.budgets = DEFAULT_BUDGETS if budgets is None else budgets
+        self.timeout = timeout
+
+    async def measure(self, url: str, runs: Optional[int] = None, browser: str = "chromium") -> Dict[str, Any]:
+        """Load the URL ``runs`` times and report median/p95 of every metric"""
+        runs = max(1, runs or self.runs)
+        start_time = datetime.now()
+
+        samples: List[Dict[str, Any]] = []
+        errors: List[str] = []
+        for index in range(runs):
+            try:
+                samples.append(await self._run_once(url, browser))
+            except Exception as e:
+                logger.warning(f"Performance run {index + 1}/{runs} for {url} failed: {e}")
+                errors.append(str(e))
+
+        execution_time = (datetime.now() - start_time).total_seconds()
+        if not samples:
+            return {
+                "status": "error",
+                "error": f"All {runs} performance runs failed: {errors[-1] if errors else 'unknown'}",
+                "url": url,
+                "execution_time": execution_time,
+                "timestamp": start_time.isoformat(),
+                "agent_type": "performance_test"
+            }
+
+        summary = summarize_runs([sample["metrics"] for sample in samples])
+        assertions = check_budgets(summary, self.budgets)
+
+        return {
+            "status": "success",
+            "result": {
+                "performance_metrics": {
+                    "url": url,
+                    "browser": browser,
+                    "runs": len(samples),
+                    "failed_runs": len(errors),
+                    "summary": summary,
+                    "samples": [sample["metrics"] for sample in samples],
+                    "slowest_resources": samples[-1]["slowest_resources"]
+                },
+                "assertions_checked": assertions,
+                "budgets_passed": all(a["passed"] for a in assertions)
+            },
+            "url": url,
+            "execution_time": execution_time,
+            "timestamp": start_time.isoformat(),
+            "agent_type": "performance_test"
+        }
+
+    async def _run_once(self, url: str, browser: str) -> Dict[str, Any]:
+        async with self.browser_pool.lease(browser) as lease:
+            page = lease.page
+            counters = {"requests": 0, "failed": 0}
+            page.on("request", lambda request: counters.__setitem__("requests", counters["requests"] + 1))
+            page.on("requestfailed", lambda request: counters.__setitem__("failed", counters["failed"] + 1))
+
+            await page.add_init_script(OBSERVERS_SCRIPT)
+            await page.goto(url, wait_until="load", timeout=self.timeout * 1000)
+            try:
+                await page.wait_for_load_state("networkidle", timeout=self.timeout * 1000)
+            except Exception:
+                logger.debug(f"{url} never reached network idle, collecting anyway")
+
+            # One synthetic key press on the idle page: a lab input delay, not the field INP
+            await page.keyboard.press("Shift")
+            await asyncio.sleep(0.1)
+
+            raw = await page.evaluate(COLLECT_SCRIPT)
+
+        navigation = raw["navigation"]
+        resources = raw["resources"]
+        cached = sum(1 for r in resources if r["cached"])
+
+        metrics = {
+            "ttfb_ms": navigation.get("ttfb"),
+            "dns_ms": navigation.get("dns"),
+            "connect_ms": navigation.get("connect"),
+            "dom_content_loaded_ms": navigation.get("dom_content_loaded"),
+            "load_ms": navigation.get("load"),
+            "fcp_ms": raw["fcp"],
+            "lcp_ms": raw["lcp"],
+            "cls": raw["cls"],
+            "synthetic_input_delay_ms": raw["input_delay"],
+            "long_tasks": raw["long_tasks"],
+            "total_blocking_time_ms": raw["total_blocking_time"],
+            "js_heap_used_mb": raw["js_heap_used"] / (1024 * 1024) if raw["js_heap_used"] else None,
+            "request_count": counters["requests"],
+            "failed_requests": counters["failed"],
+            "transfer_kb": (navigation.get("transfer_size", 0)
+                            + sum(r["transfer_size"] for r in resources)) / 1024,
+            "cache_hit_ratio": cached / len(resources) if resources else None
+        }
+
+        slowest = sorted(resources, key=lambda r: r["duration"], reverse=True)[:10]
+        return {
+            "metrics": metrics,
+            "slowest_resources": [
+                {"url": r["name"], "type": r["type"], "duration_ms": r["duration"], "transfer_size": r["transfer_size"]}
+                for r in slowest
+            ]
+        }
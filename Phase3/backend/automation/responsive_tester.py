@@ -0,0 +1,301 @@
+# backend/automation/responsive_tester.py
+import io
+import re
+import json
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
+from datetime import datetime
+from pathlib import Path
+
+from PIL import Image
+
+if TYPE_CHECKING:
+    from .browser_pool import BrowserPool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VIEWPORTS = [
+    {"width": 1920, "height": 1080, "name": "Desktop Large"},
+    {"width": 1366, "height": 768, "name": "Desktop Medium"},
+    {"width": 768, "height": 1024, "name": "Tablet"},
+    {"width": 375, "height": 667, "name": "Mobile"}
+]
+
+# Records layout shifts from the very first paint
+LAYOUT_SHIFT_OBSERVER = """
+window.__layoutShifts = [];
+new PerformanceObserver((list) => {
+    for (const entry of list.getEntries()) {
+        if (!entry.hadRecentInput) window.__layoutShifts.push(entry.value);
+    }
+}).observe({type: 'layout-shift', buffered: true});
+"""
+
+LAYOUT_METRICS_SCRIPT = """
+() => {
+    const viewportWidth = document.documentElement.clientWidth;
+    const overflowing = [];
+    for (const el of document.querySelectorAll('body *')) {
+        const rect = el.getBoundingClientRect();
+        if (rect.width === 0 || rect.height === 0) continue;
+        if (rect.right > viewportWidth + 1 || rect.left < -1) {
+            const id = el.id ? '#' + el.id : '';
+            const cls = typeof el.className === 'string' && el.className.trim()
+                ? '.' + el.className.trim().split(/\\s+/).slice(0, 2).join('.') : '';
+            overflowing.push({selector: el.tagName.toLowerCase() + id + cls,
+                              left: Math.round(rect.left), right: Math.round(rect.right)});
+            if (overflowing.length >= 20) break;
+        }
+    }
+    return {
+        scroll_width: document.documentElement.scrollWidth,
+        viewport_width: viewportWidth,
+        page_height: document.documentElement.scrollHeight,
+        horizontal_overflow: document.documentElement.scrollWidth > viewportWidth,
+        overflowing_elements: overflowing,
+        cumulative_layout_shift: (window.__layoutShifts || []).reduce((a, b) => a + b, 0)
+    };
+}
+"""
+
+# Perceptual hash grid: the screenshot is split into GRID x GRID tiles, one dHash each
+GRID = 4
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """Difference hash: 128-bit fingerprint (horizontal + vertical gradients)
+
+    Robust to small rendering noise; both directions are used so that
+    horizontal bands (rows of text, nav bars) changing are still detected.
+    """
+    gray = image.convert("L")
+    value = 0
+
+    pixels = gray.resize((hash_size + 1, hash_size), Image.BILINEAR).tobytes()
+    for row in range(hash_size):
+        for col in range(hash_size):
+            index = row * (hash_size + 1) + col
+            value = (value << 1) | (1 if pixels[index] > pixels[index + 1] else 0)
+
+    pixels = gray.resize((hash_size, hash_size + 1), Image.BILINEAR).tobytes()
+    for row in range(hash_size):
+        for col in range(hash_size):
+            index = row * hash_size + col
+            value = (value << 1) | (1 if pixels[index] > pixels[index + hash_size] else 0)
+
+    return value
+
+def tile_hashes(png_bytes: bytes, height: Optional[int] = None) -> List[int]:
+    """dHash for each tile of the screenshot (row-major)
+
+    ``height`` lays the grid over the top ``height`` pixels only, so two
+    full-page screenshots of different length are compared over the same area.
+    """
+    image = Image.open(io.BytesIO(png_bytes))
+    width = image.width
+    height = min(height or image.height, image.height)
+    hashes = []
+    for row in range(GRID):
+        for col in range(GRID):
+            box = (col * width // GRID, row * height // GRID,
+                   (col + 1) * width // GRID, (row + 1) * height // GRID)
+            hashes.append(dhash(image.crop(box)))
+    return hashes
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+class ResponsiveTester:
+    """Responsive testing thật: một browser context cho mỗi viewport, chạy song song
+
+    Layout checks (horizontal overflow, CLS) are computed in the page and
+    screenshots are compared with stored baselines using per-tile
+    perceptual hashes. The LLM is only asked to describe regressions.
+    """
+
+    def __init__(self,
+                 browser_pool: "BrowserPool",
+                 screenshots_dir: str = "screenshots",
+                 baselines_dir: str = "screenshots/baselines",
+                 tile_threshold: int = 16,
+                 cls_threshold: float = 0.1,
+                 llm=None):
+        self.browser_pool = browser_pool
+        self.screenshots_dir = Path(screenshots_dir)
+        self.baselines_dir = Path(baselines_dir)
+        self.screenshots_dir.mkdir(parents=True, exist_ok=True)
+        self.baselines_dir.mkdir(parents=True, exist_ok=True)
+        self.tile_threshold = tile_threshold
+        self.cls_threshold = cls_threshold
+        self.llm = llm
+
+    async def run(self,
+                  url: str,
+                  viewports: List[Dict] = None,
+                  browser: str = "chromium",
+                  update_baselines: bool = False) -> Dict[str, Any]:
+        """Check every viewport concurrently and compare with baselines"""
+        viewports = viewports or DEFAULT_VIEWPORTS
+        start_time = datetime.now()
+
+        results = await asyncio.gather(*[
+            self._check_viewport(url, viewport, browser, update_baselines)
+            for viewport in viewports
+        ])
+
+        regressions = [r for r in results if r.get("regressions")]
+        description = None
+        if regressions and self.llm is not None:
+            description = await self._describe_regressions(url, regressions)
+
+        failed = [r for r in results if r["status"] == "error"]
+        if failed:
+            status = "error"
+        else:
+            status = "regression" if regressions else "success"
+
+        result = {
+            "status": status,
+            "url": url,
+            "viewport_results": results,
+            "regressions_found": len(regressions),
+            "regression_description": description,
+            "execution_time": (datetime.now() - start_time).total_seconds(),
+            "timestamp": start_time.isoformat()
+        }
+        # Callers report result["error"] for every status other than "success"
+        if failed:
+            result["error"] = "; ".join(f"{r['viewport']}: {r['error']}" for r in failed)
+        elif regressions:
+            result["error"] = f"Regressions in {len(regressions)} viewport(s): " + "; ".join(
+                f"{r['viewport']}: {', '.join(r['regressions'])}" for r in regressions
+            )
+        return result
+
+    async def _check_viewport(self, url: str, viewport: Dict, browser: str,
+                              update_baselines: bool) -> Dict[str, Any]:
+        name = viewport.get("name", f"{viewport['width']}x{viewport['height']}")
+        result: Dict[str, Any] = {"viewport": name, "width": viewport["width"], "height": viewport["height"]}
+
+        try:
+            async with self.browser_pool.lease(
+                browser,
+                viewport={"width": viewport["width"], "height": viewport["height"]}
+            ) as lease:
+                page = lease.page
+                await page.add_init_script(LAYOUT_SHIFT_OBSERVER)
+                await page.goto(url, wait_until="load")
+                await page.wait_for_load_state("networkidle")
+                metrics = await page.evaluate(LAYOUT_METRICS_SCRIPT)
+                png_bytes = await page.screenshot(full_page=True)
+        except Exception as e:
+            logger.error(f"Responsive check failed for {name}: {e}")
+            result.update({"status": "error", "error": str(e)})
+            return result
+
+        slug = self._slug(url)
+        screenshot_path = self.screenshots_dir / f"responsive_{slug}_{self._slug(name)}.png"
+        await asyncio.to_thread(screenshot_path.write_bytes, png_bytes)
+
+        hashes = await asyncio.to_thread(tile_hashes, png_bytes)
+        comparison = await asyncio.to_thread(self._compare_with_baseline, slug, name, png_bytes,
+                                             hashes, metrics, update_baselines)
+
+        regressions = []
+        if metrics["horizontal_overflow"]:
+            regressions.append(f"Horizontal overflow: content is {metrics['scroll_width']}px wide "
+                               f"in a {metrics['viewport_width']}px viewport")
+        if metrics["cumulative_layout_shift"] > self.cls_threshold:
+            regressions.append(f"Cumulative layout shift {metrics['cumulative_layout_shift']:.3f} "
+                               f"exceeds {self.cls_threshold}")
+        if comparison.get("height_changed"):
+            regressions.append(f"Page height changed from {comparison['baseline_page_height']}px "
+                               f"to {comparison['page_height']}px vs baseline")
+        if comparison.get("changed_tiles"):
+            compared = (f" (top {comparison['compared_height']}px compared)"
+                        if comparison.get("compared_height") else "")
+            regressions.append(f"Visual change vs baseline in {len(comparison['changed_tiles'])} "
+                               f"of {GRID * GRID} regions{compared}: {comparison['changed_tiles']}")
+
+        result.update({
+            "status": "regression" if regressions else "passed",
+            "screenshot": str(screenshot_path),
+            "layout": metrics,
+            "baseline": comparison,
+            "regressions": regressions
+        })
+        return result
+
+    def _compare_with_baseline(self, slug: str, name: str, png_bytes: bytes, hashes: List[int],
+                               metrics: Dict[str, Any], update_baselines: bool) -> Dict[str, Any]:
+        baseline_dir = self.baselines_dir / slug
+        baseline_dir.mkdir(parents=True, exist_ok=True)
+        meta_path = baseline_dir / f"{self._slug(name)}.json"
+        png_path = baseline_dir / f"{self._slug(name)}.png"
+
+        if update_baselines or not meta_path.exists():
+            png_path.write_bytes(png_bytes)
+            meta_path.write_text(json.dumps({
+                "hashes": [format(h, "032x") for h in hashes],
+                "page_height": metrics["page_height"],
+                "created_at": datetime.now().isoformat()
+            }), encoding="utf-8")
+            return {"status": "baseline_created", "changed_tiles": []}
+
+        baseline = json.loads(meta_path.read_text(encoding="utf-8"))
+        baseline_hashes = [int(h, 16) for h in baseline["hashes"]]
+
+        # A longer or shorter page moves every grid line; compare the common top part instead
+        compared_height = None
+        if png_path.exists():
+            baseline_png = png_path.read_bytes()
+            image_height = Image.open(io.BytesIO(png_bytes)).height
+            baseline_image_height = Image.open(io.BytesIO(baseline_png)).height
+            if image_height != baseline_image_height:
+                compared_height = min(image_height, baseline_image_height)
+                hashes = tile_hashes(png_bytes, compared_height)
+                baseline_hashes = tile_hashes(baseline_png, compared_height)
+
+        distances = [hamming(a, b) for a, b in zip(hashes, baseline_hashes)]
+        changed = [
+            {"row": index // GRID, "col": index % GRID, "distance": distance}
+            for index, distance in enumerate(distances) if distance > self.tile_threshold
+        ]
+
+        return {
+            "status": "changed" if changed else "matched",
+            "max_distance": max(distances) if distances else 0,
+            "changed_tiles": changed,
+            "compared_height": compared_height,
+            "height_changed": baseline.get("page_height") not in (None, metrics["page_height"]),
+            "baseline_page_height": baseline.get("page_height"),
+            "page_height": metrics["page_height"]
+        }
+
+    async def _describe_regressions(self, url: str, regressions: List[Dict[str, Any]]) -> Optional[str]:
+        """Ask the LLM to explain the detected regressions in plain words"""
+        from browser_use.llm.messages import UserMessage
+
+        findings = "\n".join(
+            f"- {r['viewport']} ({r['width']}x{r['height']}): " + "; ".join(r["regressions"])
+            + (f"; overflowing elements: {[e['selector'] for e in r['layout']['overflowing_elements'][:5]]}"
+               if r["layout"]["overflowing_elements"] else "")
+            for r in regressions
+        )
+        prompt = f"""
+        Responsive checks on {url} detected these regressions (rows/cols are regions of a 4x4 grid over the full page):
+        {findings}
+
+        Summarize the likely layout problems for a developer in a few bullet points.
+        """
+
+        try:
+            response = await self.llm.ainvoke([UserMessage(content=prompt)])
+            return response.completion
+        except Exception as e:
+            logger.error(f"Failed to describe responsive regressions: {e}")
+            return None
+
+    @staticmethod
+    def _slug(value: str) -> str:
+        return re.sub(r"[^a-zA-Z0-9]+", "_", value).strip("_").lower()[:80]
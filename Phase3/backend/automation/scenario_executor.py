@@ -0,0 +1,298 @@
+# backend/automation/scenario_executor.py
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urljoin
+
+from playwright.async_api import async_playwright, Page
+
+from .screenshot_store import ScreenshotStore
+from ..scenarios.scenario_builder import ActionType, TestAction, TestScenario
+from ..utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Selectors that mean "the whole page" rather than a specific element
+PAGE_TARGETS = {"", "body", "page", "window", "html"}
+
+class ScenarioExecutionError(Exception):
+    """Raised when a scenario action cannot be completed deterministically"""
+
+    def __init__(self, phase: str, index: int, message: str):
+        super().__init__(message)
+        self.phase = phase
+        self.index = index
+
+class ScenarioExecutor:
+    """Executor chạy TestScenario trực tiếp trên Playwright page, không cần LLM
+
+    Each ``TestAction`` maps to one Playwright call. The LLM agent is only
+    used as a fallback: when a main action fails, the remaining steps are
+    handed to ``fallback_agent`` starting from the current page URL.
+    """
+
+    DEFAULT_ACTION_TIMEOUT = 10  # seconds
+
+    def __init__(self,
+                 fallback_agent=None,
+                 screenshots_dir: str = "screenshots",
+                 headless: bool = None,
+                 browser_type: str = "chromium",
+                 on_step_start: Optional[Callable[[str, int, TestAction], None]] = None):
+        self.fallback_agent = fallback_agent
+        self.screenshots_dir = Path(screenshots_dir)
+        self.screenshots_dir.mkdir(exist_ok=True)
+        self.screenshot_store = ScreenshotStore(screenshots_dir)
+        self.headless = Config.BROWSER_HEADLESS if headless is None else headless
+        self.browser_type = browser_type
+        # Called before each step with (phase, index, action), e.g. to attribute network traffic
+        self.on_step_start = on_step_start
+
+        self._handlers = {
+            ActionType.NAVIGATE: self._navigate,
+            ActionType.CLICK: self._click,
+            ActionType.INPUT: self._input,
+            ActionType.WAIT: self._wait,
+            ActionType.VERIFY: self._verify,
+            ActionType.SCREENSHOT: self._screenshot,
+            ActionType.SCROLL: self._scroll,
+            ActionType.HOVER: self._hover,
+            ActionType.SELECT: self._select,
+        }
+
+    async def run(self, scenario: TestScenario) -> Dict[str, Any]:
+        """Launch a browser, execute the scenario and close the browser"""
+        async with async_playwright() as playwright:
+            browser = await getattr(playwright, self.browser_type).launch(headless=self.headless)
+            try:
+                context = await browser.new_context()
+                page = await context.new_page()
+                return await self.execute(scenario, page)
+            finally:
+                await browser.close()
+
+    async def execute(self,
+                      scenario: TestScenario,
+                      page: Page,
+                      skip_setup: bool = False,
+                      on_setup_complete: Optional[Callable[[Page], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """Execute scenario on an existing page (setup → actions → teardown)
+
+        ``skip_setup`` is used when the page's context was restored from a
+        storage state snapshot taken after an identical setup.
+        """
+        start_time = datetime.now()
+        steps: List[Dict[str, Any]] = []
+        screenshots: List[str] = []
+        fallback_result = None
+        error = None
+
+        try:
+            await asyncio.wait_for(
+                self._run_phases(scenario, page, steps, screenshots, skip_setup, on_setup_complete),
+                timeout=scenario.timeout
+            )
+        except ScenarioExecutionError as e:
+            error = str(e)
+            if self.fallback_agent is not None:
+                fallback_result = await self._run_fallback(scenario, page, e, steps)
+                if fallback_result.get("status") == "success":
+                    error = None
+        except asyncio.TimeoutError:
+            error = f"Scenario timeout after {scenario.timeout} seconds"
+        except Exception as e:
+            error = str(e)
+        finally:
+            # Teardown always runs; its failures are recorded but do not fail the scenario
+            for index, action in enumerate(scenario.teardown_actions or []):
+                try:
+                    await self._run_step(scenario, page, action, "teardown", index, steps, screenshots)
+                except ScenarioExecutionError as e:
+                    logger.warning(f"Teardown step failed for {scenario.id}: {e}")
+
+        execution_time = (datetime.now() - start_time).total_seconds()
+        status = "error" if error else "success"
+
+        logger.info(f"Scenario {scenario.id} finished with status {status} in {execution_time:.2f} seconds")
+
+        result_data = {
+            "status": status,
+            "result": {
+                "actions_performed": steps,
+                "assertions_checked": [step for step in steps if step["type"] == ActionType.VERIFY.value],
+                "screenshots": screenshots,
+                "fallback": fallback_result
+            },
+            "task": f"Execute scenario: {scenario.name}",
+            "scenario_id": scenario.id,
+            "url": scenario.url,
+            "execution_time": execution_time,
+            "timestamp": start_time.isoformat(),
+            "agent_type": "scenario_test"
+        }
+
+        if error:
+            result_data["error"] = error
+
+        return result_data
+
+    async def _run_phases(self, scenario: TestScenario, page: Page,
+                          steps: List[Dict[str, Any]], screenshots: List[str],
+                          skip_setup: bool = False,
+                          on_setup_complete: Optional[Callable[[Page], Awaitable[None]]] = None):
+        setup_actions = [] if skip_setup else (scenario.setup_actions or [])
+        first_action = (setup_actions or scenario.actions or [None])[0]
+
+        # Scenarios that do not start with a NAVIGATE act on the scenario URL
+        if first_action is None or first_action.type != ActionType.NAVIGATE:
+            await page.goto(scenario.url, wait_until="load")
+
+        for index, action in enumerate(setup_actions):
+            await self._run_step(scenario, page, action, "setup", index, steps, screenshots)
+
+        if setup_actions and on_setup_complete is not None:
+            await on_setup_complete(page)
+
+        for index, action in enumerate(scenario.actions):
+            await self._run_step(scenario, page, action, "main", index, steps, screenshots)
+
+    async def _run_step(self, scenario: TestScenario, page: Page, action: TestAction,
+                        phase: str, index: int,
+                        steps: List[Dict[str, Any]], screenshots: List[str]):
+        step = {
+            "phase": phase,
+            "index": index,
+            "type": action.type.value,
+            "target": action.target,
+            "description": action.description,
+            "expected_result": action.expected_result,
+            "status": "passed"
+        }
+        step_start = asyncio.get_running_loop().time()
+        if self.on_step_start is not None:
+            self.on_step_start(phase, index, action)
+
+        try:
+            output = await self._handlers[action.type](scenario, page, action, phase, index)
+            if action.type == ActionType.SCREENSHOT and output:
+                screenshots.append(output)
+        except Exception as e:
+            step["status"] = "failed"
+            step["error"] = str(e)
+            raise ScenarioExecutionError(phase, index, f"{phase} step {index} ({action.type.value} {action.target}) failed: {e}")
+        finally:
+            step["duration"] = asyncio.get_running_loop().time() - step_start
+            steps.append(step)
+
+    async def _run_fallback(self, scenario: TestScenario, page: Page,
+                            failure: ScenarioExecutionError, steps: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Hand the failed step and everything after it to the LLM agent"""
+        if failure.phase == "setup":
+            remaining = (scenario.setup_actions or [])[failure.index:] + scenario.actions
+        else:
+            remaining = scenario.actions[failure.index:]
+
+        task = f"""
+        Navigate to {page.url} and continue the test scenario "{scenario.name}".
+
+        Remaining steps:
+        {chr(10).join(f"- {self._describe_action(action)}" for action in remaining)}
+
+        Report whether each step succeeded and whether expected results were met.
+        """
+
+        logger.info(f"Scenario {scenario.id}: delegating {len(remaining)} step(s) to LLM agent")
+
+        # The agent stops as soon as the scenario's closing VERIFY steps hold on the page
+        expectations = []
+        for action in reversed(remaining):
+            if action.type != ActionType.VERIFY:
+                break
+            expectations.insert(0, action)
+
+        self.fallback_agent.expectations = expectations
+        try:
+            result = await self.fallback_agent.execute_task(task)
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+        finally:
+            self.fallback_agent.expectations = []
+
+        for step in steps:
+            if step["status"] == "failed":
+                step["recovered_by_agent"] = result.get("status") == "success"
+
+        return {
+            "status": result.get("status"),
+            "delegated_steps": len(remaining),
+            "error": result.get("error"),
+            "execution_time": result.get("execution_time")
+        }
+
+    @staticmethod
+    def _describe_action(action: TestAction) -> str:
+        description = action.description or f"{action.type.value} on {action.target}"
+        if action.value is not None:
+            description += f" (value: {action.value})"
+        if action.expected_result:
+            description += f" - expected: {action.expected_result}"
+        return description
+
+    def _timeout_ms(self, action: TestAction) -> float:
+        return (action.timeout or self.DEFAULT_ACTION_TIMEOUT) * 1000
+
+    # Action handlers
+
+    async def _navigate(self, scenario, page: Page, action: TestAction, phase, index):
+        await page.goto(urljoin(scenario.url, action.target), wait_until="load",
+                        timeout=self._timeout_ms(action))
+
+    async def _click(self, scenario, page: Page, action: TestAction, phase, index):
+        await page.locator(action.target).first.click(timeout=self._timeout_ms(action))
+
+    async def _input(self, scenario, page: Page, action: TestAction, phase, index):
+        await page.locator(action.target).first.fill(action.value or "", timeout=self._timeout_ms(action))
+
+    async def _wait(self, scenario, page: Page, action: TestAction, phase, index):
+        # WAIT with a numeric value sleeps for that many seconds, otherwise waits for the selector
+        try:
+            seconds = float(action.value) if action.value is not None else None
+        except ValueError:
+            seconds = None
+
+        if seconds is not None:
+            await asyncio.sleep(seconds)
+        else:
+            await page.locator(action.target).first.wait_for(state="visible", timeout=self._timeout_ms(action))
+
+    async def _verify(self, scenario, page: Page, action: TestAction, phase, index):
+        locator = page.locator(action.target).first
+        await locator.wait_for(state="visible", timeout=self._timeout_ms(action))
+
+        if action.value is not None:
+            text = await locator.inner_text(timeout=self._timeout_ms(action))
+            if action.value not in text:
+                raise AssertionError(f"Expected text '{action.value}' not found in {action.target}")
+
+    async def _screenshot(self, scenario, page: Page, action: TestAction, phase, index) -> str:
+        if action.target.strip().lower() in PAGE_TARGETS:
+            image = await page.screenshot(full_page=True, timeout=self._timeout_ms(action))
+        else:
+            image = await page.locator(action.target).first.screenshot(timeout=self._timeout_ms(action))
+
+        entry = await self.screenshot_store.save(image, label=f"{scenario.id}_{phase}_{index}")
+        return entry["path"]
+
+    async def _scroll(self, scenario, page: Page, action: TestAction, phase, index):
+        if action.target.strip().lower() in PAGE_TARGETS:
+            await page.evaluate("(dy) => window.scrollBy(0, dy)", int(action.value or 500))
+        else:
+            await page.locator(action.target).first.scroll_into_view_if_needed(timeout=self._timeout_ms(action))
+
+    async def _hover(self, scenario, page: Page, action: TestAction, phase, index):
+        await page.locator(action.target).first.hover(timeout=self._timeout_ms(action))
+
+    async def _select(self, scenario, page: Page, action: TestAction, phase, index):
+        await page.locator(action.target).first.select_option(action.value, timeout=self._timeout_ms(action))
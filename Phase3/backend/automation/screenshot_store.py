@@ -0,0 +1,164 @@
+# backend/automation/screenshot_store.py
+import io
+import asyncio
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from PIL import Image
+
+from ..utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {"webp": ("WEBP", "webp"), "jpeg": ("JPEG", "jpg"), "png": ("PNG", "png")}
+
+# Encoding is CPU bound: one small pool shared by every store keeps it off the event loop
+_encoder_pool: Optional[ThreadPoolExecutor] = None
+
+def _get_encoder_pool() -> ThreadPoolExecutor:
+    global _encoder_pool
+    if _encoder_pool is None:
+        _encoder_pool = ThreadPoolExecutor(max_workers=Config.SCREENSHOT_WORKERS, thread_name_prefix="screenshot")
+    return _encoder_pool
+
+def _resize_to_width(image: Image.Image, width: int) -> Image.Image:
+    if not width or image.width <= width:
+        return image
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS)
+
+def _encode(image: Image.Image, pil_format: str, quality: int) -> bytes:
+    if pil_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    options = {"quality": quality} if pil_format in ("WEBP", "JPEG") else {"optimize": True}
+    image.save(buffer, format=pil_format, **options)
+    return buffer.getvalue()
+
+class ScreenshotStore:
+    """Lưu screenshot theo content hash: downscale, encode WebP/JPEG và tạo thumbnail
+
+    Frames are addressed by the hash of their (downscaled) pixels, so an
+    identical frame captured twice is written once. Decoding, resizing
+    and encoding run in a thread pool.
+    """
+
+    def __init__(self,
+                 root: str = None,
+                 image_format: str = None,
+                 quality: int = None,
+                 max_width: int = None,
+                 thumbnail_width: int = None):
+        self.root = Path(root or Config.SCREENSHOT_DIR)
+        image_format = (image_format or Config.SCREENSHOT_FORMAT).lower()
+        if image_format not in FORMATS:
+            raise ValueError(f"Unsupported screenshot format: {image_format}")
+        self.pil_format, self.extension = FORMATS[image_format]
+        self.quality = quality or Config.SCREENSHOT_QUALITY
+        self.max_width = Config.SCREENSHOT_MAX_WIDTH if max_width is None else max_width
+        self.thumbnail_width = thumbnail_width or Config.SCREENSHOT_THUMBNAIL_WIDTH
+
+        self._lock = threading.Lock()
+        # Frames being written right now, so a concurrent identical frame waits instead of re-encoding
+        self._in_flight: Dict[str, threading.Event] = {}
+        self.saved = 0
+        self.deduplicated = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def path_for(self, content_hash: str, thumbnail: bool = False) -> Path:
+        folder = "thumbnails" if thumbnail else "objects"
+        return self.root / folder / content_hash[:2] / f"{content_hash}.{self.extension}"
+
+    async def save(self, image_bytes: bytes, label: str = None) -> Dict[str, Any]:
+        """Store a captured frame (PNG/JPEG bytes) and return its entry"""
+        loop = asyncio.get_running_loop()
+        entry = await loop.run_in_executor(_get_encoder_pool(), self._store, image_bytes)
+        entry["label"] = label
+        return entry
+
+    def _store(self, image_bytes: bytes) -> Dict[str, Any]:
+        with Image.open(io.BytesIO(image_bytes)) as source:
+            source.load()
+            image = _resize_to_width(source, self.max_width)
+            content_hash = hashlib.sha256(
+                f"{image.width}x{image.height}:{image.mode}".encode() + image.tobytes()
+            ).hexdigest()[:32]
+
+            path = self.path_for(content_hash)
+            thumbnail_path = self.path_for(content_hash, thumbnail=True)
+
+            with self._lock:
+                writing = self._in_flight.get(content_hash)
+                deduplicated = writing is not None or path.exists()
+                if not deduplicated:
+                    writing = self._in_flight[content_hash] = threading.Event()
+
+            if deduplicated:
+                if writing is not None:
+                    writing.wait()
+            else:
+                try:
+                    encoded = _encode(image, self.pil_format, self.quality)
+                    thumbnail = _encode(_resize_to_width(image, self.thumbnail_width), self.pil_format, self.quality)
+                    # Thumbnail first: a visible object file implies a complete entry
+                    for target, data in ((thumbnail_path, thumbnail), (path, encoded)):
+                        target.parent.mkdir(parents=True, exist_ok=True)
+                        tmp_path = target.with_suffix(f".{threading.get_ident()}.tmp")
+                        tmp_path.write_bytes(data)
+                        tmp_path.replace(target)
+                finally:
+                    with self._lock:
+                        del self._in_flight[content_hash]
+                    writing.set()
+
+            with self._lock:
+                self.bytes_in += len(image_bytes)
+                if deduplicated:
+                    self.deduplicated += 1
+                else:
+                    self.saved += 1
+                    self.bytes_out += len(encoded)
+
+            return {
+                "hash": content_hash,
+                "path": str(path),
+                "thumbnail": str(thumbnail_path),
+                "width": image.width,
+                "height": image.height,
+                "bytes": path.stat().st_size,
+                "deduplicated": deduplicated
+            }
+
+    def find(self, content_hash: str, thumbnail: bool = False) -> Optional[Path]:
+        """Stored file for a hash in any format (the configured format may have changed)"""
+        if not content_hash.isalnum():
+            return None
+        folder = self.root / ("thumbnails" if thumbnail else "objects") / content_hash[:2]
+        if not folder.exists():
+            return None
+        return next((path for path in folder.glob(f"{content_hash}.*") if path.suffix != ".tmp"), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "format": self.extension,
+            "max_width": self.max_width,
+            "saved": self.saved,
+            "deduplicated": self.deduplicated,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "compression_ratio": self.bytes_out / self.bytes_in if self.bytes_in else None
+        }
+
+_store: Optional[ScreenshotStore] = None
+
+def get_screenshot_store() -> ScreenshotStore:
+    """Process-wide store under Config.SCREENSHOT_DIR"""
+    global _store
+    if _store is None:
+        _store = ScreenshotStore()
+    return _store
@@ -0,0 +1,284 @@
+# backend/automation/suite_runner.py
+import asyncio
+import json
+import hashlib
+import logging
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from playwright.async_api import async_playwright, Browser
+
+from .scenario_executor import ScenarioExecutor
+from .browser_pool import ContextLease
+from ..scenarios.scenario_builder import TestScenario
+from ..scenarios.suite_planner import plan_shards, shard_durations
+from ..utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+class SuiteRunner:
+    """Chạy một tập scenario như một suite, chia shard qua nhiều browser context song song
+
+    Scenarios are balanced across ``shard_count`` workers using historical
+    durations. Workers share ``browser_processes`` browser processes and
+    every scenario runs in its own isolated context.
+
+    Shared setup is memoized: the first scenario with a given set of
+    ``setup_actions`` runs it and snapshots the storage state (cookies and
+    localStorage); later scenarios with the same setup on the same browser
+    start from that snapshot and skip setup. Scenarios with ``depends_on``
+    start from the storage state their dependencies left behind and are
+    skipped when a dependency failed.
+
+    LLM fallback agents carry per-run state, so ``fallback_agent_factory``
+    builds a fresh one for each scenario that needs it, bound to that
+    scenario's context so it continues from the same page and cookies.
+    """
+
+    def __init__(self,
+                 shard_count: int = 4,
+                 browser_processes: int = 1,
+                 browser_type: str = "chromium",
+                 headless: bool = None,
+                 fallback_agent_factory: Optional[Callable[[], Any]] = None,
+                 test_repo=None,
+                 execution_id: str = None,
+                 memoize_setup: bool = True):
+        self.shard_count = shard_count
+        self.browser_processes = max(1, browser_processes)
+        self.browser_type = browser_type
+        self.headless = Config.BROWSER_HEADLESS if headless is None else headless
+        self.executor = ScenarioExecutor(browser_type=browser_type)
+        self.fallback_agent_factory = fallback_agent_factory
+        self.test_repo = test_repo
+        self.execution_id = execution_id
+        self.memoize_setup = memoize_setup
+        
+        # Per-run state
+        self._setup_states: Dict[Tuple[int, str], Optional[Dict[str, Any]]] = {}
+        self._setup_events: Dict[Tuple[int, str], asyncio.Event] = {}
+        self._final_states: Dict[str, Dict[str, Any]] = {}
+        self._outcomes: Dict[str, str] = {}
+        self._needed_states: set = set()
+        self._setup_reused = 0
+
+    def _load_durations(self, scenarios: List[TestScenario]) -> Dict[str, float]:
+        if self.test_repo is None:
+            return {}
+        try:
+            return self.test_repo.get_scenario_durations([s.id for s in scenarios])
+        except Exception as e:
+            logger.error(f"Failed to load scenario durations: {e}")
+            return {}
+
+    async def run(self,
+                  scenarios: List[TestScenario],
+                  on_result: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """Run all scenarios and return per-scenario results plus a suite summary"""
+        start_time = datetime.now()
+
+        self._setup_states.clear()
+        self._setup_events.clear()
+        self._final_states.clear()
+        self._outcomes.clear()
+        self._needed_states = {dep for s in scenarios for dep in (s.depends_on or [])}
+        self._setup_reused = 0
+
+        known = {s.id for s in scenarios}
+        for scenario in scenarios:
+            missing = [dep for dep in scenario.depends_on or [] if dep not in known]
+            if missing:
+                logger.warning(f"Scenario '{scenario.id}' depends on unknown scenario(s) "
+                               f"{', '.join(missing)}, it will be skipped")
+
+        durations = self._load_durations(scenarios)
+        shards = [shard for shard in plan_shards(scenarios, self.shard_count, durations) if shard]
+        planned = shard_durations(shards, durations)
+
+        logger.info(f"Running suite of {len(scenarios)} scenarios in {len(shards)} shards "
+                    f"across {self.browser_processes} browser process(es)")
+
+        results: List[Dict[str, Any]] = []
+        shard_times: List[float] = [0.0] * len(shards)
+
+        async with async_playwright() as playwright:
+            launcher = getattr(playwright, self.browser_type)
+            browsers = await asyncio.gather(*[
+                launcher.launch(headless=self.headless)
+                for _ in range(min(self.browser_processes, len(shards) or 1))
+            ])
+
+            try:
+                await asyncio.gather(*[
+                    self._run_shard(index, shard, index % len(browsers), browsers[index % len(browsers)],
+                                    results, shard_times, on_result)
+                    for index, shard in enumerate(shards)
+                ])
+            finally:
+                await asyncio.gather(*[browser.close() for browser in browsers], return_exceptions=True)
+
+        execution_time = (datetime.now() - start_time).total_seconds()
+        passed = sum(1 for r in results if r.get("status") == "success")
+        skipped = sum(1 for r in results if r.get("status") == "skipped")
+
+        return {
+            "status": "success" if passed == len(results) else "error",
+            "result": {
+                "scenario_results": results,
+                "summary": {
+                    "total_scenarios": len(results),
+                    "passed": passed,
+                    "failed": len(results) - passed - skipped,
+                    "skipped": skipped,
+                    "setup_reused": self._setup_reused,
+                    "shards": len(shards),
+                    "planned_shard_durations": planned,
+                    "actual_shard_durations": shard_times,
+                    "wall_clock_time": execution_time
+                }
+            },
+            "execution_time": execution_time,
+            "timestamp": start_time.isoformat(),
+            "agent_type": "scenario_suite"
+        }
+
+    async def _run_shard(self, index: int, shard: List[TestScenario], browser_index: int, browser: Browser,
+                         results: List[Dict[str, Any]], shard_times: List[float],
+                         on_result: Optional[Callable[[Dict[str, Any]], Awaitable[None]]]):
+        shard_start = datetime.now()
+
+        for scenario in shard:
+            failed_deps = [dep for dep in scenario.depends_on or [] if self._outcomes.get(dep) != "success"]
+
+            if failed_deps:
+                result = {
+                    "status": "skipped",
+                    "error": f"Dependency not satisfied: {', '.join(failed_deps)}",
+                    "scenario_id": scenario.id,
+                    "url": scenario.url,
+                    "execution_time": 0,
+                    "timestamp": datetime.now().isoformat()
+                }
+            else:
+                result = await self._run_scenario(scenario, browser_index, browser)
+
+            result["shard"] = index
+            self._outcomes[scenario.id] = result.get("status")
+            results.append(result)
+            self._save_result(scenario, result)
+
+            if on_result is not None:
+                await on_result(result)
+
+        shard_times[index] = (datetime.now() - shard_start).total_seconds()
+        logger.info(f"Shard {index} finished {len(shard)} scenarios in {shard_times[index]:.2f} seconds")
+
+    async def _run_scenario(self, scenario: TestScenario, browser_index: int, browser: Browser) -> Dict[str, Any]:
+        """Run one scenario in a fresh context, restoring dependency or memoized setup state"""
+        storage_state = None
+        skip_setup = False
+        on_setup_complete = None
+        setup_event = None
+
+        if scenario.depends_on:
+            storage_state = self._merge_states([self._final_states.get(dep) for dep in scenario.depends_on])
+
+        if self.memoize_setup and scenario.setup_actions and storage_state is None:
+            key = (browser_index, self._setup_key(scenario))
+
+            if key in self._setup_events:
+                # Someone else owns this setup: wait for its snapshot
+                await self._setup_events[key].wait()
+                storage_state = self._setup_states.get(key)
+                skip_setup = storage_state is not None
+            else:
+                setup_event = self._setup_events[key] = asyncio.Event()
+
+                async def on_setup_complete(page):
+                    self._setup_states[key] = await page.context.storage_state()
+                    setup_event.set()
+
+        if skip_setup:
+            self._setup_reused += 1
+
+        context = await browser.new_context(storage_state=storage_state) if storage_state else await browser.new_context()
+        try:
+            page = await context.new_page()
+            result = await self._executor_for(context, page).execute(scenario, page, skip_setup=skip_setup,
+                                                                     on_setup_complete=on_setup_complete)
+            if result.get("status") == "success" and scenario.id in self._needed_states:
+                self._final_states[scenario.id] = await context.storage_state()
+        except Exception as e:
+            result = {
+                "status": "error",
+                "error": str(e),
+                "scenario_id": scenario.id,
+                "url": scenario.url,
+                "execution_time": 0,
+                "timestamp": datetime.now().isoformat()
+            }
+        finally:
+            # Never leave waiters hanging when setup failed before the snapshot
+            if setup_event is not None:
+                setup_event.set()
+            await context.close()
+
+        result["setup_reused"] = skip_setup
+        return result
+
+    def _executor_for(self, context, page) -> ScenarioExecutor:
+        """Shared executor, or one with a fallback agent of its own when fallback is enabled"""
+        if self.fallback_agent_factory is None:
+            return self.executor
+        agent = self.fallback_agent_factory()
+        agent.browser_lease = ContextLease(context, page)
+        return ScenarioExecutor(fallback_agent=agent, browser_type=self.browser_type)
+
+    @staticmethod
+    def _setup_key(scenario: TestScenario) -> str:
+        """Identify a setup by its actions and the origin it runs against"""
+        payload = [urlsplit(scenario.url).netloc] + [
+            [action.type.value, action.target, action.value]
+            for action in scenario.setup_actions or []
+        ]
+        return hashlib.sha1(json.dumps(payload).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _merge_states(states: List[Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """Merge storage states of several dependencies (later ones win)"""
+        states = [state for state in states if state]
+        if not states:
+            return None
+
+        cookies: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        origins: Dict[str, Dict[str, Any]] = {}
+        for state in states:
+            for cookie in state.get("cookies", []):
+                cookies[(cookie.get("name"), cookie.get("domain"), cookie.get("path"))] = cookie
+            for origin in state.get("origins", []):
+                origins[origin.get("origin")] = origin
+
+        return {"cookies": list(cookies.values()), "origins": list(origins.values())}
+
+    def _save_result(self, scenario: TestScenario, result: Dict[str, Any]):
+        """Persist one scenario result so future runs can balance shards by duration"""
+        if self.test_repo is None or not self.execution_id:
+            return
+
+        details = result.get("result", {})
+        try:
+            self.test_repo.save_test_result(self.execution_id, {
+                "scenario_id": scenario.id,
+                "scenario_name": scenario.name,
+                "status": {"success": "passed", "skipped": "skipped"}.get(result.get("status"), "failed"),
+                "execution_time": result.get("execution_time"),
+                "url": scenario.url,
+                "browser": self.browser_type,
+                "actions_performed": details.get("actions_performed", []),
+                "assertions_checked": details.get("assertions_checked", []),
+                "screenshots_taken": details.get("screenshots", []),
+                "error_details": result.get("error")
+            })
+        except Exception as e:
+            logger.error(f"Failed to save suite result for {scenario.id}: {e}")
@@ -174,6 +174,41 @@ class TestResultRepository:
             session.refresh(result)
             return result
     
+    def update_execution_counts(self, execution_id: str, total_tests: int,
+                                passed_tests: int, failed_tests: int):
+        with self.db.get_session() as session:
+            execution = session.query(TestExecution).filter(
+                TestExecution.id == execution_id
+            ).first()
+            
+            if execution:
+                execution.total_tests = total_tests
+                execution.passed_tests = passed_tests
+                execution.failed_tests = failed_tests
+                session.commit()
+    
+    def get_scenario_durations(self, scenario_ids: list = None, days: int = 30) -> dict:
+        """Average execution time per scenario_id over recent results"""
+        with self.db.get_session() as session:
+            from sqlalchemy import func
+            from datetime import timedelta
+            
+            since_date = datetime.now() - timedelta(days=days)
+            
+            query = session.query(
+                TestResult.scenario_id,
+                func.avg(TestResult.execution_time)
+            ).filter(
+                TestResult.started_at >= since_date,
+                TestResult.execution_time.isnot(None)
+            )
+            
+            if scenario_ids:
+                query = query.filter(TestResult.scenario_id.in_(scenario_ids))
+            
+            rows = query.group_by(TestResult.scenario_id).all()
+            return {scenario_id: avg_time for scenario_id, avg_time in rows if avg_time is not None}
+    
     def get_execution_results(self, execution_id: str) -> list:
         with self.db.get_session() as session:
             return session.query(TestResult).filter(
@@ -6,6 +6,9 @@ from dataclasses import dataclass, asdict
 from enum import Enum
 from pathlib import Path
 
+# Use the C LibYAML loader when PyYAML was built with it (much faster than pure Python)
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 class ScenarioType(Enum):
     FUNCTIONAL = "functional"
     UI_UX = "ui_ux"
@@ -26,7 +29,7 @@ class ActionType(Enum):
     HOVER = "hover"
     SELECT = "select"
 
-@dataclass
+@dataclass(slots=True)
 class TestAction:
     type: ActionType
     target: str
@@ -34,6 +37,11 @@ class TestAction:
     timeout: Optional[int] = None
     description: Optional[str] = None
     expected_result: Optional[str] = None
+    
+    def __reduce__(self):
+        # Pickle as a flat constructor call (much faster to load than slots state dicts)
+        return (TestAction, (self.type, self.target, self.value, self.timeout,
+                             self.description, self.expected_result))
 
 @dataclass
 class TestScenario:
@@ -49,6 +57,7 @@ class TestScenario:
     priority: int = 1
     timeout: int = 300
     retry_count: int = 1
+    depends_on: Optional[List[str]] = None
 
 class ScenarioBuilder:
     """Builder for creating test scenarios"""
@@ -112,6 +121,11 @@ class ScenarioBuilder:
         self.current_scenario.tags = tags
         return self
     
+    def set_dependencies(self, scenario_ids: List[str]) -> 'ScenarioBuilder':
+        """Run after these scenarios and start from their browser storage state"""
+        self.current_scenario.depends_on = scenario_ids
+        return self
+    
     def set_priority(self, priority: int) -> 'ScenarioBuilder':
         """Set scenario priority (1-5, 5 highest)"""
         self.current_scenario.priority = priority
@@ -163,36 +177,39 @@ class ScenarioBuilder:
         """Load scenario from file"""
         
         with open(filepath, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
-        
-        # Convert strings back to enums
-        data['scenario_type'] = ScenarioType(data['scenario_type'])
-        
-        for action in data['actions']:
-            action['type'] = ActionType(action['type'])
-        
-        if data.get('setup_actions'):
-            for action in data['setup_actions']:
-                action['type'] = ActionType(action['type'])
+            data = yaml.load(f, Loader=YAML_LOADER)
         
-        if data.get('teardown_actions'):
-            for action in data['teardown_actions']:
-                action['type'] = ActionType(action['type'])
+        return ScenarioBuilder.scenario_from_dict(data)
+    
+    @staticmethod
+    def scenario_from_dict(data: Dict[str, Any]) -> TestScenario:
+        """Build scenario from its serialized dict form"""
         
-        # Convert actions back to dataclass
-        data['actions'] = [TestAction(**action) for action in data['actions']]
+        # Convert strings back to enums and actions back to dataclass
+        data['scenario_type'] = ScenarioType(data['scenario_type'])
+        data['actions'] = ScenarioBuilder._actions_from_list(data['actions'])
         
         if data.get('setup_actions'):
-            data['setup_actions'] = [TestAction(**action) for action in data['setup_actions']]
+            data['setup_actions'] = ScenarioBuilder._actions_from_list(data['setup_actions'])
         
         if data.get('teardown_actions'):
-            data['teardown_actions'] = [TestAction(**action) for action in data['teardown_actions']]
+            data['teardown_actions'] = ScenarioBuilder._actions_from_list(data['teardown_actions'])
         
         return TestScenario(**data)
     
     @staticmethod
-    def load_all_scenarios(scenarios_dir: str = "scenarios") -> List[TestScenario]:
-        """Load all scenarios from directory"""
+    def _actions_from_list(actions: List[Dict[str, Any]]) -> List[TestAction]:
+        return [
+            TestAction(**{**action, 'type': ActionType(action['type'])})
+            for action in actions
+        ]
+    
+    @staticmethod
+    def load_all_scenarios(scenarios_dir: str = "scenarios", cache=None) -> List[TestScenario]:
+        """Load all scenarios from directory
+        
+        Pass a ``ScenarioCache`` to skip YAML parsing for files that did not change.
+        """
         
         scenarios = []
         scenarios_path = Path(scenarios_dir)
@@ -202,11 +219,17 @@ class ScenarioBuilder:
         
         for file_path in scenarios_path.glob("*.yaml"):
             try:
-                scenario = ScenarioBuilder.load_scenario(str(file_path))
+                if cache is not None:
+                    scenario = cache.load(str(file_path))
+                else:
+                    scenario = ScenarioBuilder.load_scenario(str(file_path))
                 scenarios.append(scenario)
             except Exception as e:
                 print(f"❌ Failed to load scenario {file_path}: {e}")
         
+        if cache is not None:
+            cache.save()
+        
         return scenarios
 
 # Predefined scenario templates
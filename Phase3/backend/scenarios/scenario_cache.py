@@ -0,0 +1,117 @@
+# backend/scenarios/scenario_cache.py
+import os
+import pickle
+import hashlib
+import logging
+from typing import Dict, Optional, Tuple
+from pathlib import Path
+
+from .scenario_builder import ScenarioBuilder, TestScenario
+
+logger = logging.getLogger(__name__)
+
+# Bump when TestScenario/TestAction layout changes so stale pickles are discarded
+CACHE_VERSION = 2
+
+class ScenarioCache:
+    """Compiled binary cache cho parsed scenarios, keyed theo content hash của file
+
+    Each entry stores the file's stat signature, its content digest and the
+    already-built ``TestScenario``. A matching stat signature is a hit without
+    reading the file; otherwise the file is hashed and only re-parsed when
+    its content actually changed.
+
+    Cached ``TestScenario`` objects are shared: every caller (and the
+    registry) gets the same instance, so they must be treated as read-only.
+    Build a new scenario (or ``dataclasses.replace`` it) instead of mutating.
+    """
+
+    def __init__(self, cache_path: str = ".cache/scenarios.pkl"):
+        self.cache_path = Path(cache_path)
+        # file path -> (mtime_ns, size, digest, scenario)
+        self._entries: Dict[str, Tuple[int, int, str, TestScenario]] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._read()
+
+    def _read(self):
+        if not self.cache_path.exists():
+            return
+
+        try:
+            with open(self.cache_path, 'rb') as f:
+                payload = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable scenario cache {self.cache_path}: {e}")
+            return
+
+        if payload.get("version") != CACHE_VERSION:
+            logger.info("Scenario cache version changed, rebuilding")
+            return
+
+        self._entries = payload.get("entries", {})
+
+    @staticmethod
+    def _digest(content: bytes) -> str:
+        return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+    def load(self, filepath: str) -> TestScenario:
+        """Load scenario from cache, parsing the YAML file only when it changed (shared, do not mutate)"""
+        stat = os.stat(filepath)
+        entry = self._entries.get(filepath)
+
+        if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            self.hits += 1
+            return entry[3]
+
+        with open(filepath, 'rb') as f:
+            content = f.read()
+        digest = self._digest(content)
+
+        if entry is not None and entry[2] == digest:
+            # Touched but not modified: refresh the stat signature only
+            scenario = entry[3]
+            self.hits += 1
+        else:
+            scenario = ScenarioBuilder.load_scenario(filepath)
+            self.misses += 1
+
+        self._entries[filepath] = (stat.st_mtime_ns, stat.st_size, digest, scenario)
+        self._dirty = True
+        return scenario
+
+    def invalidate(self, filepath: Optional[str] = None):
+        """Drop one file (or everything) from the cache"""
+        if filepath is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(filepath, None)
+        self._dirty = True
+
+    def save(self):
+        """Persist cache to disk if anything changed"""
+        if not self._dirty:
+            return
+
+        # Forget files that no longer exist
+        self._entries = {path: entry for path, entry in self._entries.items() if os.path.exists(path)}
+
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp")
+
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({"version": CACHE_VERSION, "entries": self._entries}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)
+            self._dirty = False
+        except Exception as e:
+            logger.error(f"Failed to write scenario cache {self.cache_path}: {e}")
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses
+        }
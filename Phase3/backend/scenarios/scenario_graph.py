@@ -0,0 +1,104 @@
+# backend/scenarios/scenario_graph.py
+from typing import Dict, List, Set
+
+from .scenario_builder import TestScenario
+
+class ScenarioGraph:
+    """DAG của các scenario dựa trên ``depends_on``
+
+    A scenario runs after all of its dependencies and starts from the
+    browser storage state (cookies, localStorage) its dependency left behind.
+    """
+
+    def __init__(self, scenarios: List[TestScenario], allow_missing: bool = False):
+        """``allow_missing`` keeps scenarios whose dependencies are not in the set
+        (recorded in ``missing``) instead of rejecting them; a runner skips them."""
+        self.scenarios: Dict[str, TestScenario] = {s.id: s for s in scenarios}
+        self.dependencies: Dict[str, List[str]] = {}
+        self.dependents: Dict[str, List[str]] = {s.id: [] for s in scenarios}
+        self.missing: Dict[str, List[str]] = {}
+
+        for scenario in scenarios:
+            deps = list(scenario.depends_on or [])
+            missing = [dep for dep in deps if dep not in self.scenarios]
+            if missing:
+                if not allow_missing:
+                    raise ValueError(f"Scenario '{scenario.id}' depends on unknown scenario(s): {', '.join(missing)}")
+                self.missing[scenario.id] = missing
+                deps = [dep for dep in deps if dep in self.scenarios]
+
+            self.dependencies[scenario.id] = deps
+            for dep in deps:
+                self.dependents[dep].append(scenario.id)
+
+        # Fail fast on cycles
+        self.topological_order()
+
+    @staticmethod
+    def with_dependencies(selected: List[TestScenario], available: List[TestScenario]) -> List[TestScenario]:
+        """Add the (transitive) dependencies of ``selected`` from ``available``"""
+        by_id = {s.id: s for s in available}
+        result: Dict[str, TestScenario] = {}
+        stack = list(selected)
+
+        while stack:
+            scenario = stack.pop()
+            if scenario.id in result:
+                continue
+            result[scenario.id] = scenario
+            for dep in scenario.depends_on or []:
+                if dep in by_id:
+                    stack.append(by_id[dep])
+
+        return list(result.values())
+
+    def topological_order(self) -> List[TestScenario]:
+        """Order scenarios so dependencies come first (higher priority first among ready ones)"""
+        remaining = {scenario_id: len(deps) for scenario_id, deps in self.dependencies.items()}
+        ready = [scenario_id for scenario_id, count in remaining.items() if count == 0]
+        order: List[TestScenario] = []
+
+        while ready:
+            ready.sort(key=lambda scenario_id: (-self.scenarios[scenario_id].priority, scenario_id))
+            scenario_id = ready.pop(0)
+            order.append(self.scenarios[scenario_id])
+
+            for dependent in self.dependents[scenario_id]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+
+        if len(order) != len(self.scenarios):
+            cyclic = sorted(scenario_id for scenario_id, count in remaining.items() if count > 0)
+            raise ValueError(f"Dependency cycle between scenarios: {', '.join(cyclic)}")
+
+        return order
+
+    def components(self) -> List[List[TestScenario]]:
+        """Connected groups of scenarios, each in topological order
+
+        A group must run in one worker so dependents can reuse the storage
+        state produced by their dependencies.
+        """
+        seen: Set[str] = set()
+        groups: List[Set[str]] = []
+
+        for scenario_id in self.scenarios:
+            if scenario_id in seen:
+                continue
+
+            group = set()
+            stack = [scenario_id]
+            while stack:
+                current = stack.pop()
+                if current in group:
+                    continue
+                group.add(current)
+                stack.extend(self.dependencies[current])
+                stack.extend(self.dependents[current])
+
+            seen |= group
+            groups.append(group)
+
+        order = self.topological_order()
+        return [[s for s in order if s.id in group] for group in groups]
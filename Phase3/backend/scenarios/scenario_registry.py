@@ -0,0 +1,194 @@
+# backend/scenarios/scenario_registry.py
+import os
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+from pathlib import Path
+
+from .scenario_builder import ScenarioBuilder, ScenarioType, TestScenario
+from .scenario_cache import ScenarioCache
+
+logger = logging.getLogger(__name__)
+
+class ScenarioRegistry:
+    """Registry giữ các scenario đã parse trong bộ nhớ, index theo id, tag và type
+
+    Files are parsed once and only re-parsed when their mtime or size changes.
+    Refreshes are throttled by ``refresh_interval`` so hot API paths do not
+    even stat the directory on every request. With a ``ScenarioCache`` the
+    initial load also skips YAML parsing for files seen in a previous run.
+    """
+
+    def __init__(self,
+                 scenarios_dir: str = "scenarios",
+                 refresh_interval: float = 2.0,
+                 cache: Optional[ScenarioCache] = None):
+        self.scenarios_dir = Path(scenarios_dir)
+        self.refresh_interval = refresh_interval
+        self.cache = cache
+
+        # file path -> (mtime_ns, size) of the version currently indexed
+        self._file_stats: Dict[str, Tuple[int, int]] = {}
+        # file path -> scenario id parsed from that file
+        self._file_ids: Dict[str, str] = {}
+
+        # Indexes
+        self._by_id: Dict[str, TestScenario] = {}
+        self._by_tag: Dict[str, Set[str]] = {}
+        self._by_type: Dict[ScenarioType, Set[str]] = {}
+
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> int:
+        """Re-scan the scenarios directory and re-parse changed files only
+
+        Returns the number of files that were added, changed or removed.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_refresh < self.refresh_interval:
+            return 0
+
+        with self._lock:
+            self._last_refresh = now
+
+            if not self.scenarios_dir.exists():
+                removed = list(self._file_stats)
+                for path in removed:
+                    self._remove_file(path)
+                return len(removed)
+
+            seen = set()
+            changes = 0
+
+            with os.scandir(self.scenarios_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".yaml") or not entry.is_file():
+                        continue
+
+                    path = entry.path
+                    seen.add(path)
+                    stat = entry.stat()
+                    signature = (stat.st_mtime_ns, stat.st_size)
+
+                    if self._file_stats.get(path) == signature:
+                        continue
+
+                    self._load_file(path, signature)
+                    changes += 1
+
+            for path in [p for p in self._file_stats if p not in seen]:
+                self._remove_file(path)
+                changes += 1
+
+            if changes and self.cache is not None:
+                self.cache.save()
+
+            if changes:
+                logger.info(f"Scenario registry refreshed: {changes} file(s) changed, "
+                            f"{len(self._by_id)} scenarios indexed")
+
+            return changes
+
+    def _load_file(self, path: str, signature: Tuple[int, int]):
+        """Parse one scenario file and (re)index it"""
+        # Drop whatever this file contributed before
+        self._unindex_file(path)
+        self._file_stats[path] = signature
+
+        try:
+            if self.cache is not None:
+                scenario = self.cache.load(path)
+            else:
+                scenario = ScenarioBuilder.load_scenario(path)
+        except Exception as e:
+            # Remember the signature so a broken file is not re-parsed on every refresh
+            logger.error(f"Failed to load scenario {path}: {e}")
+            return
+
+        if scenario.id in self._by_id:
+            logger.warning(f"Duplicate scenario id '{scenario.id}' in {path}, replacing previous definition")
+            self._unindex_scenario(scenario.id)
+
+        self._file_ids[path] = scenario.id
+        self._by_id[scenario.id] = scenario
+        for tag in scenario.tags or []:
+            self._by_tag.setdefault(tag, set()).add(scenario.id)
+        self._by_type.setdefault(scenario.scenario_type, set()).add(scenario.id)
+
+    def _remove_file(self, path: str):
+        self._unindex_file(path)
+        self._file_stats.pop(path, None)
+
+    def _unindex_file(self, path: str):
+        scenario_id = self._file_ids.pop(path, None)
+        if scenario_id is not None:
+            self._unindex_scenario(scenario_id)
+
+    def _unindex_scenario(self, scenario_id: str):
+        scenario = self._by_id.pop(scenario_id, None)
+        if scenario is None:
+            return
+
+        for tag in scenario.tags or []:
+            ids = self._by_tag.get(tag)
+            if ids is not None:
+                ids.discard(scenario_id)
+                if not ids:
+                    del self._by_tag[tag]
+
+        ids = self._by_type.get(scenario.scenario_type)
+        if ids is not None:
+            ids.discard(scenario_id)
+            if not ids:
+                del self._by_type[scenario.scenario_type]
+
+        # Keep file -> id mapping consistent when a duplicate id replaced another file
+        for path, indexed_id in list(self._file_ids.items()):
+            if indexed_id == scenario_id:
+                del self._file_ids[path]
+
+    def get(self, scenario_id: str) -> Optional[TestScenario]:
+        """Get scenario by id in O(1)"""
+        self.refresh()
+        return self._by_id.get(scenario_id)
+
+    def all(self) -> List[TestScenario]:
+        """Get all indexed scenarios"""
+        self.refresh()
+        return list(self._by_id.values())
+
+    def find(self,
+             tags: Optional[List[str]] = None,
+             scenario_type: Optional[ScenarioType] = None) -> List[TestScenario]:
+        """Find scenarios having any of ``tags`` and/or matching ``scenario_type``"""
+        self.refresh()
+
+        ids: Optional[Set[str]] = None
+
+        if tags:
+            ids = set()
+            for tag in tags:
+                ids |= self._by_tag.get(tag, set())
+
+        if scenario_type is not None:
+            type_ids = self._by_type.get(scenario_type, set())
+            ids = type_ids if ids is None else ids & type_ids
+
+        if ids is None:
+            return list(self._by_id.values())
+
+        return [self._by_id[scenario_id] for scenario_id in ids]
+
+    def tags(self) -> List[str]:
+        """Get all known tags"""
+        self.refresh()
+        return sorted(self._by_tag)
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._by_id)
+
+    def __contains__(self, scenario_id: str) -> bool:
+        return self.get(scenario_id) is not None
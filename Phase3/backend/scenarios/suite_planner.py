@@ -0,0 +1,81 @@
+# backend/scenarios/suite_planner.py
+import heapq
+from typing import Dict, List, Optional
+
+from .scenario_builder import ScenarioType, TestScenario
+from .scenario_graph import ScenarioGraph
+
+# Rough cost of one action when a scenario has no recorded history yet
+DEFAULT_ACTION_SECONDS = 1.5
+DEFAULT_SCENARIO_OVERHEAD = 2.0
+
+def filter_scenarios(scenarios: List[TestScenario],
+                     tags: Optional[List[str]] = None,
+                     scenario_types: Optional[List[ScenarioType]] = None,
+                     min_priority: Optional[int] = None) -> List[TestScenario]:
+    """Filter scenarios by tags (any match), types and minimum priority"""
+    selected = []
+
+    for scenario in scenarios:
+        if tags and not set(tags) & set(scenario.tags or []):
+            continue
+        if scenario_types and scenario.scenario_type not in scenario_types:
+            continue
+        if min_priority is not None and scenario.priority < min_priority:
+            continue
+        selected.append(scenario)
+
+    return selected
+
+def estimate_duration(scenario: TestScenario, durations: Dict[str, float]) -> float:
+    """Historical duration if known, otherwise an estimate from the action count"""
+    if scenario.id in durations:
+        return durations[scenario.id]
+
+    action_count = (len(scenario.setup_actions or []) + len(scenario.actions)
+                    + len(scenario.teardown_actions or []))
+    return DEFAULT_SCENARIO_OVERHEAD + action_count * DEFAULT_ACTION_SECONDS
+
+def plan_shards(scenarios: List[TestScenario],
+                shard_count: int,
+                durations: Optional[Dict[str, float]] = None) -> List[List[TestScenario]]:
+    """Split scenarios into shards with balanced expected duration
+
+    Uses longest-processing-time-first: groups of scenarios are sorted by
+    expected duration (slowest first) and each one goes to the currently
+    lightest shard, which keeps the slowest shard close to the average.
+    Scenarios linked through ``depends_on`` form one group so they always
+    land in the same shard, in dependency order. Dependencies outside
+    ``scenarios`` are not an error here: the runner skips their dependents.
+    """
+    durations = durations or {}
+    groups = ScenarioGraph(scenarios, allow_missing=True).components()
+    shard_count = max(1, min(shard_count, len(groups) or 1))
+
+    shards: List[List[TestScenario]] = [[] for _ in range(shard_count)]
+    # (expected total seconds, shard index)
+    loads = [(0.0, index) for index in range(shard_count)]
+    heapq.heapify(loads)
+
+    def group_duration(group: List[TestScenario]) -> float:
+        return sum(estimate_duration(s, durations) for s in group)
+
+    ordered = sorted(groups, key=lambda g: (-group_duration(g), -max(s.priority for s in g), g[0].id))
+    shard_groups: List[List[List[TestScenario]]] = [[] for _ in range(shard_count)]
+
+    for group in ordered:
+        load, index = heapq.heappop(loads)
+        shard_groups[index].append(group)
+        heapq.heappush(loads, (load + group_duration(group), index))
+
+    # Within a shard run higher-priority groups first so critical failures surface early
+    for index, groups_in_shard in enumerate(shard_groups):
+        groups_in_shard.sort(key=lambda g: -max(s.priority for s in g))
+        shards[index] = [scenario for group in groups_in_shard for scenario in group]
+
+    return shards
+
+def shard_durations(shards: List[List[TestScenario]], durations: Optional[Dict[str, float]] = None) -> List[float]:
+    """Expected total duration of each shard"""
+    durations = durations or {}
+    return [sum(estimate_duration(s, durations) for s in shard) for shard in shards]
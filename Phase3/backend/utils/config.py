@@ -10,6 +10,74 @@ class Config:
     # Browser settings
     BROWSER_HEADLESS = os.getenv("BROWSER_HEADLESS", "false").lower() == "true"
     SCREENSHOT_DIR = "screenshots"
+    SCREENSHOT_FORMAT = os.getenv("SCREENSHOT_FORMAT", "webp")  # webp, jpeg or png
+    SCREENSHOT_QUALITY = int(os.getenv("SCREENSHOT_QUALITY", "80"))
+    SCREENSHOT_MAX_WIDTH = int(os.getenv("SCREENSHOT_MAX_WIDTH", "1280"))  # 0 keeps full size
+    SCREENSHOT_THUMBNAIL_WIDTH = int(os.getenv("SCREENSHOT_THUMBNAIL_WIDTH", "320"))
+    SCREENSHOT_WORKERS = int(os.getenv("SCREENSHOT_WORKERS", "2"))  # encoding threads
+    
+    # Agent concurrency
+    MAX_CONCURRENT_AGENTS = int(os.getenv("MAX_CONCURRENT_AGENTS", "3"))
+    
+    # Warm browser pool shared across agents
+    BROWSER_POOL_TYPES = os.getenv("BROWSER_POOL_TYPES", "chromium").split(",")
+    BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))  # browsers per type
+    BROWSER_POOL_MAX_CONTEXTS = int(os.getenv("BROWSER_POOL_MAX_CONTEXTS", "4"))  # concurrent contexts per browser
+    BROWSER_POOL_MAX_USES = int(os.getenv("BROWSER_POOL_MAX_USES", "50"))  # recycle after N leases
+    BROWSER_POOL_MAX_MEMORY_MB = int(os.getenv("BROWSER_POOL_MAX_MEMORY_MB", "1500"))  # recycle above this RSS
+    BROWSER_POOL_HEALTH_INTERVAL = float(os.getenv("BROWSER_POOL_HEALTH_INTERVAL", "30"))  # seconds between checks
+    
+    # Number of browser engines a cross-browser test runs at the same time
+    CROSS_BROWSER_PARALLELISM = int(os.getenv("CROSS_BROWSER_PARALLELISM", "3"))
+    
+    # Playwright MCP server instances (ports MCP_BASE_PORT .. MCP_BASE_PORT + MCP_INSTANCES - 1)
+    MCP_INSTANCES = int(os.getenv("MCP_INSTANCES", "2"))
+    MCP_BASE_PORT = int(os.getenv("MCP_BASE_PORT", "3001"))
+    MCP_MAX_SESSIONS_PER_INSTANCE = int(os.getenv("MCP_MAX_SESSIONS_PER_INSTANCE", "4"))
+    MCP_HEALTH_INTERVAL = float(os.getenv("MCP_HEALTH_INTERVAL", "15"))  # seconds between pings
+    MCP_SERVER_VERSION = os.getenv("MCP_SERVER_VERSION", "0.0.32")  # pinned @playwright/mcp version
+    MCP_SERVER_PREFIX = os.getenv("MCP_SERVER_PREFIX", ".mcp-server")  # local install (relative to project root)
+    MCP_SERVER_BIN = os.getenv("MCP_SERVER_BIN")  # optional explicit cli.js / executable
+    
+    # Network capture for pooled agent tasks
+    NETWORK_CAPTURE_HAR = os.getenv("NETWORK_CAPTURE_HAR", "true").lower() == "true"
+    HAR_DIR = "har"
+    # Comma separated: no_third_party, no_media, no_fonts
+    NETWORK_BLOCK_PROFILES = [p for p in os.getenv("NETWORK_BLOCK_PROFILES", "").split(",") if p]
+    
+    # Shared LLM gateway (limits of the Anthropic account tier)
+    LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "50"))
+    LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "40000"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))  # retries after a 429
+    LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+    
+    # Provider-side caching of the static system prompt prefix
+    LLM_PROMPT_CACHING = os.getenv("LLM_PROMPT_CACHING", "true").lower() == "true"
+    
+    # Response cache for repeated prompts (same system prompt, task and page state)
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_PATH = ".cache/llm_cache.sqlite"
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+    LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+    
+    # Per-step model routing: routine steps on the small model, escalation to CLAUDE_MODEL
+    # ROUTER_SMALL_MODEL may name a local model as "ollama:<model>" (served at OLLAMA_HOST)
+    MODEL_ROUTING = os.getenv("MODEL_ROUTING", "true").lower() == "true"
+    ROUTER_SMALL_MODEL = os.getenv("ROUTER_SMALL_MODEL", "claude-3-5-haiku-20241022")
+    ROUTER_ESCALATION_STEPS = int(os.getenv("ROUTER_ESCALATION_STEPS", "2"))
+    OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+    
+    # Compact the serialized page state before it is sent to the LLM (profiles per AgentType)
+    DOM_COMPACTION = os.getenv("DOM_COMPACTION", "true").lower() == "true"
+    
+    # Replay recorded action histories of successful agent runs before calling the LLM
+    TRAJECTORY_REPLAY = os.getenv("TRAJECTORY_REPLAY", "true").lower() == "true"
+    TRAJECTORY_DIR = ".cache/trajectories"
+    
+    # Reuse logged-in storage states (tasks with a session_profile), logging in again only when stale
+    SESSION_WARM_START = os.getenv("SESSION_WARM_START", "true").lower() == "true"
+    SESSION_DIR = ".cache/sessions"
+    SESSION_MAX_AGE = float(os.getenv("SESSION_MAX_AGE", "3600"))  # seconds
     
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -372,7 +372,9 @@ export class AdvancedAgentService {
       'enhanced_test': 'Enhanced Test Agent',
       'form_test': 'Form Test Agent',
       'api_test': 'API Test Agent',
-      'performance_test': 'Performance Test Agent'
+      'performance_test': 'Performance Test Agent',
+      'scenario_test': 'Scenario Test Agent',
+      'load_test': 'Load Test Agent'
     };
 
     return agentTypeNames[agentType] || agentType;
@@ -0,0 +1,33 @@
+# bench_scenario_cache.py
+# Timing of a warm scenario load; run with `python -m tests.bench_scenario_cache [count]`
+import os
+import sys
+import time
+import tempfile
+
+from backend.scenarios.scenario_builder import ScenarioBuilder
+from backend.scenarios.scenario_cache import ScenarioCache
+from tests.test_scenario_cache import _write_scenarios
+
+def bench_warm_load(count: int = 10_000):
+    print(f"⚡ Benchmarking cold and warm load of {count} scenarios")
+    with tempfile.TemporaryDirectory() as root:
+        scenarios_dir = os.path.join(root, "scenarios")
+        cache_path = os.path.join(root, "scenarios.pkl")
+        os.mkdir(scenarios_dir)
+        _write_scenarios(scenarios_dir, count)
+
+        started = time.perf_counter()
+        ScenarioBuilder.load_all_scenarios(scenarios_dir, cache=ScenarioCache(cache_path))
+        cold = time.perf_counter() - started
+
+        started = time.perf_counter()
+        cache = ScenarioCache(cache_path)
+        ScenarioBuilder.load_all_scenarios(scenarios_dir, cache=cache)
+        warm = time.perf_counter() - started
+
+    print(f"📊 Cold: {cold:.2f}s, warm: {warm:.2f}s ({cache.hits} hits, {cache.misses} misses)")
+    return cold, warm
+
+if __name__ == "__main__":
+    bench_warm_load(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
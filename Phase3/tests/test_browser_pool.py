@@ -0,0 +1,206 @@
+# test_browser_pool.py
+import asyncio
+
+from backend.automation.browser_pool import BrowserPool
+
+class _FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+
+    async def new_page(self):
+        return object()
+
+    async def close(self):
+        self.closed = True
+        self.browser.open_contexts -= 1
+
+class _FakeBrowser:
+    def __init__(self, browser_type, number):
+        self.browser_type = browser_type
+        self.number = number
+        self.connected = True
+        self.closed = False
+        self.open_contexts = 0
+
+    async def new_context(self, **options):
+        self.open_contexts += 1
+        return _FakeContext(self)
+
+    def is_connected(self):
+        return self.connected and not self.closed
+
+    async def close(self):
+        self.closed = True
+
+class _FakeLauncher:
+    def __init__(self):
+        self.launched = []
+        self.failing = False
+
+    async def __call__(self, browser_type):
+        await asyncio.sleep(0.01)
+        if self.failing:
+            raise RuntimeError("browser failed to start")
+        browser = _FakeBrowser(browser_type, len(self.launched) + 1)
+        self.launched.append(browser)
+        return browser
+
+def _pool(launcher, **options):
+    defaults = {"browser_types": ["chromium"], "size_per_type": 1, "max_contexts_per_browser": 2,
+                "max_uses": 100, "max_memory_mb": 0}
+    return BrowserPool(launcher=launcher, **{**defaults, **options})
+
+def test_lease_and_release():
+    print("🏊 Testing browser pool leases")
+    launcher = _FakeLauncher()
+    pool = _pool(launcher)
+
+    async def run():
+        await pool.start()
+        async with pool.lease() as lease:
+            assert lease.browser is launcher.launched[0]
+            assert lease.pooled.active_leases == 1
+        assert lease.context.closed and lease.pooled.active_leases == 0
+        await pool.stop()
+
+    asyncio.run(run())
+    assert len(launcher.launched) == 1 and launcher.launched[0].closed
+    assert pool.get_stats()["total_leases"] == 1
+    print("✅ Context leased from the warm browser and closed on release")
+
+def test_context_cap_blocks_until_release():
+    launcher = _FakeLauncher()
+    pool = _pool(launcher, max_contexts_per_browser=2)
+
+    async def run():
+        first = await pool.acquire()
+        second = await pool.acquire()
+        third = asyncio.create_task(pool.acquire())
+        await asyncio.sleep(0.05)
+        assert not third.done()  # both slots of the only browser are taken
+
+        await pool.release(first)
+        lease = await asyncio.wait_for(third, 1)
+        assert lease.browser is first.browser
+        await pool.release(second)
+        await pool.release(lease)
+        await pool.stop()
+
+    asyncio.run(run())
+    assert len(launcher.launched) == 1
+    print("✅ Per-browser context cap enforced")
+
+def test_recycle_after_max_uses():
+    print("♻️ Testing browser recycling")
+    launcher = _FakeLauncher()
+    pool = _pool(launcher, max_uses=2)
+
+    async def run():
+        await pool.start()
+        for _ in range(2):
+            async with pool.lease():
+                pass
+        async with pool.lease() as lease:
+            assert lease.browser is launcher.launched[1]
+        await pool.stop()
+
+    asyncio.run(run())
+    assert launcher.launched[0].closed
+    assert pool.total_recycled == 1
+    print("✅ Browser replaced after max_uses leases")
+
+def test_recycle_on_memory_and_disconnect():
+    launcher = _FakeLauncher()
+    pool = _pool(launcher, max_memory_mb=500)
+
+    async def run():
+        await pool.start()
+        lease = await pool.acquire()
+        lease.pooled.memory_mb = lambda: 800.0
+        await pool.release(lease)
+        assert launcher.launched[0].closed and len(launcher.launched) == 2
+
+        # A browser that lost its connection is replaced on the next lease
+        launcher.launched[1].connected = False
+        async with pool.lease() as lease:
+            assert lease.browser is launcher.launched[2]
+        await pool.stop()
+
+    asyncio.run(run())
+    print("✅ Oversized and disconnected browsers replaced")
+
+def test_on_demand_launch_happens_once():
+    print("🚀 Testing on-demand launch of a browser type")
+    launcher = _FakeLauncher()
+    pool = _pool(launcher, max_contexts_per_browser=3)
+
+    async def run():
+        await pool.start()
+        leases = await asyncio.gather(*(pool.acquire("firefox") for _ in range(3)))
+        assert len({id(lease.browser) for lease in leases}) == 1
+        for lease in leases:
+            await pool.release(lease)
+        await pool.stop()
+
+    asyncio.run(run())
+    assert [browser.browser_type for browser in launcher.launched] == ["chromium", "firefox"]
+    print("✅ Concurrent first leases share one launched browser")
+
+def test_failed_relaunch_does_not_strand_waiters():
+    print("💥 Testing a failed browser relaunch")
+    launcher = _FakeLauncher()
+    pool = _pool(launcher, max_contexts_per_browser=1, max_uses=1)
+
+    async def run():
+        first = await pool.acquire()
+        waiter = asyncio.create_task(pool.acquire())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+
+        # The only browser retires on release and its replacement fails to launch
+        launcher.failing = True
+        await pool.release(first)
+        try:
+            await asyncio.wait_for(waiter, 1)
+            assert False, "lease granted without a browser"
+        except RuntimeError:
+            pass
+
+        launcher.failing = False
+        async with pool.lease() as lease:
+            assert lease.browser is launcher.launched[-1]
+        await pool.stop()
+
+    asyncio.run(run())
+    print("✅ Waiters relaunch on demand and see the launch error instead of hanging")
+
+def test_health_check_replaces_disconnected_idle_browsers():
+    launcher = _FakeLauncher()
+    pool = _pool(launcher, size_per_type=2)
+
+    async def run():
+        await pool.start()
+        busy = await pool.acquire()
+        idle = next(pooled for pooled in pool._browsers["chromium"] if pooled is not busy.pooled)
+        idle.browser.connected = False
+
+        report = await pool.health_check()
+        assert report == {"healthy": False, "replaced": 1}
+        assert idle.browser.closed and len(launcher.launched) == 3
+        assert idle not in pool._browsers["chromium"] and busy.pooled in pool._browsers["chromium"]
+        await pool.release(busy)
+        assert (await pool.health_check())["healthy"]
+        await pool.stop()
+
+    asyncio.run(run())
+    print("✅ Disconnected idle browser replaced by the health check")
+
+if __name__ == "__main__":
+    test_lease_and_release()
+    test_context_cap_blocks_until_release()
+    test_recycle_after_max_uses()
+    test_recycle_on_memory_and_disconnect()
+    test_on_demand_launch_happens_once()
+    test_failed_relaunch_does_not_strand_waiters()
+    test_health_check_replaces_disconnected_idle_browsers()
@@ -0,0 +1,51 @@
+# test_cross_browser_stream.py
+import asyncio
+
+from backend.automation.browser_controller import EnhancedBrowserController
+
+def _controller(durations, released):
+    """Controller whose per-browser run only sleeps and records when its lease is released"""
+    controller = EnhancedBrowserController.__new__(EnhancedBrowserController)
+
+    async def run_browser_test(task, browser):
+        try:
+            await asyncio.sleep(durations[browser])
+            return {"status": "success", "browser": browser}
+        finally:
+            released.append(browser)
+
+    controller._run_browser_test = run_browser_test
+    return controller
+
+def test_results_stream_in_completion_order():
+    print("🌊 Testing cross-browser result streaming")
+    released = []
+    controller = _controller({"chromium": 0.03, "firefox": 0.01, "webkit": 0.02}, released)
+
+    async def run():
+        return [browser async for browser, _ in controller.iter_cross_browser_test("task", max_parallel=3)]
+
+    assert asyncio.run(run()) == ["firefox", "webkit", "chromium"]
+    print("✅ Fastest browser reported first")
+
+def test_early_stop_cancels_and_awaits_pending_runs():
+    print("🛑 Testing early stop of a cross-browser run")
+    released = []
+    controller = _controller({"chromium": 0.01, "firefox": 5, "webkit": 5}, released)
+
+    async def run():
+        stream = controller.iter_cross_browser_test("task", max_parallel=3)
+        browser, _ = await stream.__anext__()
+        await stream.aclose()
+        # Cancelled runs have finished their cleanup by the time aclose() returns
+        assert sorted(released) == ["chromium", "firefox", "webkit"]
+        others = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        assert others == []
+        return browser
+
+    assert asyncio.run(run()) == "chromium"
+    print("✅ Pending runs cancelled and awaited, leases released")
+
+if __name__ == "__main__":
+    test_results_stream_in_completion_order()
+    test_early_stop_cancels_and_awaits_pending_runs()
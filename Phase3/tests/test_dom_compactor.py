@@ -0,0 +1,61 @@
+# test_dom_compactor.py
+from backend.agents.dom_compactor import DomCompactor, CompactionSettings, settings_for
+
+def _state(*lines):
+    return "<browser_state>\n" + "\n".join(lines) + "\n</browser_state>"
+
+PRODUCTS = [f"[{10 + i}]<a href=/product/{i}>Product {i} />" for i in range(20)]
+PRICES = [f"\tOrder {1000 + i}: $1{i}.99 shipped" for i in range(20)]
+
+def test_dedupe_and_truncate():
+    print("🗜️ Testing page state compaction")
+    compactor = DomCompactor(CompactionSettings(dedupe_after=3, max_text_chars=40))
+    text = "Task: buy\n" + _state("[1]<input name=search />", *PRODUCTS, *PRICES, "Lorem ipsum " * 20)
+    compacted = compactor.compact_message_text(text)
+
+    assert compacted.startswith("Task: buy\n<browser_state>")
+    # Every interactive element stays, only the run of similar text lines is collapsed
+    assert all(product in compacted for product in PRODUCTS)
+    assert PRICES[2] in compacted and PRICES[3] not in compacted
+    assert "17 more similar lines omitted" in compacted
+    assert max(len(line) for line in compacted.split("\n")) <= 41
+    report = compactor.get_report()
+    assert report["steps"][0]["tokens_after"] < report["steps"][0]["tokens_before"] and report["tokens_saved"] > 0
+    print(f"✅ {report['reduction']:.0%} fewer tokens on a product list page")
+
+def test_diff_shortens_unchanged_elements():
+    compactor = DomCompactor(CompactionSettings(dedupe_after=0, max_text_chars=200, max_unchanged_chars=20))
+    header = "[1]<nav aria-label='Main navigation with many links'>Home About Contact />"
+    compactor.compact(_state(header, "[2]<button>Add to cart />"))
+    second = compactor.compact(_state(header, "*[3]<div role=dialog>Added to cart: Product 1 />"))
+
+    assert header not in second and header[:20] in second
+    assert "*[3]<div role=dialog>Added to cart: Product 1 />" in second
+    print("✅ Elements sent on the previous step are shortened, new ones kept")
+
+def test_diff_ignores_renumbered_indices():
+    compactor = DomCompactor(CompactionSettings(dedupe_after=0, max_text_chars=200, max_unchanged_chars=20))
+    compactor.compact(_state("[1]<a href=/product/1>Product 1 with a long description />"))
+    second = compactor.compact(_state(
+        "[7]<a href=/product/1>Product 1 with a long description />",
+        "[1]<a href=/product/2>Product 2 with a long description />"
+    ))
+
+    assert "[7]<a href=/product/1>Product 1 with a long description />" not in second
+    assert "[1]<a href=/product/2>Product 2 with a long description />" in second
+    print("✅ Renumbered elements recognized by their content, new ones with the old index kept")
+
+def test_profiles():
+    assert settings_for("form_test").viewport_expansion == -1
+    assert settings_for("unknown_type") == settings_for(None)
+    assert settings_for("web_test", {"max_text_chars": 50}).max_text_chars == 50
+    # UI checks switch to their profile but keep the task's overrides
+    ui = settings_for("ui_test", {"diff": True})
+    assert ui.dedupe_after == 0 and ui.max_text_chars == 400 and ui.diff
+    print("✅ Per AgentType profiles with task overrides")
+
+if __name__ == "__main__":
+    test_dedupe_and_truncate()
+    test_diff_shortens_unchanged_elements()
+    test_diff_ignores_renumbered_indices()
+    test_profiles()
@@ -0,0 +1,45 @@
+# test_llm_cache.py
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+from backend.agents.llm_cache import LLMResponseCache, cache_key
+
+def _messages(step_info: str, page: str):
+    return [
+        SimpleNamespace(role="system", content="You are a web testing expert."),
+        SimpleNamespace(role="user", content=f"<step_info>{step_info}</step_info>\n{page}"),
+    ]
+
+def test_key_ignores_volatile_parts():
+    print("🔑 Testing cache key normalization")
+    first = _messages("Step 1 of 100 max possible steps\nCurrent date and time: 2026-10-19 09:00", "[1]<button>Login</button>")
+    later = _messages("Step 4 of 100 max possible steps\nCurrent date and time: 2026-10-20 17:42", "[1]<button>Login</button>  ")
+    other_page = _messages("Step 1 of 100 max possible steps", "[1]<button>Logout</button>")
+
+    assert cache_key("claude", first) == cache_key("claude", later)
+    assert cache_key("claude", first) != cache_key("claude", other_page)
+    assert cache_key("claude", first) != cache_key("claude-haiku", first)
+    print("✅ Timestamps and step counters do not change the key")
+
+def test_lru_and_ttl():
+    print("🗄️ Testing LRU eviction and TTL")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMResponseCache(str(Path(tmp) / "cache.sqlite"), max_entries=2, ttl=3600)
+        cache.put("a", "m", "A")
+        cache.put("b", "m", "B")
+        assert cache.get("a") == "A"  # a is now more recent than b
+        cache.put("c", "m", "C")
+        assert cache.get("b") is None and cache.get("a") == "A" and cache.get("c") == "C"
+        assert cache.evictions == 1
+
+        cache.ttl = -1
+        assert cache.get("a") is None
+        stats = cache.get_stats()
+        assert stats["entries"] == 1 and stats["hits"] == 3 and stats["misses"] == 2
+        cache.close()
+    print("✅ Least recently used entry evicted, expired entries ignored")
+
+if __name__ == "__main__":
+    test_key_ignores_volatile_parts()
+    test_lru_and_ttl()
@@ -0,0 +1,73 @@
+# test_llm_gateway.py
+import asyncio
+from types import SimpleNamespace
+
+from backend.agents.llm_gateway import LLMGateway, TaskUsage, TokenBucket, mark_static_prefix, price_of
+
+def test_token_bucket():
+    print("🪣 Testing token bucket")
+    bucket = TokenBucket(per_minute=600)  # 10 per second
+    assert bucket.time_until(600) == 0
+    bucket.consume(600)
+    assert 0.9 < bucket.time_until(10) <= 1.0
+    # Larger than the bucket: wait for a full bucket, never forever
+    assert bucket.time_until(10_000) <= 60.0
+    print("✅ Refill rate and oversize requests handled")
+
+def test_priority_order():
+    print("🚦 Testing priority queue")
+
+    async def scenario():
+        gateway = LLMGateway(requests_per_minute=600, tokens_per_minute=1_000_000)
+        gateway.request_bucket.level = 0  # next slot in 0.1s
+        order = []
+
+        async def call(name, priority, delay):
+            await asyncio.sleep(delay)
+            await gateway._admit(10, priority)
+            order.append(name)
+
+        await asyncio.gather(call("low", 1, 0), call("normal", 3, 0.01), call("critical", 5, 0.02))
+        return order
+
+    assert asyncio.run(scenario()) == ["critical", "normal", "low"]
+    print("✅ Critical tasks admitted first")
+
+def test_usage_accounting():
+    gateway = LLMGateway(requests_per_minute=60, tokens_per_minute=10_000)
+    usage = TaskUsage()
+    response = SimpleNamespace(usage=SimpleNamespace(
+        prompt_tokens=1000, completion_tokens=200, prompt_cached_tokens=None, prompt_cache_creation_tokens=None
+    ))
+    gateway._account("claude-3-5-sonnet-20241022", response, estimated=500, usage=usage)
+
+    assert usage.requests == 1 and usage.input_tokens == 1000 and usage.output_tokens == 200
+    assert abs(usage.cost_usd - (1000 * 3 + 200 * 15) / 1_000_000) < 1e-9
+    assert gateway.total.cost_usd == usage.cost_usd
+    # Only the reservation was taken up front; the remainder is settled afterwards
+    assert gateway.token_bucket.level < 10_000 - 700 + 1
+    assert price_of("unknown-model") == (0.0, 0.0)
+    print("✅ Tokens and cost recorded per task and in total")
+
+def test_prompt_cache_accounting():
+    print("🧊 Testing prompt cache accounting")
+    messages = [SimpleNamespace(role="system", content="static", cache=False), SimpleNamespace(role="user", content="page")]
+    mark_static_prefix(messages)
+    assert messages[0].cache is True and not hasattr(messages[1], "cache")
+
+    gateway = LLMGateway(requests_per_minute=60, tokens_per_minute=10_000)
+    usage = TaskUsage()
+    response = SimpleNamespace(usage=SimpleNamespace(
+        prompt_tokens=5000, completion_tokens=100, prompt_cached_tokens=4000, prompt_cache_creation_tokens=0
+    ))
+    gateway._account("claude-3-5-sonnet-20241022", response, estimated=5000, usage=usage)
+
+    assert usage.cache_read_tokens == 4000 and usage.cache_write_tokens == 0
+    assert abs(usage.cost_usd - (1000 * 3 + 4000 * 0.3 + 100 * 15) / 1_000_000) < 1e-9
+    print("✅ Cache reads recorded and billed at the cached rate")
+
+if __name__ == "__main__":
+    test_token_bucket()
+    test_priority_order()
+    test_usage_accounting()
+    test_prompt_cache_accounting()
@@ -0,0 +1,66 @@
+# test_load_tester.py
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from backend.automation.load_tester import LoadTester, LoadProfile, CapturedStep
+from backend.scenarios.scenario_builder import ScenarioBuilder, ScenarioType, ActionType
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        status = 500 if self.path.startswith("/broken") else 200
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.end_headers()
+        self.wfile.write(b"ok" if status == 200 else b"error")
+
+    def log_message(self, format, *args):
+        pass
+
+def _serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_ramp_profile():
+    print("📈 Testing load profile ramp")
+    profile = LoadProfile(users=10, ramp_up=10, hold=10, ramp_down=10)
+
+    assert profile.target_users(0) == 1
+    assert profile.target_users(5) == 5
+    assert profile.target_users(15) == 10
+    assert profile.target_users(25) == 5
+    assert profile.target_users(30) == 0
+    print("✅ Ramp up, hold and ramp down targets correct")
+
+def test_http_replay_against_local_server():
+    print("🔥 Testing HTTP replay against a local server")
+    server, base_url = _serve()
+    try:
+        scenario = (ScenarioBuilder()
+                    .create_scenario("load", "Load", "", ScenarioType.PERFORMANCE, base_url)
+                    .add_action(ActionType.NAVIGATE, "/")
+                    .build())
+        steps = [
+            CapturedStep("main:0:navigate", [{"method": "GET", "url": f"{base_url}/", "headers": {}, "body": None}]),
+            CapturedStep("main:1:click", [{"method": "GET", "url": f"{base_url}/broken", "headers": {}, "body": None}])
+        ]
+        profile = LoadProfile(users=4, browser_users=0, ramp_up=0.4, hold=0.8, ramp_down=0.4, think_time=0.05)
+
+        result = asyncio.run(LoadTester(None, profile).run(scenario, steps=steps))
+    finally:
+        server.shutdown()
+
+    metrics = result["result"]["performance_metrics"]
+    ok = metrics["steps"]["http:main:0:navigate"]
+    broken = metrics["steps"]["http:main:1:click"]
+
+    assert ok["count"] > 4 and ok["errors"] == 0
+    assert broken["errors"] == broken["count"] > 0
+    assert sum(ok["buckets"].values()) == ok["count"]
+    assert max(bucket["active_users"] for bucket in metrics["timeline"]) == 4
+    print(f"✅ {metrics['total_step_executions']} step executions, error rate {metrics['error_rate']:.0%}")
+
+if __name__ == "__main__":
+    test_ramp_profile()
+    test_http_replay_against_local_server()
@@ -0,0 +1,53 @@
+# test_mcp_install.py
+import json
+import tempfile
+from pathlib import Path
+
+from backend.automation import mcp_client
+from backend.utils.config import Config
+
+def _install(prefix: Path, version: str):
+    package_dir = prefix / "node_modules" / "@playwright" / "mcp"
+    package_dir.mkdir(parents=True)
+    (package_dir / "package.json").write_text(json.dumps({
+        "name": "@playwright/mcp", "version": version, "bin": {"mcp-server-playwright": "cli.js"}
+    }))
+    (package_dir / "cli.js").write_text("")
+
+def _resolve(prefix: Path, version: str):
+    saved = Config.MCP_SERVER_PREFIX, Config.MCP_SERVER_VERSION, Config.MCP_SERVER_BIN
+    Config.MCP_SERVER_PREFIX, Config.MCP_SERVER_VERSION, Config.MCP_SERVER_BIN = str(prefix), version, None
+    try:
+        return mcp_client.resolve_server_command()
+    finally:
+        Config.MCP_SERVER_PREFIX, Config.MCP_SERVER_VERSION, Config.MCP_SERVER_BIN = saved
+
+def test_pinned_install_runs_cli_directly():
+    print("📌 Testing pinned MCP server resolution")
+    with tempfile.TemporaryDirectory() as tmp:
+        prefix = Path(tmp)
+        _install(prefix, "1.2.3")
+
+        command = _resolve(prefix, "1.2.3")
+        assert command[-1] == str(prefix / "node_modules" / "@playwright" / "mcp" / "cli.js")
+        assert "npx" not in " ".join(command)
+
+        try:
+            _resolve(prefix, "9.9.9")
+            assert False, "version mismatch accepted"
+        except RuntimeError as e:
+            assert "--bootstrap" in str(e)
+    print("✅ Installed version used directly, mismatch reported")
+
+def test_missing_install_explains_bootstrap():
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            _resolve(Path(tmp), "1.2.3")
+            assert False, "missing install accepted"
+        except RuntimeError as e:
+            assert "not installed" in str(e) and "MCP_SERVER_BIN" in str(e)
+    print("✅ Missing install reported with bootstrap instructions")
+
+if __name__ == "__main__":
+    test_pinned_install_runs_cli_directly()
+    test_missing_install_explains_bootstrap()
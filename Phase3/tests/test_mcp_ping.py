@@ -0,0 +1,51 @@
+# test_mcp_ping.py
+import json
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from backend.automation.mcp_client import PlaywrightMCPClient
+
+class _FakeMCPHandler(BaseHTTPRequestHandler):
+    """Minimal streamable-HTTP MCP endpoint answering initialize and ping over SSE"""
+
+    def do_POST(self):
+        message = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if "id" not in message:
+            self.send_response(202)
+            self.end_headers()
+            return
+
+        result = {"protocolVersion": "2025-03-26", "capabilities": {}} if message["method"] == "initialize" else {}
+        body = f"event: message\ndata: {json.dumps({'jsonrpc': '2.0', 'id': message['id'], 'result': result})}\n\n"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("mcp-session-id", "test-session")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def do_DELETE(self):
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+def test_ping_speaks_mcp():
+    print("🏓 Testing MCP protocol ping")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeMCPHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = PlaywrightMCPClient()
+    try:
+        assert asyncio.run(client.ping(server.server_address[1]))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # Nothing listening any more
+    assert not asyncio.run(client.ping(server.server_address[1], timeout=1))
+    print("✅ Ping succeeds against an MCP endpoint and fails when it is gone")
+
+if __name__ == "__main__":
+    test_ping_speaks_mcp()
@@ -0,0 +1,84 @@
+# test_mcp_pool.py
+import asyncio
+
+from backend.automation.mcp_pool import MCPServerPool, get_mcp_server_pool
+
+class _RunningProcess:
+    pid = 4242
+    returncode = None
+
+def _pool(instances: int, max_sessions: int) -> MCPServerPool:
+    pool = MCPServerPool(instances=instances, base_port=3101, max_sessions_per_instance=max_sessions)
+    for instance in pool.instances:
+        instance.client.is_running = True
+        instance.client.process = _RunningProcess()
+    return pool
+
+def test_sessions_balance_across_instances():
+    print("⚖️ Testing MCP session balancing")
+
+    async def scenario():
+        pool = _pool(instances=3, max_sessions=2)
+        sessions = [await pool.acquire() for _ in range(6)]
+        assert [instance.active_sessions for instance in pool.instances] == [2, 2, 2]
+        assert sorted({s.port for s in sessions}) == [3101, 3102, 3103]
+
+        # All instances full: the next caller waits until a slot is released
+        waiter = asyncio.create_task(pool.acquire())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        await pool.release(sessions[0])
+        session = await asyncio.wait_for(waiter, timeout=1)
+        assert session.port == sessions[0].port
+
+    asyncio.run(scenario())
+    print("✅ Least-loaded instance chosen and per-instance cap enforced")
+
+def test_sessions_of_restarted_instance_are_not_released_twice():
+    async def scenario():
+        pool = _pool(instances=1, max_sessions=4)
+        session = await pool.acquire()
+        instance = pool.instances[0]
+
+        # Simulate what a restart does to the bookkeeping
+        instance.generation += 1
+        instance.active_sessions = 0
+
+        await pool.release(session)
+        assert instance.active_sessions == 0
+        assert pool.get_stats()["instances"][0]["total_sessions"] == 1
+
+    asyncio.run(scenario())
+    print("✅ Stale sessions ignored after restart")
+
+def test_optional_sessions_without_running_instances():
+    print("🔌 Testing sessions when no MCP server runs")
+
+    async def scenario():
+        pool = MCPServerPool(instances=2, base_port=3101)
+        async with pool.session(required=False) as session:
+            assert session is None
+        try:
+            await pool.acquire()
+            assert False, "session granted without a running instance"
+        except RuntimeError:
+            pass
+
+        running = _pool(instances=1, max_sessions=1)
+        async with running.session(required=False) as session:
+            assert session.port == 3101 and running.instances[0].active_sessions == 1
+        assert running.instances[0].active_sessions == 0
+
+    asyncio.run(scenario())
+    assert get_mcp_server_pool() is get_mcp_server_pool()
+    try:
+        MCPServerPool(instances=0)
+        assert False, "empty pool accepted"
+    except ValueError:
+        pass
+    print("✅ Optional callers run without MCP, slots released on exit")
+
+if __name__ == "__main__":
+    test_sessions_balance_across_instances()
+    test_sessions_of_restarted_instance_are_not_released_twice()
+    test_optional_sessions_without_running_instances()
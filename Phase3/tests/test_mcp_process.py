@@ -0,0 +1,90 @@
+# test_mcp_process.py
+import sys
+import time
+import asyncio
+
+from backend.automation.mcp_client import PlaywrightMCPClient
+
+# Stand-in MCP server: writes a line longer than the StreamReader limit, floods stderr well
+# past the pipe buffer, prints a ready line, serves /mcp
+FAKE_SERVER = r'''
+import sys, json
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+port = int(sys.argv[sys.argv.index("--port") + 1])
+sys.stderr.write("y" * 200000 + "\n")
+for i in range(3000):
+    sys.stderr.write(f"debug line {i} " + "x" * 60 + "\n")
+sys.stderr.flush()
+
+class Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        message = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if "id" not in message:
+            self.send_response(202)
+            self.end_headers()
+            return
+        body = json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": {}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+server = HTTPServer(("127.0.0.1", port), Handler)
+print(f"Listening on http://localhost:{port}", flush=True)
+server.serve_forever()
+'''
+
+class _FakeServerClient(PlaywrightMCPClient):
+    def _server_command(self):
+        return [sys.executable, "-c", FAKE_SERVER]
+
+def test_server_output_is_drained_and_ready_detected():
+    print("🚰 Testing MCP subprocess output draining")
+
+    async def scenario():
+        client = _FakeServerClient()
+        started = time.monotonic()
+        assert await client.start_server(port=3199)
+        startup = time.monotonic() - started
+
+        assert await client.health_check()
+        logs = client.get_recent_logs(limit=1000)
+        assert len(logs) == client.LOG_BUFFER_LINES
+        assert any("Listening on" in entry["line"] for entry in logs)
+
+        await client.stop_server()
+        assert not client.process_alive
+        return startup
+
+    startup = asyncio.run(scenario())
+    assert startup < 10
+    print(f"✅ Server ready in {startup:.2f}s despite ~400KB of stderr")
+
+def test_long_lines_are_truncated_not_fatal():
+    print("📏 Testing output lines longer than the stream limit")
+    client = PlaywrightMCPClient.__new__(PlaywrightMCPClient)
+    client.logs = []
+    client._ready_line = None
+
+    async def scenario():
+        stream = asyncio.StreamReader(limit=1024)
+        stream.feed_data(b"a" * 70000 + b"\nnext line\n" + b"b" * 10)
+        stream.feed_eof()
+        await client._drain(stream, "stderr", 3199)
+
+    asyncio.run(scenario())
+    lines = [entry["line"] for entry in client.logs]
+    assert len(lines) == 3
+    assert lines[0].startswith("a" * 100) and lines[0].endswith("[truncated]")
+    assert len(lines[0]) < client.MAX_LINE_BYTES + 20
+    assert lines[1:] == ["next line", "b" * 10]
+    print("✅ Draining continues after a 70,000 character line")
+
+if __name__ == "__main__":
+    test_server_output_is_drained_and_ready_detected()
+    test_long_lines_are_truncated_not_fatal()
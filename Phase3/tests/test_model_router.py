@@ -0,0 +1,86 @@
+# test_model_router.py
+import asyncio
+from types import SimpleNamespace
+
+from backend.agents.model_router import ModelRouter, SMALL, LARGE, route_stats
+
+class _Action:
+    def __init__(self, name):
+        self.name = name
+
+    def model_dump(self, exclude_unset=True):
+        return {self.name: {}}
+
+class _FakeLLM:
+    def __init__(self, name, action="click_element_by_index", fail=False):
+        self.model = name
+        self.action = action
+        self.fail = fail
+        self.calls = 0
+
+    async def ainvoke(self, messages, output_format=None):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        return SimpleNamespace(completion=SimpleNamespace(action=[_Action(self.action)]))
+
+def _messages(*steps):
+    history = "".join(f"<step_{i}>\nAction Results:\n{text}\n</step_{i}>" for i, text in enumerate(steps, 1))
+    return [SimpleNamespace(role="system", content="static"), SimpleNamespace(role="user", content=history)]
+
+def _results(error=None):
+    return [SimpleNamespace(error=error, extracted_content="Clicked button")]
+
+def _choose(router, steps, error=None):
+    router.observe_step(_results(error))
+    return router.choose(_messages(*steps))
+
+def test_routing_decisions():
+    print("🔀 Testing step routing")
+    router = ModelRouter(small=_FakeLLM("haiku"), large=_FakeLLM("sonnet"), escalation_steps=1)
+
+    assert router.choose(_messages()) == LARGE  # first step plans the task
+    router._last_route = LARGE
+    steps = ["Clicked button"]
+    assert _choose(router, steps) == SMALL
+    steps.append("Action 1/1: Element with index 12 does not exist")
+    assert _choose(router, steps, error="Element with index 12 does not exist") == LARGE
+    steps.append("Typed text")
+    assert _choose(router, steps) == LARGE
+    steps.append("Clicked")
+    assert _choose(router, steps) == SMALL
+    assert router.model == "sonnet"
+    print("✅ Routine steps small, first step and failures large")
+
+def test_benign_error_wording_does_not_escalate():
+    print("🔍 Testing that step text alone does not escalate")
+    router = ModelRouter(small=_FakeLLM("haiku"), large=_FakeLLM("sonnet"), escalation_steps=1)
+    router._last_route = SMALL
+    step = ("Evaluation of Previous Step: Success - submitted the form, verified no error message is shown\n"
+            "Action 1/1: Page shows 'Login failed attempts: 0'")
+    assert _choose(router, ["Clicked button", step]) == SMALL
+    assert route_stats.routes[SMALL]["step_successes"] >= 1
+    print("✅ Only ActionResult.error counts as a failed step")
+
+def test_escalation():
+    print("⬆️ Testing escalation")
+    before = route_stats.escalations
+
+    small, large = _FakeLLM("haiku", action="done"), _FakeLLM("sonnet")
+    router = ModelRouter(small=small, large=large, escalation_steps=0)
+    asyncio.run(router.ainvoke(_messages("Clicked button")))
+    assert small.calls == 1 and large.calls == 1  # "done" confirmed by the large model
+
+    small, large = _FakeLLM("haiku", fail=True), _FakeLLM("sonnet")
+    router = ModelRouter(small=small, large=large, escalation_steps=0)
+    asyncio.run(router.ainvoke(_messages("Clicked button")))
+    assert large.calls == 1
+
+    assert route_stats.escalations == before + 2
+    assert route_stats.to_dict()[SMALL]["errors"] >= 1
+    print("✅ Ambiguous and failed small-model steps escalated")
+
+if __name__ == "__main__":
+    test_routing_decisions()
+    test_benign_error_wording_does_not_escalate()
+    test_escalation()
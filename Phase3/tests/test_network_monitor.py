@@ -0,0 +1,116 @@
+# test_network_monitor.py
+import asyncio
+
+from backend.automation.network_monitor import NetworkMonitor, site_of, validate_block_profiles
+
+class _FakeResponse:
+    def __init__(self, status=200):
+        self.status = status
+        self.from_service_worker = False
+
+class _FakeRequest:
+    def __init__(self, url, resource_type="document", status=200, duration=10, body=1000, cached=False):
+        self.url = url
+        self.resource_type = resource_type
+        self.timing = {"requestStart": -1 if cached else 1, "responseEnd": duration}
+        self._response = _FakeResponse(status)
+        self._body = body
+
+    async def response(self):
+        return self._response
+
+    async def sizes(self):
+        return {"responseHeadersSize": 100, "responseBodySize": self._body}
+
+class _FakeRoute:
+    def __init__(self, request):
+        self.request = request
+        self.outcome = None
+
+    async def abort(self, error_code=None):
+        self.outcome = "aborted"
+
+    async def continue_(self):
+        self.outcome = "continued"
+
+def test_first_party_site():
+    print("🌐 Testing first-party site detection")
+    assert site_of("www.shop.example.com") == "example.com"
+    assert site_of("cdn.example.com:8443") == "example.com"
+    assert site_of("localhost:8000") == "localhost"
+    assert site_of("127.0.0.1") == "127.0.0.1"
+    print("✅ Sites resolved")
+
+def test_blocking_profiles():
+    print("🚫 Testing blocking profiles")
+    monitor = NetworkMonitor(["no_media", "no_fonts", "no_third_party"], first_party="app.example.com")
+    assert monitor.blocked_types == {"image", "media", "font"}
+    assert monitor.block_third_party and monitor.first_party == "example.com"
+
+    for profiles in (["no_ads"], ["no_media", "no_ads"]):
+        try:
+            validate_block_profiles(profiles)
+            assert False, "unknown profile accepted"
+        except ValueError as e:
+            assert "no_ads" in str(e)
+    assert validate_block_profiles(None) == []
+    print("✅ Profiles combined, unknown profiles rejected")
+
+def test_route_blocks_matching_requests():
+    print("🛣️ Testing request routing")
+    monitor = NetworkMonitor(["no_media", "no_third_party"], first_party="shop.example.com")
+    requests = {
+        "page": _FakeRequest("https://shop.example.com/"),
+        "cdn_script": _FakeRequest("https://cdn.example.com/app.js", "script"),
+        "image": _FakeRequest("https://shop.example.com/logo.png", "image"),
+        "tracker": _FakeRequest("https://tracker.net/t.js", "script"),
+        "font": _FakeRequest("https://shop.example.com/font.woff2", "font")
+    }
+    routes = {name: _FakeRoute(request) for name, request in requests.items()}
+
+    async def run():
+        for route in routes.values():
+            await monitor._route(route)
+
+    asyncio.run(run())
+    assert {name for name, route in routes.items() if route.outcome == "aborted"} == {"image", "tracker"}
+    assert all(route.outcome == "continued" for name, route in routes.items() if name not in {"image", "tracker"})
+    assert monitor.blocked == 2
+
+    # Aborted requests are reported as failed by Playwright but counted as blocked only
+    monitor._on_failed(requests["image"])
+    monitor._on_failed(_FakeRequest("https://shop.example.com/api", "fetch"))
+    assert monitor.failed == 1
+    print("✅ Media and third-party requests aborted, the rest continued")
+
+def test_summary():
+    print("📊 Testing network summary")
+    monitor = NetworkMonitor(first_party="shop.example.com")
+
+    async def run():
+        for request in (
+            _FakeRequest("https://shop.example.com/", duration=120, body=5000),
+            _FakeRequest("https://shop.example.com/app.js", "script", duration=300, body=20000),
+            _FakeRequest("https://shop.example.com/app.css", "stylesheet", status=304, body=0),
+            _FakeRequest("https://shop.example.com/lib.js", "script", duration=5, cached=True),
+            _FakeRequest("https://tracker.net/t.js", "script", duration=50, body=900)
+        ):
+            monitor._on_finished(request)
+        return await monitor.summary(slowest=2)
+
+    summary = asyncio.run(run())
+    assert summary["request_count"] == 5
+    assert summary["total_bytes"] == 5100 + 20100 + 100 + 1100 + 1000
+    assert summary["by_type"]["script"] == {"requests": 3, "bytes": 20100 + 1100 + 1000}
+    assert summary["third_party_requests"] == 1
+    assert summary["cache_hit_ratio"] == 2 / 5  # the 304 and the response served without a request
+    assert [r["url"] for r in summary["slowest_requests"]] == [
+        "https://shop.example.com/app.js", "https://shop.example.com/"
+    ]
+    print("✅ Bytes, types, third parties, cache hits and slowest requests summarized")
+
+if __name__ == "__main__":
+    test_first_party_site()
+    test_blocking_profiles()
+    test_route_blocks_matching_requests()
+    test_summary()
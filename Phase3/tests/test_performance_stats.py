@@ -0,0 +1,28 @@
+# test_performance_stats.py
+from backend.automation.performance_probe import summarize_runs, check_budgets
+from backend.utils.stats import percentile
+
+def test_median_and_p95_across_runs():
+    print("⏱️ Testing performance run aggregation")
+    runs = [{"lcp_ms": value, "cls": 0.01, "js_heap_used_mb": None} for value in [900, 1000, 1100, 1200, 4000]]
+
+    summary = summarize_runs(runs)
+
+    assert summary["lcp_ms"]["median"] == 1100
+    assert summary["lcp_ms"]["p95"] == 4000
+    assert summary["lcp_ms"]["samples"] == 5
+    assert "js_heap_used_mb" not in summary
+    assert percentile(list(range(1, 101)), 95) == 95
+    print("✅ Median and p95 computed, missing metrics skipped")
+
+def test_budgets_use_median():
+    summary = summarize_runs([{"lcp_ms": 2000, "cls": 0.3}, {"lcp_ms": 2400, "cls": 0.2}, {"lcp_ms": 9000, "cls": 0.25}])
+
+    assertions = {a["assertion"]: a["passed"] for a in check_budgets(summary, {"lcp_ms": 2500, "cls": 0.1, "inp_ms": 200})}
+
+    assert assertions == {"lcp_ms <= 2500": True, "cls <= 0.1": False}
+    print("✅ Budgets checked against medians")
+
+if __name__ == "__main__":
+    test_median_and_p95_across_runs()
+    test_budgets_use_median()
@@ -0,0 +1,90 @@
+# test_responsive_hashing.py
+import io
+import asyncio
+import tempfile
+
+from PIL import Image, ImageDraw
+
+from backend.automation.responsive_tester import GRID, ResponsiveTester, tile_hashes, hamming
+
+def _page(block_at=None, height=800) -> bytes:
+    image = Image.new("RGB", (400, height), "white")
+    draw = ImageDraw.Draw(image)
+    for y in range(0, height, 40):
+        draw.rectangle((20, y + 10, 380, y + 20), fill="black")
+    if block_at is not None:
+        draw.rectangle(block_at, fill="red")
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def test_identical_screenshots_match():
+    print("🖼️ Testing perceptual hashes of identical screenshots")
+    assert tile_hashes(_page()) == tile_hashes(_page())
+    print("✅ Identical screenshots hash the same")
+
+def test_changed_region_is_localized():
+    print("🖼️ Testing visual change localization")
+    baseline = tile_hashes(_page())
+    changed = tile_hashes(_page(block_at=(300, 600, 400, 800)))
+
+    distances = [hamming(a, b) for a, b in zip(baseline, changed)]
+    changed_tiles = [index for index, distance in enumerate(distances) if distance > 16]
+
+    assert changed_tiles == [GRID * GRID - 1]
+    print(f"✅ Change detected only in tile {changed_tiles}")
+
+def _tester():
+    root = tempfile.mkdtemp()
+    return ResponsiveTester(None, screenshots_dir=f"{root}/shots", baselines_dir=f"{root}/baselines")
+
+def _compare(tester, png_bytes, page_height):
+    return tester._compare_with_baseline("site", "Mobile", png_bytes, tile_hashes(png_bytes),
+                                         {"page_height": page_height}, False)
+
+def test_taller_page_compares_overlap_only():
+    print("📏 Testing baseline comparison after a page height change")
+    tester = _tester()
+    assert _compare(tester, _page(), 800)["status"] == "baseline_created"
+
+    # Same content on a longer page: every full-page tile moves, the overlap does not
+    comparison = _compare(tester, _page(height=1200), 1200)
+    assert comparison["changed_tiles"] == []
+    assert comparison["compared_height"] == 800
+    assert comparison["height_changed"] and comparison["baseline_page_height"] == 800
+
+    # A real change inside the overlap is still localized to its tile
+    comparison = _compare(tester, _page(block_at=(300, 600, 400, 800), height=1200), 1200)
+    assert [(tile["row"], tile["col"]) for tile in comparison["changed_tiles"]] == [(GRID - 1, GRID - 1)]
+    print("✅ Height change reported, only overlapping tiles compared")
+
+def test_status_follows_regressions():
+    tester = _tester()
+
+    def run(*statuses):
+        async def check_viewport(url, viewport, browser, update_baselines):
+            status = statuses[viewport["width"]]
+            result = {"viewport": f"viewport {viewport['width']}", "status": status,
+                      "regressions": ["Page height changed"] if status == "regression" else []}
+            if status == "error":
+                result["error"] = "navigation failed"
+            return result
+
+        tester._check_viewport = check_viewport
+        viewports = [{"width": index, "height": 1} for index in range(len(statuses))]
+        return asyncio.run(tester.run("https://example.com", viewports))
+
+    result = run("passed", "passed")
+    assert result["status"] == "success" and "error" not in result
+    result = run("passed", "regression")
+    assert result["status"] == "regression" and result["regressions_found"] == 1
+    assert "Page height changed" in result["error"]
+    result = run("error", "regression")
+    assert result["status"] == "error" and result["error"] == "viewport 0: navigation failed"
+    print("✅ Overall status set from regressions and errors")
+
+if __name__ == "__main__":
+    test_identical_screenshots_match()
+    test_changed_region_is_localized()
+    test_taller_page_compares_overlap_only()
+    test_status_follows_regressions()
@@ -0,0 +1,89 @@
+# test_run_budget.py
+import asyncio
+from types import SimpleNamespace
+
+from backend.agents.run_budget import RunGuard, budget_for
+from backend.agents.step_profiler import StepProfiler
+
+class _Action:
+    def __init__(self, **params):
+        self.params = params
+
+    def model_dump(self, exclude_unset=False):
+        return self.params
+
+class _FakeAgent:
+    def __init__(self):
+        self.state = SimpleNamespace(history=SimpleNamespace(history=[]))
+        self.stopped = False
+
+    def do(self, url, **action):
+        output = SimpleNamespace(action=[_Action(**action)])
+        self.state.history.history.append(SimpleNamespace(model_output=output, state=SimpleNamespace(url=url)))
+
+    def stop(self):
+        self.stopped = True
+
+def _step(profiler, tokens=0):
+    profiler.steps.append({"input_tokens": tokens, "output_tokens": 0})
+
+def test_budget_profiles():
+    print("💰 Testing budget profiles")
+    assert budget_for("form_test").max_steps > budget_for(None).max_steps
+    assert budget_for("unknown_type") == budget_for(None)
+    assert budget_for("web_test", {"max_steps": 5}).max_steps == 5
+    assert budget_for("web_test").max_steps == 25  # overrides do not leak into the profile
+    print("✅ Per agent type budgets with overrides")
+
+def test_loop_detection():
+    profiler = StepProfiler()
+    guard = RunGuard(budget_for(None, {"loop_threshold": 3}), profiler)
+    agent = _FakeAgent()
+
+    async def run():
+        for index in range(2):
+            agent.do("https://example.com", click_element_by_index={"index": index})
+            _step(profiler)
+            await guard.check(agent)
+        assert not agent.stopped
+        for _ in range(3):
+            agent.do("https://example.com", click_element_by_index={"index": 7})
+            _step(profiler)
+            await guard.check(agent)
+
+    asyncio.run(run())
+    assert agent.stopped and guard.failed
+    assert "loop detected" in guard.stop_reason
+    print("✅ Repeated identical action stops the run")
+
+def test_token_budget():
+    profiler = StepProfiler()
+    guard = RunGuard(budget_for(None, {"max_tokens": 10_000}), profiler)
+    agent = _FakeAgent()
+
+    async def run():
+        for index in range(3):
+            agent.do("https://example.com", scroll_down={"amount": index})
+            _step(profiler, tokens=4_000)
+            await guard.check(agent)
+
+    asyncio.run(run())
+    assert agent.stopped and "token budget" in guard.stop_reason
+    assert guard.report()["steps"] == 3
+    print("✅ Token budget stops the run")
+
+def test_step_budget_exhausted():
+    profiler = StepProfiler()
+    guard = RunGuard(budget_for(None, {"max_steps": 2}), profiler)
+    _step(profiler)
+    assert guard.remaining_steps == 1
+    _step(profiler)
+    guard.finish(SimpleNamespace(is_done=lambda: False))
+    assert guard.failed and "step budget" in guard.stop_reason
+    print("✅ Unfinished run at max_steps reported as failed")
+
+if __name__ == "__main__":
+    test_budget_profiles()
+    test_loop_detection()
+    test_token_budget()
+    test_step_budget_exhausted()
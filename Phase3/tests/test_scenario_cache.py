@@ -0,0 +1,82 @@
+# test_scenario_cache.py
+import os
+import tempfile
+from pathlib import Path
+
+from backend.scenarios.scenario_builder import ScenarioBuilder, ScenarioTemplates
+from backend.scenarios.scenario_cache import ScenarioCache
+
+def _write_scenarios(scenarios_dir: str, count: int):
+    """``count`` login scenarios, one YAML file each, differing only in id"""
+    builder = ScenarioBuilder()
+    builder.scenarios_dir = Path(scenarios_dir)
+    builder.current_scenario = ScenarioTemplates.login_flow()
+    template = Path(builder.save("template.yaml"))
+    text = template.read_text(encoding="utf-8")
+    template.unlink()
+
+    for index in range(count):
+        Path(scenarios_dir, f"s{index:05d}.yaml").write_text(
+            text.replace("id: user_login", f"id: s{index:05d}"), encoding="utf-8"
+        )
+
+def _bump_mtime(path: str):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+def test_cache_round_trip():
+    print("📦 Testing scenario cache round trip")
+    with tempfile.TemporaryDirectory() as root:
+        scenarios_dir = os.path.join(root, "scenarios")
+        cache_path = os.path.join(root, "scenarios.pkl")
+        os.mkdir(scenarios_dir)
+        _write_scenarios(scenarios_dir, 20)
+
+        cold = ScenarioCache(cache_path)
+        scenarios = ScenarioBuilder.load_all_scenarios(scenarios_dir, cache=cold)
+        assert len(scenarios) == 20 and cold.misses == 20 and cold.hits == 0
+
+        # New process: everything comes from the pickle, nothing is parsed
+        warm = ScenarioCache(cache_path)
+        reloaded = {s.id: s for s in ScenarioBuilder.load_all_scenarios(scenarios_dir, cache=warm)}
+        assert warm.misses == 0 and warm.hits == 20
+        assert reloaded["s00003"] == next(s for s in scenarios if s.id == "s00003")
+        print("✅ Warm load parses nothing")
+
+        # Touched but unchanged: stat differs, content digest matches, no re-parse
+        _bump_mtime(os.path.join(scenarios_dir, "s00001.yaml"))
+        # Edited: only this file is re-parsed
+        edited = os.path.join(scenarios_dir, "s00002.yaml")
+        Path(edited).write_text(
+            Path(edited).read_text(encoding="utf-8").replace("User Login Flow", "Edited Login Flow"),
+            encoding="utf-8"
+        )
+        _bump_mtime(edited)
+
+        again = ScenarioCache(cache_path)
+        reloaded = {s.id: s for s in ScenarioBuilder.load_all_scenarios(scenarios_dir, cache=again)}
+        assert again.misses == 1 and again.hits == 19
+        assert reloaded["s00002"].name == "Edited Login Flow"
+        assert reloaded["s00001"].name == "User Login Flow"
+        print("✅ Only the edited scenario is re-parsed")
+
+def test_warm_load_of_10k_scenarios():
+    print("⚡ Testing warm load of 10k scenarios")
+    with tempfile.TemporaryDirectory() as root:
+        scenarios_dir = os.path.join(root, "scenarios")
+        cache_path = os.path.join(root, "scenarios.pkl")
+        os.mkdir(scenarios_dir)
+        _write_scenarios(scenarios_dir, 10_000)
+
+        ScenarioBuilder.load_all_scenarios(scenarios_dir, cache=ScenarioCache(cache_path))
+
+        # Timing lives in tests/bench_scenario_cache.py; here: nothing is parsed again
+        cache = ScenarioCache(cache_path)
+        scenarios = ScenarioBuilder.load_all_scenarios(scenarios_dir, cache=cache)
+        assert len(scenarios) == 10_000
+        assert cache.misses == 0 and cache.hits == 10_000
+        print("✅ 10k scenarios served from the cache")
+
+if __name__ == "__main__":
+    test_cache_round_trip()
+    test_warm_load_of_10k_scenarios()
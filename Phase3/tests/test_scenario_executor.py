@@ -0,0 +1,190 @@
+# test_scenario_executor.py
+import asyncio
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from playwright.async_api import async_playwright
+
+from backend.automation.scenario_executor import ScenarioExecutor
+from backend.scenarios.scenario_builder import ScenarioBuilder, ScenarioType, ActionType, TestAction
+
+PAGES = {
+    "/": b"""<html><body>
+        <input id="name">
+        <select id="color"><option value="red">Red</option><option value="blue">Blue</option></select>
+        <button id="submit" onclick="document.getElementById('greeting').textContent =
+            'Hello ' + document.getElementById('name').value + ' (' + document.getElementById('color').value + ')'">Go</button>
+        <p id="greeting"></p>
+        <div id="hover" onmouseover="document.getElementById('hovered').style.display = 'block'">Hover me</div>
+        <p id="hovered" style="display: none">Hovered</p>
+        <button id="reset" onclick="window.tornDown = true">Reset</button>
+        <div style="height: 3000px"></div>
+    </body></html>""",
+    "/next": b"<html><body><h1 id='title'>Next page</h1></body></html>"
+}
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = PAGES.get(self.path)
+        self.send_response(200 if body else 404)
+        self.send_header("Content-Type", "text/html")
+        self.end_headers()
+        self.wfile.write(body or b"not found")
+
+    def log_message(self, format, *args):
+        pass
+
+def _serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+class _FakeAgent:
+    """Records what the executor hands over instead of calling an LLM"""
+
+    def __init__(self):
+        self.expectations = []
+        self.calls = []
+
+    async def execute_task(self, task):
+        self.calls.append({"task": task, "expectations": list(self.expectations)})
+        return {"status": "success", "execution_time": 0.1}
+
+def _execute(scenario, fallback_agent=None):
+    """Run the scenario on a fresh page; returns (result, page url, teardown flag)"""
+    async def run():
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(headless=True)
+            try:
+                page = await browser.new_page()
+                executor = ScenarioExecutor(fallback_agent=fallback_agent, screenshots_dir=tempfile.mkdtemp())
+                result = await executor.execute(scenario, page)
+                return result, page.url, await page.evaluate("window.tornDown === true")
+            finally:
+                await browser.close()
+    return asyncio.run(run())
+
+def _builder(base_url, scenario_id):
+    return ScenarioBuilder().create_scenario(scenario_id, scenario_id, "", ScenarioType.FUNCTIONAL, base_url)
+
+def test_actions_map_to_playwright():
+    print("🎭 Testing action to Playwright mapping")
+    server, base_url = _serve()
+    try:
+        scenario = (_builder(base_url, "mapping")
+                    .add_action(ActionType.NAVIGATE, "/")
+                    .add_action(ActionType.INPUT, "#name", "Ada")
+                    .add_action(ActionType.SELECT, "#color", "blue")
+                    .add_action(ActionType.CLICK, "#submit")
+                    .add_action(ActionType.VERIFY, "#greeting", "Hello Ada (blue)")
+                    .add_action(ActionType.HOVER, "#hover")
+                    .add_action(ActionType.VERIFY, "#hovered")
+                    .add_action(ActionType.SCROLL, "page", "200")
+                    .add_action(ActionType.SCREENSHOT, "page")
+                    .add_action(ActionType.NAVIGATE, "/next")
+                    .add_action(ActionType.WAIT, "#title")
+                    .add_action(ActionType.VERIFY, "#title", "Next page")
+                    .build())
+        result, url, _ = _execute(scenario)
+    finally:
+        server.shutdown()
+
+    assert result["status"] == "success", result.get("error")
+    steps = result["result"]["actions_performed"]
+    assert len(steps) == 12 and all(step["status"] == "passed" for step in steps)
+    assert len(result["result"]["assertions_checked"]) == 3
+    assert len(result["result"]["screenshots"]) == 1
+    assert url == f"{base_url}/next"
+    print("✅ Every action type ran against the local page")
+
+def test_failing_verify_hands_main_phase_to_fallback():
+    print("🤖 Testing LLM fallback after a failing VERIFY")
+    server, base_url = _serve()
+    agent = _FakeAgent()
+    try:
+        scenario = (_builder(base_url, "main_fallback")
+                    .add_action(ActionType.INPUT, "#name", "Ada")
+                    .add_action(ActionType.CLICK, "#submit")
+                    .add_action(ActionType.VERIFY, "#greeting", "Goodbye", timeout=1)
+                    .add_action(ActionType.CLICK, "#submit")
+                    .add_action(ActionType.VERIFY, "#greeting", "Hello")
+                    .build())
+        result, _, _ = _execute(scenario, agent)
+    finally:
+        server.shutdown()
+
+    fallback = result["result"]["fallback"]
+    assert fallback["delegated_steps"] == 3  # the failed VERIFY and the two steps after it
+    [call] = agent.calls
+    assert base_url in call["task"] and "Goodbye" in call["task"]
+    assert [action.value for action in call["expectations"]] == ["Hello"]
+    assert agent.expectations == []  # reset after the hand-over
+    assert result["status"] == "success"
+    failed = [step for step in result["result"]["actions_performed"] if step["status"] == "failed"]
+    assert len(failed) == 1 and failed[0]["recovered_by_agent"]
+    print("✅ Failed step and the rest of the main phase delegated")
+
+def test_setup_failure_hands_setup_and_main_to_fallback():
+    server, base_url = _serve()
+    agent = _FakeAgent()
+    try:
+        scenario = (_builder(base_url, "setup_fallback")
+                    .add_setup([
+                        TestAction(ActionType.NAVIGATE, "/"),
+                        TestAction(ActionType.CLICK, "#missing", timeout=1),
+                        TestAction(ActionType.INPUT, "#name", "Ada")
+                    ])
+                    .add_action(ActionType.CLICK, "#submit")
+                    .add_action(ActionType.VERIFY, "#greeting", "Hello Ada")
+                    .build())
+        result, _, _ = _execute(scenario, agent)
+    finally:
+        server.shutdown()
+
+    # setup[1:] (the failed click and the input) plus every main action
+    assert result["result"]["fallback"]["delegated_steps"] == 4
+    [call] = agent.calls
+    assert "#missing" in call["task"] and "#submit" in call["task"]
+    assert [action.target for action in call["expectations"]] == ["#greeting"]
+    print("✅ Setup failure delegates the rest of setup plus the main phase")
+
+def test_teardown_runs_after_failure():
+    print("🧹 Testing teardown after a failure")
+    server, base_url = _serve()
+    try:
+        scenario = (_builder(base_url, "teardown")
+                    .add_action(ActionType.CLICK, "#missing", timeout=1)
+                    .add_teardown([TestAction(ActionType.CLICK, "#reset")])
+                    .build())
+        result, _, torn_down = _execute(scenario)
+    finally:
+        server.shutdown()
+
+    assert result["status"] == "error" and "#missing" in result["error"]
+    assert torn_down
+    assert [step["phase"] for step in result["result"]["actions_performed"]] == ["main", "teardown"]
+    print("✅ Teardown ran and the scenario still failed")
+
+def test_timeout_is_an_error():
+    print("⏰ Testing scenario timeout")
+    server, base_url = _serve()
+    try:
+        scenario = (_builder(base_url, "timeout")
+                    .add_action(ActionType.WAIT, "page", "5")
+                    .set_timeout(1)
+                    .build())
+        result, _, _ = _execute(scenario)
+    finally:
+        server.shutdown()
+
+    assert result["status"] == "error"
+    assert "timeout" in result["error"].lower()
+    print("✅ Scenario timeout reported as an error")
+
+if __name__ == "__main__":
+    test_actions_map_to_playwright()
+    test_failing_verify_hands_main_phase_to_fallback()
+    test_setup_failure_hands_setup_and_main_to_fallback()
+    test_teardown_runs_after_failure()
+    test_timeout_is_an_error()
@@ -0,0 +1,83 @@
+# test_scenario_graph.py
+import asyncio
+
+from backend.automation.suite_runner import SuiteRunner
+from backend.scenarios.scenario_builder import ScenarioBuilder, ScenarioType, ActionType
+from backend.scenarios.scenario_graph import ScenarioGraph
+from backend.scenarios.suite_planner import plan_shards
+
+def _scenario(scenario_id: str, depends_on=None, priority: int = 1):
+    builder = (ScenarioBuilder()
+               .create_scenario(scenario_id, scenario_id, "", ScenarioType.FUNCTIONAL, "https://app.example.com")
+               .add_action(ActionType.NAVIGATE, "/")
+               .set_priority(priority))
+    if depends_on:
+        builder.set_dependencies(depends_on)
+    return builder.build()
+
+def test_topological_order_and_components():
+    print("🕸️ Testing scenario dependency graph")
+    login = _scenario("login")
+    profile = _scenario("profile", ["login"])
+    orders = _scenario("orders", ["login"], priority=5)
+    checkout = _scenario("checkout", ["orders", "profile"])
+    standalone = _scenario("standalone")
+
+    graph = ScenarioGraph([checkout, orders, standalone, profile, login])
+    order = [s.id for s in graph.topological_order()]
+
+    assert order.index("login") < order.index("orders") < order.index("checkout")
+    assert order.index("profile") < order.index("checkout")
+
+    components = sorted([[s.id for s in group] for group in graph.components()], key=len)
+    assert components[0] == ["standalone"]
+    assert components[1][0] == "login" and components[1][-1] == "checkout"
+    print("✅ Dependencies ordered and grouped")
+
+def test_dependency_groups_stay_in_one_shard():
+    scenarios = [_scenario("login"), _scenario("a", ["login"]), _scenario("b", ["login"]),
+                 _scenario("x"), _scenario("y")]
+    shards = plan_shards(scenarios, 3)
+
+    shard_of = {s.id: index for index, shard in enumerate(shards) for s in shard}
+    assert shard_of["login"] == shard_of["a"] == shard_of["b"]
+    login_shard = [s.id for s in shards[shard_of["login"]]]
+    assert login_shard.index("login") < login_shard.index("a")
+
+def test_cycles_and_unknown_dependencies_are_rejected():
+    for scenarios in ([_scenario("a", ["b"]), _scenario("b", ["a"])], [_scenario("a", ["missing"])]):
+        try:
+            ScenarioGraph(scenarios)
+        except ValueError as e:
+            print(f"✅ Rejected: {e}")
+        else:
+            raise AssertionError("Invalid graph was accepted")
+
+def test_unknown_dependencies_are_planned_for_skipping():
+    orphan, child, other = _scenario("orphan", ["missing"]), _scenario("child", ["orphan"]), _scenario("other")
+    graph = ScenarioGraph([child, orphan, other], allow_missing=True)
+    assert graph.missing == {"orphan": ["missing"]}
+
+    [shard] = [shard for shard in plan_shards([child, orphan, other], 1)]
+    assert [s.id for s in shard].index("orphan") < [s.id for s in shard].index("child")
+
+    # The runner skips the orphan (and so its dependent) without opening a browser
+    runner = SuiteRunner(shard_count=1)
+    results = []
+    asyncio.run(runner._run_shard(0, [orphan, child], 0, None, results, [0.0], None))
+    assert [(r["scenario_id"], r["status"]) for r in results] == [("orphan", "skipped"), ("child", "skipped")]
+    assert "missing" in results[0]["error"]
+    print("✅ Unknown dependency skips its dependents instead of failing the suite")
+
+def test_with_dependencies_pulls_in_fixtures():
+    login = _scenario("login")
+    orders = _scenario("orders", ["login"])
+    selected = ScenarioGraph.with_dependencies([orders], [login, orders, _scenario("other")])
+    assert sorted(s.id for s in selected) == ["login", "orders"]
+
+if __name__ == "__main__":
+    test_topological_order_and_components()
+    test_dependency_groups_stay_in_one_shard()
+    test_cycles_and_unknown_dependencies_are_rejected()
+    test_unknown_dependencies_are_planned_for_skipping()
+    test_with_dependencies_pulls_in_fixtures()
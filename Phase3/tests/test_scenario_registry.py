@@ -0,0 +1,53 @@
+# test_scenario_registry.py
+import os
+import tempfile
+from pathlib import Path
+from backend.scenarios.scenario_builder import ScenarioBuilder, ScenarioTemplates, ScenarioType
+from backend.scenarios.scenario_registry import ScenarioRegistry
+
+def _save(scenarios_dir: str, scenario, filename: str):
+    builder = ScenarioBuilder()
+    builder.scenarios_dir = Path(scenarios_dir)
+    builder.current_scenario = scenario
+    return builder.save(filename)
+
+def test_scenario_registry():
+    print("📁 Testing Scenario Registry")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as scenarios_dir:
+        login_path = _save(scenarios_dir, ScenarioTemplates.login_flow(), "user_login.yaml")
+        _save(scenarios_dir, ScenarioTemplates.form_validation(), "form_validation.yaml")
+
+        registry = ScenarioRegistry(scenarios_dir, refresh_interval=0)
+
+        # Lookups by id, tag and type
+        assert len(registry) == 2
+        assert registry.get("user_login").name == "User Login Flow"
+        assert [s.id for s in registry.find(tags=["auth"])] == ["user_login"]
+        assert len(registry.find(scenario_type=ScenarioType.FUNCTIONAL)) == 2
+        assert registry.find(tags=["forms"], scenario_type=ScenarioType.PERFORMANCE) == []
+        print("✅ Index lookups work")
+
+        # Unchanged files are not re-parsed
+        assert registry.refresh(force=True) == 0
+
+        # Changed file is re-indexed incrementally
+        changed = ScenarioTemplates.login_flow()
+        changed.tags = ["auth", "smoke"]
+        _save(scenarios_dir, changed, "user_login.yaml")
+        stat = os.stat(login_path)
+        os.utime(login_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert registry.refresh(force=True) == 1
+        assert [s.id for s in registry.find(tags=["smoke"])] == ["user_login"]
+        print("✅ Changed file re-indexed")
+
+        # Removed file disappears from every index
+        os.remove(login_path)
+        assert registry.refresh(force=True) == 1
+        assert registry.get("user_login") is None
+        assert registry.find(tags=["auth"]) == []
+        print("✅ Removed file un-indexed")
+
+if __name__ == "__main__":
+    test_scenario_registry()
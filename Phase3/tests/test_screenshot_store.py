@@ -0,0 +1,57 @@
+# test_screenshot_store.py
+import io
+import asyncio
+import tempfile
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+from backend.automation.screenshot_store import ScreenshotStore
+
+def _png(width=1920, height=1080, text="Login"):
+    image = Image.new("RGB", (width, height), "white")
+    ImageDraw.Draw(image).rectangle((100, 100, 600, 300), fill="navy")
+    ImageDraw.Draw(image).text((120, 120), text, fill="white")
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def test_downscale_and_dedup():
+    print("🖼️ Testing screenshot store")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ScreenshotStore(tmp, image_format="webp", max_width=1280, thumbnail_width=320)
+
+        async def capture():
+            return await asyncio.gather(
+                store.save(_png(), label="step_1"),
+                store.save(_png(), label="step_2"),
+                store.save(_png(text="Logout"), label="step_3"),
+            )
+
+        first, second, third = asyncio.run(capture())
+        assert first["hash"] == second["hash"] != third["hash"]
+        assert first["width"] == 1280 and first["height"] == 720
+        assert [first["deduplicated"], second["deduplicated"]].count(True) == 1
+        assert Path(first["path"]).suffix == ".webp"
+
+        with Image.open(first["thumbnail"]) as thumbnail:
+            assert thumbnail.width == 320
+        assert store.find(first["hash"]) == Path(first["path"])
+        assert store.find(first["hash"], thumbnail=True) == Path(first["thumbnail"])
+        assert store.find("../etc") is None
+
+        stats = store.get_stats()
+        assert stats["saved"] == 2 and stats["deduplicated"] == 1
+        assert stats["compression_ratio"] < 1
+        print(f"✅ 3 frames stored as 2 files, {stats['compression_ratio']:.0%} of the original bytes")
+
+def test_jpeg_output():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ScreenshotStore(tmp, image_format="jpeg", max_width=0)
+        entry = asyncio.run(store.save(_png(400, 300)))
+        assert entry["path"].endswith(".jpg") and entry["width"] == 400
+    print("✅ JPEG output, downscaling disabled")
+
+if __name__ == "__main__":
+    test_downscale_and_dedup()
+    test_jpeg_output()
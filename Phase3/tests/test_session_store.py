@@ -0,0 +1,74 @@
+# test_session_store.py
+import time
+import asyncio
+import tempfile
+
+from backend.agents.session_store import SessionStore, CredentialProfile, scope_state
+
+APP = "https://app.example.com/dashboard"
+
+def _state(expires=-1):
+    return {
+        "cookies": [
+            {"name": "sid", "value": "abc", "domain": "app.example.com", "path": "/", "expires": expires},
+            {"name": "pref", "value": "1", "domain": ".example.com", "path": "/", "expires": -1},
+            {"name": "ads", "value": "x", "domain": "tracker.net", "path": "/", "expires": -1}
+        ],
+        "origins": [
+            {"origin": "https://app.example.com", "localStorage": [{"name": "token", "value": "t"}]},
+            {"origin": "https://other.example.org", "localStorage": [{"name": "k", "value": "v"}]}
+        ]
+    }
+
+def test_scope_to_origin():
+    print("🍪 Testing session scoping")
+    scoped = scope_state(_state(), APP)
+    assert [cookie["name"] for cookie in scoped["cookies"]] == ["sid", "pref"]
+    assert [entry["origin"] for entry in scoped["origins"]] == ["https://app.example.com"]
+    print("✅ Only cookies and localStorage of the target origin are kept")
+
+def test_warm_start_logs_in_once():
+    store = SessionStore(tempfile.mkdtemp(), max_age=3600)
+    logins = []
+
+    async def login():
+        logins.append(1)
+        await asyncio.sleep(0.05)
+        return _state()
+
+    profile = CredentialProfile(name="admin", url=APP, login=login)
+
+    async def run():
+        # Concurrent tasks wait for a single login
+        states = await asyncio.gather(*(store.get_or_login(profile) for _ in range(3)))
+        assert all(state == states[0] for state in states)
+        await store.get_or_login(profile)
+
+    asyncio.run(run())
+    assert len(logins) == 1
+    assert store.get_stats()["logins"] == 1 and store.get_stats()["hits"] == 3
+    # Same origin, other path: same session; other profile: separate session
+    assert store.load("https://app.example.com/settings", "admin") is not None
+    assert store.load(APP, "viewer") is None
+    print("✅ Login flow runs once, later tasks start warm")
+
+def test_stale_session_logs_in_again():
+    store = SessionStore(tempfile.mkdtemp(), max_age=3600)
+    store.save(APP, "admin", _state(expires=time.time() + 30))  # auth cookie about to expire
+    assert store.load(APP, "admin") is None and store.get_stats()["stale"] == 1
+
+    store.save(APP, "admin", _state())
+    assert store.load(APP, "admin") is not None
+    store.invalidate(APP, "admin")
+    assert store.load(APP, "admin") is None
+
+    old = SessionStore(store.store_dir, max_age=0)
+    old.save(APP, "admin", _state())
+    assert old.load(APP, "admin") is None
+    assert old.list_sessions()[0]["stale"]
+    print("✅ Expired cookies, max age and invalidation force a new login")
+
+if __name__ == "__main__":
+    test_scope_to_origin()
+    test_warm_start_logs_in_once()
+    test_stale_session_logs_in_again()
@@ -0,0 +1,56 @@
+# test_step_profiler.py
+import time
+import asyncio
+from types import SimpleNamespace
+
+from backend.agents.step_profiler import StepProfiler, ProfilingChatModel, ProfileAggregator
+
+class _SlowLLM:
+    model = "fake"
+
+    async def ainvoke(self, messages, output_format=None):
+        await asyncio.sleep(0.05)
+        return SimpleNamespace(usage=SimpleNamespace(prompt_tokens=1200, completion_tokens=80))
+
+def test_step_timeline():
+    print("⏱️ Testing step profiler")
+    profiler = StepProfiler()
+    llm = ProfilingChatModel(_SlowLLM(), profiler)
+
+    async def run():
+        profiler.record("create_agent", 0.01)
+        for _ in range(2):
+            await profiler.on_step_start()
+            await llm.ainvoke([])
+            await asyncio.sleep(0.02)  # browser action
+            await profiler.on_step_end()
+
+    asyncio.run(run())
+    assert len(profiler.steps) == 2
+    step = profiler.steps[0]
+    assert step["llm_calls"] == 1 and step["input_tokens"] == 1200 and step["output_tokens"] == 80
+    assert step["llm"] >= 0.05 and step["browser_actions"] >= 0.015
+    assert abs(step["duration"] - (step["llm"] + step["page_load"] + step["browser_actions"])) < 0.001
+    assert llm.model == "fake"  # other attributes reach the wrapped model
+    print("✅ LLM and browser time attributed per step")
+
+def test_flame_graph():
+    profiler = StepProfiler()
+    profiler.record("create_agent", 0.5)
+    profiler.steps = [{"llm": 2.0, "page_load": 1.0, "browser_actions": 0.5}]
+
+    aggregator = ProfileAggregator()
+    aggregator.add("web_test", profiler, wall_time=5.0)
+    aggregator.add("web_test", profiler, wall_time=5.0)
+    graph = aggregator.flame_graph()
+
+    [web] = graph["children"]
+    assert web["name"] == "web_test" and web["value"] == 10.0 and web["tasks"] == 2
+    by_name = {child["name"]: child for child in web["children"]}
+    assert by_name["agent_steps"]["value"] == 7.0
+    assert by_name["create_agent"]["value"] == 1.0 and by_name["other"]["value"] == 2.0
+    print("✅ Flame graph per agent type with unaccounted time as 'other'")
+
+if __name__ == "__main__":
+    test_step_timeline()
+    test_flame_graph()
@@ -0,0 +1,45 @@
+# test_suite_planner.py
+from backend.scenarios.scenario_builder import ScenarioBuilder, ScenarioTemplates, ScenarioType, ActionType
+from backend.scenarios.suite_planner import filter_scenarios, plan_shards, shard_durations
+
+def _scenario(scenario_id: str, priority: int = 1, tags=None):
+    return (ScenarioBuilder()
+            .create_scenario(scenario_id, scenario_id, "", ScenarioType.FUNCTIONAL, "https://example.com")
+            .add_action(ActionType.NAVIGATE, "/")
+            .set_tags(tags or [])
+            .set_priority(priority)
+            .build())
+
+def test_filter_scenarios():
+    print("🔎 Testing scenario filters")
+    scenarios = [ScenarioTemplates.login_flow(), ScenarioTemplates.form_validation()]
+
+    assert [s.id for s in filter_scenarios(scenarios, tags=["auth"])] == ["user_login"]
+    assert [s.id for s in filter_scenarios(scenarios, min_priority=4)] == ["user_login"]
+    assert filter_scenarios(scenarios, scenario_types=[ScenarioType.PERFORMANCE]) == []
+    assert len(filter_scenarios(scenarios)) == 2
+    print("✅ Filters work")
+
+def test_plan_shards_balances_by_history():
+    print("⚖️ Testing shard planning")
+    scenarios = [_scenario(f"s{i}") for i in range(8)]
+    durations = {"s0": 40.0, "s1": 30.0, "s2": 20.0, "s3": 10.0,
+                 "s4": 10.0, "s5": 10.0, "s6": 10.0, "s7": 10.0}
+
+    shards = plan_shards(scenarios, 3, durations)
+    totals = shard_durations(shards, durations)
+
+    assert sorted(s.id for shard in shards for s in shard) == sorted(s.id for s in scenarios)
+    # LPT keeps the slowest shard within one job of the average
+    assert max(totals) - sum(totals) / len(totals) <= max(durations.values())
+    assert max(totals) == 50.0
+    print(f"✅ Planned shard durations: {totals}")
+
+def test_plan_shards_never_creates_more_shards_than_scenarios():
+    assert len(plan_shards([_scenario("only")], 4)) == 1
+    assert plan_shards([], 4) == [[]]
+
+if __name__ == "__main__":
+    test_filter_scenarios()
+    test_plan_shards_balances_by_history()
+    test_plan_shards_never_creates_more_shards_than_scenarios()
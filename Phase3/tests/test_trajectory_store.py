@@ -0,0 +1,55 @@
+# test_trajectory_store.py
+import json
+import tempfile
+
+from backend.agents.trajectory_store import TrajectoryStore, divergent_step
+
+class _History:
+    """Stand-in for AgentHistoryList: only what the store writes"""
+
+    def __init__(self, steps: int):
+        self.history = [{"step": i} for i in range(steps)]
+
+    def save_to_file(self, path: str):
+        with open(path, "w") as f:
+            json.dump({"history": self.history}, f)
+
+def test_key_normalization():
+    print("🔑 Testing trajectory keys")
+    task = """
+        Navigate to https://example.com and log in
+    """
+    assert TrajectoryStore.key("web_test", task, "https://Example.com/login/#top") == \
+        TrajectoryStore.key("web_test", "Navigate to https://example.com and log in", "https://example.com/login")
+    assert TrajectoryStore.key("web_test", task) != TrajectoryStore.key("form_test", task)
+    assert TrajectoryStore.key("web_test", task, "https://example.com/?a=1") != \
+        TrajectoryStore.key("web_test", task, "https://example.com/?a=2")
+    print("✅ Whitespace, host case, trailing slash and fragment ignored")
+
+def test_divergent_step_parsing():
+    assert divergent_step(RuntimeError("Step 3 failed after 1 attempts: Element not found")) == 2
+    assert divergent_step(RuntimeError("Browser closed")) is None
+    print("✅ Divergent step parsed from rerun_history errors")
+
+def test_record_replay_and_invalidate():
+    print("📼 Testing trajectory metadata")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TrajectoryStore(tmp)
+        key = store.key("web_test", "task", "https://example.com")
+        store.save(key, _History(4), "web_test", "task", "https://example.com")
+        store.mark_replayed(key)
+        store.mark_replayed(key, diverged_at=2)
+
+        [meta] = store.list_trajectories()
+        assert meta["key"] == key and meta["steps"] == 4
+        assert meta["replays"] == 2 and meta["last_divergence_step"] == 2
+        assert store.get_stats()["full_replays"] == 1 and store.get_stats()["partial_replays"] == 1
+
+        store.invalidate(key)
+        assert store.list_trajectories() == []
+    print("✅ Replays counted, invalidated trajectories removed")
+
+if __name__ == "__main__":
+    test_key_normalization()
+    test_divergent_step_parsing()
+    test_record_replay_and_invalidate()